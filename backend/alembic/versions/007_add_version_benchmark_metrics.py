@@ -0,0 +1,36 @@
+"""Add post-build benchmark metrics to ModelVersion
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add benchmark metric columns to model_versions table
+    op.add_column('model_versions', sa.Column('benchmark_import_time_ms', sa.Float(), nullable=True))
+    op.add_column('model_versions', sa.Column('benchmark_first_inference_ms', sa.Float(), nullable=True))
+    op.add_column('model_versions', sa.Column('benchmark_p50_ms', sa.Float(), nullable=True))
+    op.add_column('model_versions', sa.Column('benchmark_p95_ms', sa.Float(), nullable=True))
+    op.add_column('model_versions', sa.Column('benchmark_peak_memory_mb', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    # Remove benchmark metric columns from model_versions table
+    op.drop_column('model_versions', 'benchmark_peak_memory_mb')
+    op.drop_column('model_versions', 'benchmark_p95_ms')
+    op.drop_column('model_versions', 'benchmark_p50_ms')
+    op.drop_column('model_versions', 'benchmark_first_inference_ms')
+    op.drop_column('model_versions', 'benchmark_import_time_ms')
@@ -0,0 +1,30 @@
+"""Add container resource profile to ModelVersion
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add cpu_limit and memory_limit_mb columns to model_versions table
+    op.add_column('model_versions', sa.Column('cpu_limit', sa.Float(), nullable=True))
+    op.add_column('model_versions', sa.Column('memory_limit_mb', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    # Remove cpu_limit and memory_limit_mb columns from model_versions table
+    op.drop_column('model_versions', 'memory_limit_mb')
+    op.drop_column('model_versions', 'cpu_limit')
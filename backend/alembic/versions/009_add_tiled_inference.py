@@ -0,0 +1,32 @@
+"""Add tiled inference flag to Model and tile progress to Job
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add tiling_enabled to models and tile counters to jobs
+    op.add_column('models', sa.Column('tiling_enabled', sa.Boolean(), server_default=sa.false(), nullable=False))
+    op.add_column('jobs', sa.Column('tile_count', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('tiles_completed', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    # Remove tiling columns
+    op.drop_column('jobs', 'tiles_completed')
+    op.drop_column('jobs', 'tile_count')
+    op.drop_column('models', 'tiling_enabled')
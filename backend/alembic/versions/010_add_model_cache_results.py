@@ -0,0 +1,28 @@
+"""Add result cache opt-out to Model
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add cache_results column to models table
+    op.add_column('models', sa.Column('cache_results', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade() -> None:
+    # Remove cache_results column from models table
+    op.drop_column('models', 'cache_results')
@@ -0,0 +1,47 @@
+"""Add content-addressed input blobs
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create input_blobs table
+    op.create_table(
+        'input_blobs',
+        sa.Column('sha256', sa.String(64), primary_key=True),
+        sa.Column('object_name', sa.String(500), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+
+    # Create job_inputs table
+    op.create_table(
+        'job_inputs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('job_id', postgresql.UUID(as_uuid=True), nullable=False, index=True),
+        sa.Column('input_path', sa.String(500), nullable=False),
+        sa.Column('blob_sha256', sa.String(64), nullable=False),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id']),
+        sa.ForeignKeyConstraint(['blob_sha256'], ['input_blobs.sha256']),
+    )
+
+
+def downgrade() -> None:
+    # Drop job_inputs and input_blobs tables
+    op.drop_table('job_inputs')
+    op.drop_table('input_blobs')
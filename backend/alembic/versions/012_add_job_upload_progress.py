@@ -0,0 +1,36 @@
+"""Add upload progress tracking and auto-run to Job
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add upload progress and auto-run columns to jobs table
+    op.add_column('jobs', sa.Column('inputs_uploaded', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('jobs', sa.Column('auto_run', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+    # Jobs uploaded before this migration: count the inputs they already have
+    op.execute(
+        "UPDATE jobs SET inputs_uploaded = "
+        "(SELECT COUNT(*) FROM job_inputs WHERE job_inputs.job_id = jobs.id)"
+    )
+
+
+def downgrade() -> None:
+    # Remove upload progress and auto-run columns from jobs table
+    op.drop_column('jobs', 'auto_run')
+    op.drop_column('jobs', 'inputs_uploaded')
@@ -0,0 +1,58 @@
+"""Add resumable upload sessions
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create upload_sessions table
+    op.create_table(
+        'upload_sessions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('kind', sa.String(20), nullable=False),
+        sa.Column('target_id', postgresql.UUID(as_uuid=True), nullable=False, index=True),
+        sa.Column('filename', sa.String(255), nullable=False),
+        sa.Column('object_name', sa.String(500), nullable=False),
+        sa.Column('multipart_upload_id', sa.String(255), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('chunk_size', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(64), nullable=True),
+        sa.Column('status', sa.Enum('ACTIVE', 'COMPLETED', 'ABORTED', name='uploadsessionstatus'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+    )
+
+    # Create upload_parts table
+    op.create_table(
+        'upload_parts',
+        sa.Column('session_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('part_number', sa.Integer(), primary_key=True),
+        sa.Column('etag', sa.String(100), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('sha256', sa.String(64), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['upload_sessions.id'], ondelete='CASCADE'),
+    )
+
+
+def downgrade() -> None:
+    # Drop upload_parts and upload_sessions tables
+    op.drop_table('upload_parts')
+    op.drop_table('upload_sessions')
+    op.execute('DROP TYPE uploadsessionstatus')
@@ -0,0 +1,28 @@
+"""Add the worker process running a Job
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Add worker_id column to jobs table
+    op.add_column('jobs', sa.Column('worker_id', sa.String(255), nullable=True))
+
+
+def downgrade() -> None:
+    # Remove worker_id column from jobs table
+    op.drop_column('jobs', 'worker_id')
@@ -0,0 +1,28 @@
+"""Add the ASSEMBLED upload session status
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Enum values cannot be added inside a transaction on older PostgreSQL
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE uploadsessionstatus ADD VALUE IF NOT EXISTS 'ASSEMBLED' AFTER 'ACTIVE'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop an enum value; retire sessions that use it instead
+    op.execute("UPDATE upload_sessions SET status = 'ABORTED' WHERE status = 'ASSEMBLED'")
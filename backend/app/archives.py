@@ -0,0 +1,70 @@
+"""
+ZIP archives of job outputs, streamed straight from MinIO.
+
+zipfile writes to a non-seekable sink in streaming mode (local headers with
+data descriptors), so each output is copied chunk by chunk from its MinIO
+response into the archive and handed to the client as it is produced. Memory
+use is one chunk plus the central directory, whatever the archive size.
+"""
+import zipfile
+import logging
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class _Sink:
+    """Write-only, non-seekable buffer that zipfile writes into and the response drains."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data) -> int:
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def output_arcname(object_name: str) -> str:
+    """Name of an output inside its job's folder: the path below job_outputs/<job id>/."""
+    parts = object_name.split("/", 2)
+    if len(parts) == 3 and parts[0] == "job_outputs":
+        return parts[2]
+    return parts[-1]
+
+
+def stream_zip(entries):
+    """
+    Yield a ZIP archive of (arcname, object_name) entries.
+
+    Outputs are already-compressed images, so entries are stored, not deflated.
+    Objects that have disappeared are skipped with a warning.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for arcname, object_name in entries:
+            try:
+                response = storage.client.get_object(storage.bucket, object_name)
+            except Exception as e:
+                logger.warning(f"Skipping {object_name} in archive: {e}")
+                continue
+            try:
+                with archive.open(arcname, "w", force_zip64=True) as dest:
+                    for chunk in response.stream(CHUNK_SIZE):
+                        dest.write(chunk)
+                        yield sink.drain()
+            finally:
+                response.close()
+                response.release_conn()
+            yield sink.drain()
+    # Central directory
+    yield sink.drain()
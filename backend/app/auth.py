@@ -1,19 +1,35 @@
+import json
+import time
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+import redis
 from app.config import settings
+from app.cache import LRUCache, get_async_redis
 from app.db import get_db
 from app.models import User, UserRole
 from app.schemas import TokenData
 from uuid import UUID
 
+logger = logging.getLogger(__name__)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Token -> (user_id, exp); a token's claims never change, so only expiry matters
+_token_cache = LRUCache(settings.AUTH_CACHE_MAX_ENTRIES)
+# User id -> cached user fields (never the password hash)
+_user_cache = LRUCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_LOCAL_CACHE_TTL_SECONDS)
+_sync_redis = None
+
+USER_CACHE_FIELDS = ("username", "email", "role", "created_at")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -35,6 +51,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 def decode_access_token(token: str) -> TokenData:
+    cached = _token_cache.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at is None or expires_at > time.time():
+            return TokenData(user_id=user_id)
+        _token_cache.pop(token)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         user_id: str = payload.get("sub")
@@ -43,6 +66,7 @@ def decode_access_token(token: str) -> TokenData:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
             )
+        _token_cache.set(token, (UUID(user_id), payload.get("exp")))
         return TokenData(user_id=UUID(user_id))
     except JWTError:
         raise HTTPException(
@@ -51,13 +75,86 @@ def decode_access_token(token: str) -> TokenData:
         )
 
 
+def user_cache_key(user_id) -> str:
+    return f"auth_user:{user_id}"
+
+
+def _user_from_fields(user_id: UUID, fields: dict) -> User:
+    # Detached, read-only stand-in for the row; routes only read its columns
+    return User(
+        id=user_id,
+        username=fields["username"],
+        email=fields["email"],
+        role=UserRole(fields["role"]),
+        created_at=datetime.fromisoformat(fields["created_at"]),
+    )
+
+
+async def resolve_user(user_id: UUID, db: Session) -> Optional[User]:
+    """
+    Look up the user a token refers to: in-process cache, then Redis, then
+    the database. Only found users are cached.
+    """
+    fields = _user_cache.get(user_id)
+    if fields is not None:
+        return _user_from_fields(user_id, fields)
+
+    try:
+        cached = await get_async_redis().get(user_cache_key(user_id))
+    except redis.RedisError as e:
+        logger.warning(f"User cache unavailable: {e}")
+        cached = None
+    if cached is not None:
+        fields = json.loads(cached)
+        _user_cache.set(user_id, fields)
+        return _user_from_fields(user_id, fields)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        return None
+
+    fields = {
+        "username": user.username,
+        "email": user.email,
+        "role": user.role.value,
+        "created_at": user.created_at.isoformat(),
+    }
+    _user_cache.set(user_id, fields)
+    try:
+        await get_async_redis().set(
+            user_cache_key(user_id), json.dumps(fields), ex=settings.AUTH_USER_CACHE_TTL_SECONDS
+        )
+    except redis.RedisError as e:
+        logger.warning(f"User cache unavailable: {e}")
+    return user
+
+
+def invalidate_user(user_id):
+    """Drop a user from the caches. Other API processes catch up within AUTH_LOCAL_CACHE_TTL_SECONDS."""
+    global _sync_redis
+    _user_cache.pop(user_id)
+    try:
+        if _sync_redis is None:
+            _sync_redis = redis.from_url(settings.REDIS_URL)
+        _sync_redis.delete(user_cache_key(user_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate cached user {user_id}: {e}")
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    # Covers every write path, including the maintenance scripts
+    invalidate_user(target.id)
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> User:
     token = credentials.credentials
     token_data = decode_access_token(token)
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    user = await resolve_user(token_data.user_id, db)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -80,8 +177,7 @@ async def get_current_user_optional(
     try:
         token = credentials.credentials
         token_data = decode_access_token(token)
-        user = db.query(User).filter(User.id == token_data.user_id).first()
-        return user
+        return await resolve_user(token_data.user_id, db)
     except:
         return None
 
@@ -0,0 +1,172 @@
+"""
+Content-addressed, reference-counted storage for job inputs.
+
+Uploaded inputs are hashed while they are spooled to disk and stored once in
+MinIO under blobs/sha256/<hash>. Jobs keep their logical input paths in
+Job.input_path; JobInput rows map each logical path to the blob holding its
+bytes. InputBlob.ref_count counts those rows, and blobs that drop to zero
+are removed by collect_garbage().
+"""
+import os
+import hashlib
+import tempfile
+import logging
+from sqlalchemy import update, event
+from sqlalchemy.dialects.postgresql import insert
+from app.models import InputBlob, JobInput
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_object_name(sha256: str) -> str:
+    return f"blobs/sha256/{sha256}"
+
+
+async def spool_upload(file, suffix: str = "") -> tuple[str, str, int]:
+    """Stream an UploadFile to a temp file, hashing as it goes. Returns (path, sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        while True:
+            chunk = await file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            tmp_file.write(chunk)
+            size += len(chunk)
+        return tmp_file.name, digest.hexdigest(), size
+
+
+def _acquire(db, sha256: str, size: int) -> int:
+    """Take a reference on a blob, creating its row if needed. Returns the new ref_count."""
+    stmt = insert(InputBlob).values(
+        sha256=sha256,
+        object_name=blob_object_name(sha256),
+        size=size,
+        ref_count=1
+    ).on_conflict_do_update(
+        index_elements=[InputBlob.sha256],
+        set_={"ref_count": InputBlob.ref_count + 1}
+    ).returning(InputBlob.ref_count)
+    return db.execute(stmt).scalar_one()
+
+
+def _attach(db, job_id, input_path: str, sha256: str, size: int, store):
+    """
+    Point a job's logical input path at the blob with the given hash,
+    calling store(object_name) to write the bytes if the blob is new.
+
+    The reference is committed before the bytes are stored, so a concurrent
+    garbage collection can never delete a blob that is about to be used.
+    Every uploader holds the bytes, so any of them that finds the object
+    missing stores it: a concurrent upload of the same content can't rely on
+    the first one's store succeeding, or having finished.
+    """
+    _acquire(db, sha256, size)
+
+    existing = db.query(JobInput).filter(
+        JobInput.job_id == job_id,
+        JobInput.input_path == input_path
+    ).first()
+    if existing:
+        # Re-upload of the same slot: move the reference to the new blob
+        release(db, existing.blob_sha256)
+        existing.blob_sha256 = sha256
+    else:
+        db.add(JobInput(job_id=job_id, input_path=input_path, blob_sha256=sha256))
+    db.commit()
+
+    # Identical bytes under a content address, so concurrent stores are harmless
+    if not storage.object_exists(blob_object_name(sha256)):
+        try:
+            store(blob_object_name(sha256))
+        except Exception:
+            existing = db.query(JobInput).filter(
+                JobInput.job_id == job_id,
+                JobInput.input_path == input_path
+            ).first()
+            if existing:
+                db.delete(existing)
+                db.commit()
+            raise
+    else:
+        logger.info(f"Deduplicated upload {input_path} -> {sha256[:12]}")
+
+
+def attach_upload(db, job_id, input_path: str, tmp_path: str, sha256: str, size: int):
+    """Attach a file spooled by spool_upload()."""
+    _attach(db, job_id, input_path, sha256, size, lambda object_name: storage.upload_file(tmp_path, object_name))
+
+
+def hash_object(object_name: str) -> tuple[str, int]:
+    """Stream an object from MinIO and return (sha256, size)."""
+    digest = hashlib.sha256()
+    size = 0
+    response = storage.client.get_object(storage.bucket, object_name)
+    try:
+        for chunk in response.stream(CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    finally:
+        response.close()
+        response.release_conn()
+    return digest.hexdigest(), size
+
+
+def attach_staged(db, job_id, input_path: str, staging_object: str):
+    """
+    Attach an input a client uploaded directly to MinIO (presigned PUT).
+
+    The hash is computed here rather than trusted from the client, so a
+    crafted upload can never poison a blob other jobs deduplicate against.
+    New blobs are moved into place with a server-side copy.
+    """
+    sha256, size = hash_object(staging_object)
+    _attach(db, job_id, input_path, sha256, size, lambda object_name: storage.copy_object(staging_object, object_name))
+    storage.delete_object(staging_object)
+
+
+def release(db, sha256: str):
+    db.execute(
+        update(InputBlob)
+        .where(InputBlob.sha256 == sha256)
+        .values(ref_count=InputBlob.ref_count - 1)
+    )
+
+
+@event.listens_for(JobInput, "before_delete")
+def _release_on_delete(mapper, connection, target):
+    # Covers ORM cascades (job, version and model deletion)
+    connection.execute(
+        update(InputBlob.__table__)
+        .where(InputBlob.__table__.c.sha256 == target.blob_sha256)
+        .values(ref_count=InputBlob.__table__.c.ref_count - 1)
+    )
+
+
+def input_objects(job) -> dict:
+    """Map each of a job's logical input paths to the object holding its bytes.
+
+    Paths missing from the map are legacy inputs stored under the path itself.
+    """
+    return {job_input.input_path: job_input.blob.object_name for job_input in job.inputs}
+
+
+def collect_garbage(db) -> int:
+    """Delete unreferenced blobs. Returns the number removed."""
+    removed = 0
+    # Row locks make concurrent uploads wait until each blob is fully gone
+    blobs = db.query(InputBlob).filter(InputBlob.ref_count <= 0).with_for_update(skip_locked=True).all()
+    for blob in blobs:
+        try:
+            storage.delete_object(blob.object_name)
+        except Exception as e:
+            logger.warning(f"Could not delete blob {blob.sha256}: {e}")
+            continue
+        db.delete(blob)
+        removed += 1
+    db.commit()
+    return removed
@@ -0,0 +1,71 @@
+"""
+Shared caching helpers for the API process: a lazily created async Redis
+client (one connection pool per process) and a small in-process LRU cache
+with per-entry expiry.
+"""
+import time
+from collections import OrderedDict
+import redis.asyncio as aioredis
+from app.config import settings
+
+
+_async_redis = None
+
+
+def get_async_redis():
+    """Async Redis client shared by middleware and request handlers."""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.from_url(
+            settings.REDIS_URL,
+            max_connections=settings.API_REDIS_MAX_CONNECTIONS
+        )
+    return _async_redis
+
+
+class LRUCache:
+    """
+    Bounded mapping whose entries expire after ttl_seconds (None: never).
+
+    With max_bytes set, callers pass each entry's size to set() and the
+    least recently used entries are evicted to stay within it.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float = None, max_bytes: int = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()  # key -> (expires_at, value, size)
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value, _ = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            self.pop(key)
+            return default
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl_seconds: float = None, size: int = 0):
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds is not None else None
+        self.pop(key)
+        self.entries[key] = (expires_at, value, size)
+        self.total_bytes += size
+        while len(self.entries) > self.max_entries or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self.entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+
+    def pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
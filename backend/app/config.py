@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -13,6 +13,7 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
+    API_REDIS_MAX_CONNECTIONS: int = 50  # Async connection pool size per API process
 
     # MinIO
     MINIO_ENDPOINT: str = "minio:9000"
@@ -21,6 +22,14 @@ class Settings(BaseSettings):
     MINIO_SECRET_KEY: str = "minioadmin"
     MINIO_BUCKET: str = "cv-platform"
     MINIO_SECURE: bool = False
+    MINIO_EXTERNAL_SECURE: Optional[bool] = None  # HTTPS for presigned URLs; defaults to MINIO_SECURE
+    MINIO_REGION: str = "us-east-1"  # Known up front so presigning makes no request to MinIO
+    MINIO_POOL_MAXSIZE: int = 0  # Connections kept per process; 0 = match the process's concurrency
+    MINIO_CONNECT_TIMEOUT_SECONDS: float = 5
+    MINIO_READ_TIMEOUT_SECONDS: float = 300
+    # "proxy": uploads/downloads stream through the API; "direct": clients use
+    # presigned MinIO URLs (PUT + completion callback, 307 redirects for downloads)
+    STORAGE_TRANSFER_MODE: str = "proxy"
 
     # Docker Registry
     REGISTRY_URL: str = "localhost:5001"
@@ -31,6 +40,20 @@ class Settings(BaseSettings):
     JWT_EXPIRATION_HOURS: int = 24
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     ENABLE_AUTH: bool = False  # Set to True in production
+    AUTH_CACHE_MAX_ENTRIES: int = 10000  # Decoded tokens / resolved users kept in-process
+    AUTH_LOCAL_CACHE_TTL_SECONDS: int = 5  # In-process user cache; bounds staleness across API processes
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60  # Shared user cache in Redis
+
+    # Public model catalog cache (invalidated on every model change; TTL is a backstop)
+    CATALOG_CACHE_TTL_SECONDS: int = 3600
+
+    # Demo images (in-process cache per API process; browser max-age for unversioned URLs)
+    DEMO_IMAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    DEMO_IMAGE_CACHE_MAX_ENTRY_BYTES: int = 4 * 1024 * 1024
+    DEMO_IMAGE_CACHE_MAX_ENTRIES: int = 1000
+    DEMO_IMAGE_MAX_AGE_SECONDS: int = 300
+    DERIVATIVE_QUALITY: int = 80  # WebP/JPEG quality for thumbnails and previews
+    DERIVATIVE_MAX_PIXELS: int = 100_000_000  # Larger sources (after JPEG draft decoding) get no variants
 
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -46,23 +69,95 @@ class Settings(BaseSettings):
     RATE_LIMIT_BUILD: str = "10 per hour"
     RATE_LIMIT_INFERENCE: str = "50 per hour"
     RATE_LIMIT_UPLOAD: str = "20 per hour"
+    RATE_LIMIT_UPLOAD_PARTS: str = "5000 per hour"  # Individual parts of resumable uploads
     RATE_LIMIT_JOB_STATUS: str = "1000 per hour"  # High limit for job status polling
+    RATE_LIMIT_LOCAL_FRACTION: float = 0.1  # Share of a client's remaining budget admitted without Redis
+    RATE_LIMIT_LOCAL_SYNC_SECONDS: float = 1.0  # Max age of the local view before re-checking Redis
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 10000  # Bound on buckets tracked in-process
 
     # File Upload Limits
     MAX_UPLOAD_SIZE_MB: int = 500
     ALLOWED_UPLOAD_EXTENSIONS: List[str] = [".zip"]
     MAX_ZIP_EXTRACTION_SIZE_MB: int = 2000  # Limit extracted size
+    UPLOAD_CHUNK_SIZE_MB: int = 8  # Part size for resumable uploads (S3 minimum is 5)
+    UPLOAD_SESSION_TTL_HOURS: int = 24  # Unfinished resumable uploads are aborted after this
 
     # Container limits
     CONTAINER_CPU_LIMIT: str = "1"
     CONTAINER_MEMORY_LIMIT: str = "8g"
     CONTAINER_TIMEOUT: int = 300  # 5 minutes
     MAX_BUILD_TIME_SECONDS: int = 1800
+    IMAGE_PULL_TIMEOUT_SECONDS: int = 600  # Time budget for pulling a model image
+    IMAGE_PUSH_TIMEOUT_SECONDS: int = 600  # Time budget for pushing a built image
+    STORAGE_TRANSFER_TIMEOUT_SECONDS: int = 600  # Time budget for a task's downloads, and again for its uploads
     MAX_BUILD_MEMORY_GB: int = 4
     MAX_INFERENCE_TIME_SECONDS: int = 300
     MAX_INFERENCE_MEMORY_GB: int = 4
     MAX_INFERENCE_CPU_CORES: int = 2
 
+    # Celery worker role: "build" or "inference" imports only that role's task
+    # modules at startup; empty imports all of them
+    WORKER_ROLE: str = ""
+
+    # Database connection pools, per process. Prefork worker children run one
+    # task at a time and only hold a connection for short DB steps.
+    DB_POOL_SIZE: int = 5  # API
+    DB_MAX_OVERFLOW: int = 10
+    WORKER_DB_POOL_SIZE: int = 1
+    WORKER_DB_MAX_OVERFLOW: int = 2
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+
+    # Celery execution profile for long-running container tasks
+    CELERY_PREFETCH_MULTIPLIER: int = 1  # Reserve one task per worker process at a time
+    CELERY_MAX_TASKS_PER_CHILD: int = 200  # Recycle worker processes to bound memory growth
+    CELERY_RESULT_EXPIRES_SECONDS: int = 86400  # Only tile chords read results; must outlast the largest tiled job
+    CELERY_TASK_CLEANUP_SECONDS: int = 60  # Between a task's soft and hard time limit, to record the failure
+    CELERY_VISIBILITY_MARGIN_SECONDS: int = 600  # Headroom over the longest task before Redis redelivers it
+
+    # Worker capacity for resource-aware admission (0 = detect from host)
+    WORKER_HOSTNAME: str = ""
+    WORKER_CPU_CAPACITY: float = 0
+    WORKER_MEMORY_CAPACITY_MB: int = 0
+    RESOURCE_MEMORY_HEADROOM: float = 1.5  # Multiplier over benchmarked peak memory
+    RESOURCE_MIN_MEMORY_MB: int = 256
+    RESOURCE_ADMISSION_RETRY_SECONDS: int = 5
+    RESOURCE_RESERVATION_GRACE_SECONDS: int = 60
+
+    # Model-affinity routing of inference tasks
+    INFERENCE_AFFINITY_ENABLED: bool = True
+    WORKER_HEARTBEAT_INTERVAL_SECONDS: int = 10
+    WORKER_HEARTBEAT_TTL_SECONDS: int = 30
+    WARM_VERSION_TTL_SECONDS: int = 3600  # How long a worker counts as warm after running a version
+
+    # Micro-batching of single-image jobs (opt-in)
+    INFERENCE_BATCHING_ENABLED: bool = False
+    INFERENCE_BATCH_WINDOW_MS: int = 200  # How long to wait for more jobs of the same version
+    INFERENCE_BATCH_MAX_SIZE: int = 16
+
+    # Tiled inference for very large images (models opt in via tiling_enabled)
+    TILING_THRESHOLD_PIXELS: int = 4096 * 4096
+    TILING_MAX_PIXELS: int = 4_000_000_000
+    TILING_MAX_DECODE_MB: int = 4096  # Worker memory a PNG/JPEG/TIFF input may take while it is decoded
+    TILE_SIZE: int = 2048
+    TILE_OVERLAP: int = 128
+
+    # Volumetric inputs (NIfTI / DICOM series)
+    VOLUME_CHUNK_SLICES: int = 32  # Slices per memory-mappable .npy chunk
+
+    # Result memoization keyed by (image digest, input hash); models can opt out
+    RESULT_CACHE_ENABLED: bool = False
+    RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    RESULT_CACHE_MAX_ENTRIES: int = 100000
+    RESULT_CACHE_EVICT_EVERY: int = 500  # Run an eviction pass after this many stores
+
+    # Post-build benchmark
+    BENCHMARK_ENABLED: bool = True
+    BENCHMARK_ITERATIONS: int = 5  # Steady-state passes over the synthetic input set
+    BENCHMARK_IMAGE_SIZE: int = 512
+    BENCHMARK_TIMEOUT_SECONDS: int = 600
+    BENCHMARK_MAX_FIRST_INFERENCE_SECONDS: int = 120
+    BENCHMARK_MAX_P95_SECONDS: int = 60
+
     # Storage limits
     MAX_STORAGE_PER_USER_GB: int = 10
 
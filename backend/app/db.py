@@ -1,9 +1,23 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+def _pool_options() -> dict:
+    """Pool sizing for this process: Celery workers (WORKER_ROLE set) or the API."""
+    if settings.WORKER_ROLE:
+        return {"pool_size": settings.WORKER_DB_POOL_SIZE, "max_overflow": settings.WORKER_DB_MAX_OVERFLOW}
+    return {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
+
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_pre_ping=True,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    **_pool_options()
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -15,3 +29,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@contextmanager
+def session_scope():
+    """
+    One short transactional unit: commit on success, roll back on error, and
+    hand the connection back to the pool on exit.
+
+    Celery tasks open one of these per DB step (load, mark running, record
+    results) rather than holding a session across a container run or build.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def connections_in_use() -> int:
+    """Connections currently checked out of this process's pool."""
+    return engine.pool.checkedout()
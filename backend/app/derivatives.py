@@ -0,0 +1,111 @@
+"""
+Downscaled, re-encoded variants of stored images (thumbnails, previews).
+
+Variants are rendered with Pillow on first request, or eagerly at upload time
+for demo images, and stored in MinIO under
+derivatives/<variant>/<source object>.<format>. Their sources are immutable
+(job outputs, content-addressed demo images), so a stored variant never has to
+be invalidated and can be served with a long cache lifetime.
+
+Sources are read from a temporary file rather than into memory, JPEGs are
+decoded at a reduced scale, and anything still larger than
+DERIVATIVE_MAX_PIXELS is refused, so a gigapixel output cannot exhaust the
+API's memory.
+"""
+import io
+import logging
+import os
+import tempfile
+from app.storage import storage
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> longest edge in pixels
+VARIANTS = {
+    "thumb": 256,
+    "preview": 1024,
+}
+
+# Format name -> (Pillow format, content type)
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+
+class SourceTooLarge(ValueError):
+    """The source image has more pixels than DERIVATIVE_MAX_PIXELS."""
+
+
+def choose_format(accept: str) -> str:
+    """WebP for clients that advertise it, JPEG otherwise."""
+    return "webp" if accept and "image/webp" in accept else "jpeg"
+
+
+def content_type(fmt: str) -> str:
+    return FORMATS[fmt][1]
+
+
+def derivative_name(object_name: str, variant: str, fmt: str) -> str:
+    return f"derivatives/{variant}/{object_name}.{fmt}"
+
+
+def render(source, variant: str, fmt: str) -> bytes:
+    """Downscale an image (a path or file object) to fit the variant's box and encode it."""
+    from PIL import Image, ImageOps
+
+    size = VARIANTS[variant]
+    with Image.open(source) as img:
+        # Lets the JPEG decoder scale down by up to 8x before any pixels are read
+        img.draft(None, (size, size))
+        if img.width * img.height > settings.DERIVATIVE_MAX_PIXELS:
+            raise SourceTooLarge(
+                f"Image is {img.width}x{img.height}, more than {settings.DERIVATIVE_MAX_PIXELS} pixels to downscale"
+            )
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size), Image.LANCZOS)
+
+        pil_format = FORMATS[fmt][0]
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+        buffer = io.BytesIO()
+        img.save(buffer, format=pil_format, quality=settings.DERIVATIVE_QUALITY)
+        return buffer.getvalue()
+
+
+def get_derivative(object_name: str, variant: str, fmt: str) -> bytes:
+    """Return a variant of an image, rendering and storing it on first use."""
+    name = derivative_name(object_name, variant, fmt)
+    data = storage.get_bytes(name)
+    if data is not None:
+        return data
+
+    stat = storage.stat_object(object_name)
+    if stat is None:
+        raise FileNotFoundError(object_name)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_path = os.path.join(tmp_dir, "source")
+        storage.download_file(object_name, source_path)
+        data = render(source_path, variant, fmt)
+    storage.upload_bytes(data, name, content_type=content_type(fmt))
+    logger.info(f"Rendered {variant}/{fmt} for {object_name} ({stat.size} -> {len(data)} bytes)")
+    return data
+
+
+def pregenerate(object_name: str, source: bytes, variants=("thumb",)):
+    """Render variants at upload time so the first page view doesn't pay for them."""
+    for variant in variants:
+        for fmt in FORMATS:
+            try:
+                storage.upload_bytes(
+                    render(io.BytesIO(source), variant, fmt),
+                    derivative_name(object_name, variant, fmt),
+                    content_type=content_type(fmt)
+                )
+            except Exception as e:
+                # Rendered lazily on first request instead
+                logger.warning(f"Could not pre-render {variant}/{fmt} for {object_name}: {e}")
@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
-from app.routes import users, models, jobs
+from app.routes import users, models, jobs, uploads
 from app.config import settings
 from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware
 import logging
@@ -38,6 +38,18 @@ app.add_middleware(
 app.include_router(users.router)
 app.include_router(models.router)
 app.include_router(jobs.router)
+app.include_router(uploads.router)
+
+
+@app.on_event("startup")
+async def prepare_storage():
+    """Size the MinIO pool to the request threadpool and check the bucket once."""
+    import anyio.to_thread
+    from fastapi.concurrency import run_in_threadpool
+    from app.storage import storage
+
+    storage.configure(pool_maxsize=int(anyio.to_thread.current_default_thread_limiter().total_tokens))
+    await run_in_threadpool(storage.ensure_bucket)
 
 
 @app.get("/health")
@@ -2,34 +2,138 @@
 Security middleware for rate limiting, input validation, and security headers
 """
 import time
+import math
 import hashlib
+from collections import OrderedDict
 from typing import Dict, Optional
-from fastapi import Request, HTTPException, status
+from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
 from app.config import settings
-import redis
+from app.cache import get_async_redis
+from app.storage import storage
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-# Redis client for rate limiting
-try:
-    redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-except Exception as e:
-    logger.warning(f"Failed to connect to Redis for rate limiting: {e}")
-    redis_client = None
+# Atomic token bucket. Refills continuously at capacity / window per second.
+# KEYS[1] = bucket hash, ARGV = capacity, window_seconds, debt (requests
+# already admitted locally that still have to be charged).
+# Returns {allowed, remaining, retry_after_seconds}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local debt = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * capacity / window) - debt
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = math.ceil((1 - tokens) * window / capacity)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(window))
+return {allowed, math.max(0, math.floor(tokens)), retry_after}
+"""
+
+
+_token_bucket = None
+
+
+def get_token_bucket():
+    global _token_bucket
+    if _token_bucket is None:
+        _token_bucket = get_async_redis().register_script(TOKEN_BUCKET_SCRIPT)
+    return _token_bucket
+
+
+def route_template(scope) -> str:
+    """
+    The path template of the route a request will hit ('/api/jobs/{job_id}'),
+    so that every job id shares one bucket. Falls back to the raw path.
+    """
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return scope["path"]
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class LocalBuckets:
     """
-    Token bucket rate limiting middleware using Redis
+    In-process view of recent Redis answers, used as a fast path.
+
+    After Redis reports `remaining` tokens for a bucket, up to
+    RATE_LIMIT_LOCAL_FRACTION of them may be admitted locally for
+    RATE_LIMIT_LOCAL_SYNC_SECONDS. Locally admitted requests are charged to
+    Redis as debt on the next round trip, so clients near their limit always
+    go to Redis and the shared count stays accurate.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.entries: "OrderedDict[str, list]" = OrderedDict()  # key -> [budget, used, synced_at, remaining]
+
+    def try_admit(self, key: str, now: float) -> Optional[int]:
+        """Admit locally if possible; returns the estimated remaining count, else None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        budget, used, synced_at, remaining = entry
+        if used >= budget or now - synced_at > settings.RATE_LIMIT_LOCAL_SYNC_SECONDS:
+            return None
+        entry[1] = used + 1
+        self.entries.move_to_end(key)
+        return remaining - entry[1]
+
+    def take_debt(self, key: str) -> int:
+        entry = self.entries.get(key)
+        if entry is None:
+            return 0
+        debt = entry[1]
+        entry[1] = 0
+        return debt
+
+    def add_debt(self, key: str, debt: int):
+        # Redis was unreachable; keep the debt for the next successful sync
+        if debt and key in self.entries:
+            self.entries[key][1] += debt
+
+    def sync(self, key: str, remaining: int, now: float):
+        budget = int(remaining * settings.RATE_LIMIT_LOCAL_FRACTION)
+        self.entries[key] = [budget, 0, now, remaining]
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_keys:
+            self.entries.popitem(last=False)
+
+
+class RateLimitMiddleware:
+    """
+    Token bucket rate limiting middleware using Redis.
+
+    Pure ASGI: rate limit headers are added to the http.response.start
+    message, so response bodies (including streamed downloads) pass through
+    untouched.
     """
 
     def __init__(self, app):
-        super().__init__(app)
-        self.enabled = settings.RATE_LIMIT_ENABLED and redis_client is not None
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_ENABLED
+        self.local = LocalBuckets(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+        self.limits: Dict[str, tuple[int, int]] = {}
 
     def parse_rate_limit(self, limit_str: str) -> tuple[int, int]:
         """
@@ -54,36 +158,54 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
 
     def get_rate_limit_for_path(self, path: str) -> tuple[int, int]:
         """
-        Get rate limit based on the request path
+        Get rate limit based on the request path (or route template)
         """
+        if path not in self.limits:
+            self.limits[path] = self._rate_limit_for_path(path)
+        return self.limits[path]
+
+    def _rate_limit_for_path(self, path: str) -> tuple[int, int]:
         if "/build" in path:
             return self.parse_rate_limit(settings.RATE_LIMIT_BUILD)
+        elif path.endswith("/jobs/submit"):
+            # Create + upload + run in one request counts as an inference request
+            return self.parse_rate_limit(settings.RATE_LIMIT_INFERENCE)
         elif "/jobs/" in path and "/run" not in path:
             # Job status checking (GET /api/jobs/{job_id}) - high limit for polling
             return self.parse_rate_limit(settings.RATE_LIMIT_JOB_STATUS)
         elif "/run" in path and "/jobs/" in path:
             return self.parse_rate_limit(settings.RATE_LIMIT_INFERENCE)
+        elif path.startswith("/api/uploads/") and "/parts/" in path:
+            # A 500 MB package is ~60 parts; count them apart from whole uploads
+            return self.parse_rate_limit(settings.RATE_LIMIT_UPLOAD_PARTS)
         elif "/upload" in path or "versions" in path:
             return self.parse_rate_limit(settings.RATE_LIMIT_UPLOAD)
         else:
             return self.parse_rate_limit(settings.RATE_LIMIT_DEFAULT)
 
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting if disabled or Redis unavailable
+    async def check(self, scope) -> tuple[Optional[JSONResponse], list]:
+        """
+        Apply the rate limit to a request.
+
+        Returns (rejection, headers): a 429 response to send instead of calling
+        the app, or None plus the rate limit headers to add to the response.
+        """
+        # Skip rate limiting if disabled
         if not self.enabled:
-            return await call_next(request)
+            return None, []
 
         # Skip rate limiting for CORS preflight
-        if request.method == "OPTIONS":
-            return await call_next(request)
+        if scope["method"] == "OPTIONS":
+            return None, []
 
         # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/docs", "/redoc", "/openapi.json"]:
-            return await call_next(request)
+        if scope["path"] in ["/health", "/docs", "/redoc", "/openapi.json"]:
+            return None, []
 
         # Get client identifier (IP address or user ID if authenticated)
-        client_ip = request.client.host
-        auth_header = request.headers.get("Authorization")
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        auth_header = Headers(scope=scope).get("authorization")
 
         if auth_header and auth_header.startswith("Bearer "):
             # Use hash of token as identifier for authenticated users
@@ -92,72 +214,96 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         else:
             client_id = client_ip
 
-        # Get rate limit for this path
-        max_requests, window_seconds = self.get_rate_limit_for_path(request.url.path)
-
-        # Redis key for this client and endpoint
-        redis_key = f"rate_limit:{client_id}:{request.url.path}"
-
-        try:
-            # Get current request count
-            current = redis_client.get(redis_key)
-
-            if current is None:
-                # First request in this window
-                redis_client.setex(redis_key, window_seconds, 1)
-                remaining = max_requests - 1
-            else:
-                current_count = int(current)
-
-                if current_count >= max_requests:
-                    # Rate limit exceeded
-                    ttl = redis_client.ttl(redis_key)
-                    return JSONResponse(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        content={
-                            "detail": f"Rate limit exceeded. Try again in {ttl} seconds.",
-                            "retry_after": ttl
-                        },
-                        headers={"Retry-After": str(ttl)}
-                    )
-
-                # Increment counter
-                redis_client.incr(redis_key)
-                remaining = max_requests - current_count - 1
-
-            # Add rate limit headers
-            response = await call_next(request)
-            response.headers["X-RateLimit-Limit"] = str(max_requests)
-            response.headers["X-RateLimit-Remaining"] = str(remaining)
-            response.headers["X-RateLimit-Reset"] = str(int(time.time()) + window_seconds)
-
-            return response
+        # Bucket per client and route template, not per concrete path
+        template = route_template(scope)
+        max_requests, window_seconds = self.get_rate_limit_for_path(template)
+        redis_key = f"rate_limit:{client_id}:{template}"
 
-        except Exception as e:
-            logger.error(f"Rate limiting error: {e}")
-            # On error, allow the request to proceed
-            return await call_next(request)
+        now = time.monotonic()
+        remaining = self.local.try_admit(redis_key, now)
 
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+        if remaining is None:
+            debt = self.local.take_debt(redis_key)
+            try:
+                allowed, remaining, retry_after = await get_token_bucket()(
+                    keys=[redis_key],
+                    args=[max_requests, window_seconds, debt]
+                )
+            except Exception as e:
+                logger.error(f"Rate limiting error: {e}")
+                self.local.add_debt(redis_key, debt)
+                # On error, allow the request to proceed
+                return None, []
+
+            if not allowed:
+                self.local.entries.pop(redis_key, None)
+                return JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={
+                        "detail": f"Rate limit exceeded. Try again in {retry_after} seconds.",
+                        "retry_after": retry_after
+                    },
+                    headers={"Retry-After": str(retry_after)}
+                ), []
+            self.local.sync(redis_key, remaining, now)
+
+        # Reset is when the bucket would be full again
+        refill_seconds = math.ceil((max_requests - remaining) * window_seconds / max_requests)
+        return None, [
+            ("X-RateLimit-Limit", str(max_requests)),
+            ("X-RateLimit-Remaining", str(max(0, remaining))),
+            ("X-RateLimit-Reset", str(int(time.time()) + refill_seconds)),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        rejection, rate_headers = await self.check(scope)
+        if rejection is not None:
+            return await rejection(scope, receive, send)
+        if not rate_headers:
+            return await self.app(scope, receive, send)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in rate_headers:
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class SecurityHeadersMiddleware:
     """
     Add security headers to all responses
     """
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
+    def __init__(self, app):
+        self.app = app
+        self.headers = [
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-Frame-Options", "DENY"),
+            ("X-XSS-Protection", "1; mode=block"),
+            ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ]
         # HSTS (only in production with HTTPS)
         if settings.ENVIRONMENT == "production":
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+            self.headers.append(("Strict-Transport-Security", "max-age=31536000; includeSubDomains"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-        return response
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in self.headers:
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
 
 
 def validate_file_upload(
@@ -197,7 +343,16 @@ def validate_file_upload(
             detail=f"Invalid file type. Allowed types: {', '.join(settings.ALLOWED_UPLOAD_EXTENSIONS)}"
         )
 
-    # Check for suspicious filenames
+    validate_filename(filename)
+
+
+def validate_filename(filename: str) -> None:
+    """
+    Reject filenames that try to escape their directory or name sensitive files
+
+    Raises:
+        HTTPException: If the filename is suspicious
+    """
     suspicious_patterns = ["../", "..\\", "/etc/", "\\windows\\", ".env", ".git"]
     filename_lower = filename.lower()
 
@@ -209,6 +364,100 @@ def validate_file_upload(
             )
 
 
+# Leading bytes of the file types that can be uploaded straight to MinIO
+FILE_SIGNATURES = {
+    "image": (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff", b"II*\x00", b"MM\x00*"),
+    "zip": (b"PK\x03\x04",),
+}
+FILE_TYPE_NAMES = {"image": "a PNG, JPEG or TIFF image", "zip": "a ZIP archive"}
+
+
+def check_upload(head: bytes, file_size: int, file_type: str, max_size_mb: Optional[int] = None) -> None:
+    """
+    Check an upload's size limit and its type by its leading bytes
+
+    Args:
+        head: The file's first bytes (at least as many as the longest signature)
+        file_size: Its size in bytes
+        file_type: "image" or "zip"
+        max_size_mb: Maximum allowed size in MB (defaults to settings)
+
+    Raises:
+        HTTPException: If validation fails
+    """
+    if max_size_mb is None:
+        max_size_mb = settings.MAX_UPLOAD_SIZE_MB
+
+    if file_size > max_size_mb * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {max_size_mb}MB"
+        )
+
+    if not head.startswith(FILE_SIGNATURES[file_type]):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Expected {FILE_TYPE_NAMES[file_type]}"
+        )
+
+
+def signature_length(file_type: str) -> int:
+    return max(len(signature) for signature in FILE_SIGNATURES[file_type])
+
+
+def validate_spooled_upload(
+    path: str,
+    file_size: int,
+    file_type: str,
+    max_size_mb: Optional[int] = None
+) -> None:
+    """
+    Validate an upload the API spooled to a local file
+
+    Args:
+        path: The spooled file
+        file_size: Its size in bytes
+        file_type: "image" or "zip"
+        max_size_mb: Maximum allowed size in MB (defaults to settings)
+
+    Raises:
+        HTTPException: If validation fails
+    """
+    with open(path, "rb") as f:
+        head = f.read(signature_length(file_type))
+    check_upload(head, file_size, file_type, max_size_mb)
+
+
+def validate_stored_upload(
+    object_name: str,
+    file_size: int,
+    file_type: str,
+    max_size_mb: Optional[int] = None
+) -> None:
+    """
+    Validate an object a client uploaded straight to MinIO (presigned PUT)
+
+    Direct uploads never pass through the API, so the size limit and file
+    type are checked on the stored object, the type by its leading bytes.
+    An object that fails is deleted.
+
+    Args:
+        object_name: Object the client uploaded
+        file_size: Its size in bytes, from stat_object
+        file_type: "image" or "zip"
+        max_size_mb: Maximum allowed size in MB (defaults to settings)
+
+    Raises:
+        HTTPException: If validation fails
+    """
+    try:
+        head = storage.read_head(object_name, signature_length(file_type))
+        check_upload(head, file_size, file_type, max_size_mb)
+    except HTTPException:
+        storage.delete_object(object_name)
+        raise
+
+
 def validate_zip_contents(zip_path: str) -> None:
     """
     Validate contents of a ZIP file before extraction
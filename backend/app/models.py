@@ -1,6 +1,7 @@
 import uuid
+import json
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Boolean, Enum, ForeignKey, Text, ARRAY
+from sqlalchemy import Column, String, DateTime, Boolean, Enum, ForeignKey, Text, ARRAY, Float, Integer, BigInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -22,6 +23,13 @@ class JobStatus(str, enum.Enum):
     FAILED = "FAILED"
 
 
+class UploadSessionStatus(str, enum.Enum):
+    ACTIVE = "ACTIVE"
+    ASSEMBLED = "ASSEMBLED"  # Object in place and verified, not yet handed to its target
+    COMPLETED = "COMPLETED"
+    ABORTED = "ABORTED"
+
+
 class UserRole(str, enum.Enum):
     DEVELOPER = "DEVELOPER"
     DOCTOR = "DOCTOR"
@@ -73,6 +81,8 @@ class Model(Base):
     after_image_path = Column(String(500))   # MinIO path to after demo image
     imaging_modality_tags = Column(ARRAY(String), default=list, nullable=False)  # e.g., ["MRI", "CT"]
     organ_tags = Column(ARRAY(String), default=list, nullable=False)  # e.g., ["Brain", "Heart"]
+    tiling_enabled = Column(Boolean, default=False, nullable=False)  # Split very large inputs into tiles
+    cache_results = Column(Boolean, default=True, nullable=False)  # Disable for nondeterministic models
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     owner = relationship("User", back_populates="models")
@@ -91,6 +101,15 @@ class ModelVersion(Base):
     docker_image_digest = Column(String(255))
     build_logs = Column(Text)
     error_message = Column(Text)
+    # Post-build benchmark metrics (None until a benchmark has run)
+    benchmark_import_time_ms = Column(Float)
+    benchmark_first_inference_ms = Column(Float)
+    benchmark_p50_ms = Column(Float)
+    benchmark_p95_ms = Column(Float)
+    benchmark_peak_memory_mb = Column(Float)
+    # Container resource profile (None falls back to CONTAINER_*_LIMIT)
+    cpu_limit = Column(Float)
+    memory_limit_mb = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
@@ -108,12 +127,49 @@ class Job(Base):
     status = Column(Enum(JobStatus), default=JobStatus.UPLOADING, nullable=False)
     input_path = Column(String(500))  # MinIO path to input image
     output_paths = Column(Text)  # JSON list of MinIO paths to output files
+    tile_count = Column(Integer)  # Set when the input was split into tiles
+    tiles_completed = Column(Integer)
+    inputs_uploaded = Column(Integer, default=0, nullable=False)  # Distinct inputs received so far
+    auto_run = Column(Boolean, default=False, nullable=False)  # Queue as soon as the last input lands
+    worker_id = Column(String(255), nullable=True)  # Worker process running the job ("host:pid")
     error_message = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     version = relationship("ModelVersion", back_populates="jobs")
     user = relationship("User")
+    inputs = relationship("JobInput", back_populates="job", cascade="all, delete-orphan")
+
+    @property
+    def inputs_expected(self):
+        """Number of inputs the job needs before it can run (batch jobs list several)."""
+        if not self.input_path:
+            return None
+        if self.input_path.startswith("["):
+            return len(json.loads(self.input_path))
+        return 1
+
+
+class InputBlob(Base):
+    __tablename__ = "input_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    object_name = Column(String(500), nullable=False)  # MinIO path, blobs/sha256/{sha256}
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)  # Number of JobInput rows using this blob
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class JobInput(Base):
+    __tablename__ = "job_inputs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False, index=True)
+    input_path = Column(String(500), nullable=False)  # Logical path as listed in Job.input_path
+    blob_sha256 = Column(String(64), ForeignKey("input_blobs.sha256"), nullable=False)
+
+    job = relationship("Job", back_populates="inputs")
+    blob = relationship("InputBlob")
 
 
 class ModelFavorite(Base):
@@ -126,3 +182,40 @@ class ModelFavorite(Base):
 
     user = relationship("User", back_populates="favorites")
     model = relationship("Model")
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    kind = Column(String(20), nullable=False)  # "model_package" or "job_volume"
+    target_id = Column(UUID(as_uuid=True), nullable=False, index=True)  # Model version or job id
+    filename = Column(String(255), nullable=False)
+    object_name = Column(String(500), nullable=False)  # Destination of the multipart upload
+    multipart_upload_id = Column(String(255), nullable=False)  # MinIO UploadId
+    size = Column(BigInteger, nullable=False)  # Declared total size in bytes
+    chunk_size = Column(Integer, nullable=False)  # Size of every part but the last
+    sha256 = Column(String(64))  # Declared checksum, verified on completion
+    status = Column(Enum(UploadSessionStatus), default=UploadSessionStatus.ACTIVE, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    parts = relationship("UploadPart", back_populates="session", cascade="all, delete-orphan")
+
+    @property
+    def part_count(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+
+    session_id = Column(UUID(as_uuid=True), ForeignKey("upload_sessions.id"), primary_key=True)
+    part_number = Column(Integer, primary_key=True)  # 1-based, as in S3
+    etag = Column(String(100), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    uploaded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    session = relationship("UploadSession", back_populates="parts")
@@ -0,0 +1,103 @@
+"""
+Result memoization for inference jobs.
+
+Entries are keyed by (docker_image_digest, sha256 of the job inputs) and
+stored as small JSON objects in MinIO under result_cache/<digest>/<hash>.json,
+pointing at the output objects of the job that produced them. A hit lets a
+rerun of the same study on the same image complete without pulling or
+running the container. Entries expire after RESULT_CACHE_TTL_SECONDS and the
+index is trimmed to RESULT_CACHE_MAX_ENTRIES by a periodic eviction pass.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional
+from app.config import settings
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "result_cache"
+
+
+def hash_inputs(input_dir: str) -> str:
+    """sha256 over every input file's relative path and contents, in sorted order."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, input_dir).encode())
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+    return digest.hexdigest()
+
+
+def entry_name(image_digest: str, input_hash: str) -> str:
+    # Image digests look like "sha256:<hex>"; keep the key path-safe
+    return f"{CACHE_PREFIX}/{image_digest.replace(':', '_')}/{input_hash}.json"
+
+
+def is_cacheable(version) -> bool:
+    return (
+        settings.RESULT_CACHE_ENABLED
+        and bool(version.docker_image_digest)
+        and version.model.cache_results
+    )
+
+
+def lookup(image_digest: str, input_hash: str) -> Optional[list]:
+    """Return cached output paths, or None on a miss or a stale entry."""
+    try:
+        data = storage.get_bytes(entry_name(image_digest, input_hash))
+        if data is None:
+            return None
+        entry = json.loads(data)
+        if time.time() - entry["created_at"] > settings.RESULT_CACHE_TTL_SECONDS:
+            return None
+        # The outputs may have been deleted since the entry was written
+        if not all(storage.object_exists(path) for path in entry["output_paths"]):
+            return None
+        return entry["output_paths"]
+    except Exception as e:
+        logger.warning(f"Result cache lookup failed: {e}")
+        return None
+
+
+def store(image_digest: str, input_hash: str, output_paths: list):
+    try:
+        entry = {"output_paths": output_paths, "created_at": time.time()}
+        storage.upload_bytes(
+            json.dumps(entry).encode(),
+            entry_name(image_digest, input_hash),
+            content_type="application/json"
+        )
+    except Exception as e:
+        logger.warning(f"Result cache store failed: {e}")
+
+
+def evict():
+    """Drop expired entries, then the oldest ones beyond RESULT_CACHE_MAX_ENTRIES."""
+    entries = storage.list_objects_info(f"{CACHE_PREFIX}/")
+    cutoff = time.time() - settings.RESULT_CACHE_TTL_SECONDS
+
+    live = []
+    removed = 0
+    for obj in entries:
+        if obj.last_modified.timestamp() < cutoff:
+            storage.delete_object(obj.object_name)
+            removed += 1
+        else:
+            live.append(obj)
+
+    excess = len(live) - settings.RESULT_CACHE_MAX_ENTRIES
+    if excess > 0:
+        live.sort(key=lambda obj: obj.last_modified)
+        for obj in live[:excess]:
+            storage.delete_object(obj.object_name)
+            removed += 1
+
+    logger.info(f"Result cache eviction removed {removed} of {len(entries)} entries")
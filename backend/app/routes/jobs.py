@@ -1,17 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Form, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import update, func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Literal
 from uuid import UUID
 import json
+import os
 from app.db import get_db
-from app.models import User, ModelVersion, Job, JobStatus, ModelVersionStatus
-from app.schemas import JobCreate, JobResponse, JobInputUploadResponse, JobOutputResponse, BatchJobCreate, BatchJobResponse, MultipleJobsCreate, SingleJobInfo, BatchStatusRequest
+from app.models import User, ModelVersion, Job, JobInput, JobStatus, ModelVersionStatus
+from app.schemas import JobCreate, JobResponse, JobInputUploadResponse, JobOutputResponse, BatchJobCreate, BatchJobResponse, MultipleJobsCreate, SingleJobInfo, BatchStatusRequest, BulkRunRequest
 from app.auth import get_current_user, get_current_user_optional
 from app.storage import storage
+from app.volumes import MANIFEST_NAME, NIFTI_EXTENSIONS, is_volume_input
+from app.blobs import spool_upload, attach_upload, attach_staged
+from app.middleware import validate_stored_upload, validate_spooled_upload, validate_filename
+from app.config import settings
 
 router = APIRouter(prefix="/api/jobs", tags=["jobs"])
 
 
+def _enqueue(db: Session, job_ids: list):
+    """
+    Publish inference for jobs just committed as QUEUED.
+
+    If publishing fails, jobs still QUEUED go back to UPLOADING, so they don't
+    wait forever for a task that was never sent and the client can run them
+    again; a message that did get out skips them as no longer queued.
+    """
+    from app.tasks.inference import enqueue_inference, enqueue_many, load_specs
+    try:
+        specs = load_specs(db, job_ids)
+        if len(specs) == 1:
+            enqueue_inference(specs[0])
+        else:
+            enqueue_many(specs)
+    except Exception as e:
+        db.rollback()
+        db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.status == JobStatus.QUEUED)
+            .values(status=JobStatus.UPLOADING)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        raise HTTPException(status_code=503, detail=f"Could not queue inference, try running again: {str(e)}")
+
+
+def _record_upload(db: Session, job: Job) -> dict:
+    """
+    Record upload progress for a job and, if it was created with auto_run,
+    queue it as soon as the last input has landed.
+    """
+    job_id, input_path, auto_run = job.id, job.input_path, job.auto_run
+    expected = job.inputs_expected
+
+    if is_volume_input(input_path):
+        # A volume is a single logical input, complete once its manifest is stored
+        uploaded = 1
+    else:
+        uploaded = db.query(func.count(JobInput.id)).filter(JobInput.job_id == job_id).scalar()
+
+    # Concurrent index uploads may finish out of order; never move the counter back
+    db.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(inputs_uploaded=func.greatest(Job.inputs_uploaded, uploaded))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    queued = False
+    if auto_run and uploaded >= expected:
+        # Guarded on status so only one of several final uploads enqueues
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.UPLOADING)
+            .values(status=JobStatus.QUEUED)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount:
+            _enqueue(db, [job_id])
+            queued = True
+
+    return {"inputs_uploaded": uploaded, "inputs_expected": expected, "queued": queued}
+
+
+def _staging_object(job_id, index: Optional[int] = None) -> str:
+    return f"uploads/{job_id}/{index or 0}"
+
+
+def _upload_target(job_id, index: Optional[int] = None) -> tuple[str, str, Optional[str]]:
+    """
+    Where a client sends one image input: (url, method, complete_url).
+
+    In direct transfer mode this is a presigned MinIO PUT to a staging object,
+    followed by a POST to complete_url; otherwise the API proxy endpoint.
+    """
+    if settings.STORAGE_TRANSFER_MODE == "direct":
+        suffix = f"?index={index}" if index is not None else ""
+        return (
+            storage.get_presigned_upload_url(_staging_object(job_id, index)),
+            "PUT",
+            f"/api/jobs/{job_id}/upload-complete{suffix}"
+        )
+    suffix = f"/{index}" if index is not None else ""
+    return f"/api/jobs/{job_id}/upload{suffix}", "POST", None
+
+
 @router.post("/", response_model=JobInputUploadResponse, status_code=status.HTTP_201_CREATED)
 async def create_job(
     job_data: JobCreate,
@@ -34,23 +130,29 @@ async def create_job(
         version_id=job_data.version_id,
         user_id=current_user.id if current_user else None,
         name=job_data.name,
-        status=JobStatus.UPLOADING
+        status=JobStatus.UPLOADING,
+        auto_run=job_data.auto_run
     )
     db.add(new_job)
     db.commit()
     db.refresh(new_job)
 
-    # Set input path
-    object_name = f"job_inputs/{new_job.id}/input.png"
+    # Set input path (volumes point at their chunk manifest)
+    if job_data.input_type == "volume":
+        # Volumes are converted server-side, so they always go through the API
+        object_name = f"job_inputs/{new_job.id}/volume/{MANIFEST_NAME}"
+        upload_endpoint, upload_method, complete_url = f"/api/jobs/{new_job.id}/upload-volume", "POST", None
+    else:
+        object_name = f"job_inputs/{new_job.id}/input.png"
+        upload_endpoint, upload_method, complete_url = _upload_target(new_job.id)
     new_job.input_path = object_name
     db.commit()
 
-    # Return API upload endpoint instead of presigned URL
-    upload_endpoint = f"/api/jobs/{new_job.id}/upload"
-
     return {
         "job_id": new_job.id,
-        "upload_url": upload_endpoint
+        "upload_url": upload_endpoint,
+        "upload_method": upload_method,
+        "complete_url": complete_url
     }
 
 
@@ -77,7 +179,8 @@ async def create_batch_job(
         version_id=job_data.version_id,
         user_id=current_user.id if current_user else None,
         name=job_data.name,
-        status=JobStatus.UPLOADING
+        status=JobStatus.UPLOADING,
+        auto_run=job_data.auto_run
     )
     db.add(new_job)
     db.commit()
@@ -92,10 +195,12 @@ async def create_batch_job(
     # Generate upload URLs for each image
     upload_urls = []
     for i, filename in enumerate(job_data.filenames):
-        upload_endpoint = f"/api/jobs/{new_job.id}/upload/{i}"
+        upload_endpoint, upload_method, complete_url = _upload_target(new_job.id, i)
         upload_urls.append({
             "filename": filename,
-            "url": upload_endpoint
+            "url": upload_endpoint,
+            "upload_method": upload_method,
+            "complete_url": complete_url
         })
 
     return {
@@ -147,11 +252,13 @@ async def create_multiple_jobs(
         object_name = f"job_inputs/{new_job.id}/{filename}"
         new_job.input_path = object_name
 
-        upload_endpoint = f"/api/jobs/{new_job.id}/upload"
+        upload_endpoint, upload_method, complete_url = _upload_target(new_job.id)
 
         created_jobs.append({
             "job_id": new_job.id,
             "upload_url": upload_endpoint,
+            "upload_method": upload_method,
+            "complete_url": complete_url,
             "filename": filename,
             "name": job_name
         })
@@ -161,6 +268,103 @@ async def create_multiple_jobs(
     return created_jobs
 
 
+@router.post("/submit", response_model=List[JobResponse], status_code=status.HTTP_201_CREATED)
+async def submit_jobs(
+    version_id: UUID = Form(...),
+    files: List[UploadFile] = File(...),
+    mode: Literal["single", "batch", "multiple"] = Form("single"),
+    name: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """
+    Create, upload and run in one request.
+
+    - single: one file, one job
+    - batch: all files in one job
+    - multiple: one job per file (name is used as a prefix)
+
+    Files get the same size and type checks as any other image upload. If any
+    upload fails, every job created by the request is deleted. Volumes (NIfTI,
+    DICOM) are not accepted here; they go through /upload-volume.
+    """
+    version = db.query(ModelVersion).filter(ModelVersion.id == version_id).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Model version not found")
+
+    if version.status != ModelVersionStatus.READY:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model version is not ready (status: {version.status})"
+        )
+
+    if mode == "single" and len(files) != 1:
+        raise HTTPException(status_code=400, detail="Single mode takes exactly one file")
+
+    for file in files:
+        validate_filename(file.filename)
+        if file.filename.lower().endswith((*NIFTI_EXTENSIONS, ".dcm")):
+            raise HTTPException(
+                status_code=400,
+                detail="Volumes cannot be submitted here; create a job with input_type volume "
+                       "and upload to /api/jobs/{id}/upload-volume"
+            )
+
+    user_id = current_user.id if current_user else None
+
+    # Create jobs; each entry pairs a job with its (logical path, file) inputs
+    submissions = []
+    if mode == "batch":
+        job = Job(version_id=version_id, user_id=user_id, name=name, status=JobStatus.UPLOADING)
+        db.add(job)
+        db.flush()
+        input_paths = [f"job_inputs/{job.id}/{i}_{file.filename}" for i, file in enumerate(files)]
+        job.input_path = json.dumps(input_paths)
+        submissions.append((job, list(zip(input_paths, files))))
+    else:
+        for file in files:
+            if mode == "multiple":
+                base_name = file.filename.rsplit('.', 1)[0]
+                job_name = f"{name} - {base_name}" if name else base_name
+            else:
+                job_name = name
+            job = Job(version_id=version_id, user_id=user_id, name=job_name, status=JobStatus.UPLOADING)
+            db.add(job)
+            db.flush()
+            job.input_path = f"job_inputs/{job.id}/{file.filename}" if mode == "multiple" else f"job_inputs/{job.id}/input.png"
+            submissions.append((job, [(job.input_path, file)]))
+    db.commit()
+
+    jobs = [job for job, _ in submissions]
+    try:
+        for job, inputs in submissions:
+            for input_path, file in inputs:
+                tmp_path, sha256, size = await spool_upload(file, suffix='.png')
+                try:
+                    validate_spooled_upload(tmp_path, size, "image")
+                    attach_upload(db, job.id, input_path, tmp_path, sha256, size)
+                finally:
+                    os.unlink(tmp_path)
+    except Exception as e:
+        db.rollback()
+        for job in jobs:
+            db.delete(job)
+        db.commit()
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    # All inputs landed: queue everything in one commit, then publish
+    for job, inputs in submissions:
+        job.inputs_uploaded = len(inputs)
+        job.status = JobStatus.QUEUED
+    db.commit()
+
+    _enqueue(db, [job.id for job in jobs])
+
+    return jobs
+
+
 @router.post("/batch-status", response_model=List[JobResponse])
 async def get_batch_status(
     request: BatchStatusRequest,
@@ -184,6 +388,52 @@ async def get_batch_status(
     return jobs
 
 
+@router.post("/run", response_model=List[JobResponse])
+async def run_jobs(
+    request: BulkRunRequest,
+    current_user: User = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Start inference for many jobs at once. Either all jobs are queued or none are."""
+    job_ids = list(dict.fromkeys(request.job_ids))
+    if not job_ids:
+        return []
+
+    jobs = db.query(Job).filter(Job.id.in_(job_ids)).all()
+    if len(jobs) != len(job_ids):
+        found = {job.id for job in jobs}
+        missing = [str(job_id) for job_id in job_ids if job_id not in found]
+        raise HTTPException(status_code=404, detail=f"Jobs not found: {', '.join(missing)}")
+
+    for job in jobs:
+        # Same ownership rule as single-job run
+        if job.user_id and (not current_user or job.user_id != current_user.id):
+            raise HTTPException(status_code=403, detail=f"Access denied to job {job.id}")
+        if job.status != JobStatus.UPLOADING:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot run job {job.id} in status {job.status}"
+            )
+
+    # One UPDATE; the status guard makes a concurrent run lose cleanly
+    result = db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.status == JobStatus.UPLOADING)
+        .values(status=JobStatus.QUEUED)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(job_ids):
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Some jobs were started concurrently; nothing was queued")
+    db.commit()
+
+    # Execution specs go in the task messages, so workers don't read the jobs back
+    _enqueue(db, job_ids)
+
+    # Objects were expired by the commit; reload them in one query
+    return db.query(Job).filter(Job.id.in_(job_ids)).all()
+
+
 @router.post("/{job_id}/run", response_model=JobResponse)
 async def run_job(
     job_id: UUID,
@@ -211,9 +461,8 @@ async def run_job(
     db.commit()
     db.refresh(job)
 
-    # Enqueue inference task
-    from app.tasks.inference import run_inference_task
-    run_inference_task.delay(str(job_id))
+    # Enqueue inference task (routed to a warm worker, micro-batched if enabled)
+    _enqueue(db, [job_id])
 
     return job
 
@@ -236,22 +485,18 @@ async def upload_job_input(
         )
 
     try:
-        # Save file temporarily
-        import tempfile
-        import os
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
-
-        # Upload to MinIO
-        storage.upload_file(tmp_path, job.input_path)
-
-        # Clean up temp file
-        os.unlink(tmp_path)
+        # Hash while spooling, then store once under the content address
+        tmp_path, sha256, size = await spool_upload(file, suffix='.png')
+        try:
+            validate_spooled_upload(tmp_path, size, "image")
+            attach_upload(db, job.id, job.input_path, tmp_path, sha256, size)
+        finally:
+            os.unlink(tmp_path)
 
-        return {"message": "Upload successful", "job_id": job_id}
+        return {"message": "Upload successful", "job_id": job_id, **_record_upload(db, job)}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -295,21 +540,121 @@ async def upload_batch_job_input(
         # Get the target path for this index
         target_path = input_paths[index]
 
-        # Save file temporarily
-        import tempfile
-        import os
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            content = await file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        # Hash while spooling, then store once under the content address
+        tmp_path, sha256, size = await spool_upload(file, suffix='.png')
+        try:
+            validate_spooled_upload(tmp_path, size, "image")
+            attach_upload(db, job.id, target_path, tmp_path, sha256, size)
+        finally:
+            os.unlink(tmp_path)
+
+        return {"message": "Upload successful", "job_id": job_id, "index": index, **_record_upload(db, job)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+@router.post("/{job_id}/upload-complete")
+def complete_direct_upload(
+    job_id: UUID,
+    index: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Completion callback for an input uploaded straight to MinIO.
+
+    Verifies the staged object exists, hashes it into blob storage and
+    records upload progress (which may auto-run the job).
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job.status != JobStatus.UPLOADING:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot upload to job in status {job.status}"
+        )
+
+    if is_volume_input(job.input_path):
+        raise HTTPException(status_code=400, detail="Volume jobs are uploaded through /upload-volume")
+
+    if job.input_path.startswith("["):
+        input_paths = json.loads(job.input_path)
+        if index is None or index < 0 or index >= len(input_paths):
+            raise HTTPException(status_code=400, detail=f"Batch jobs need an index in 0-{len(input_paths)-1}")
+        target_path = input_paths[index]
+    else:
+        target_path = job.input_path
+
+    staging_object = _staging_object(job_id, index)
+    staged = storage.stat_object(staging_object)
+    if staged is None:
+        raise HTTPException(status_code=400, detail="No uploaded object found; upload to the presigned URL first")
+    validate_stored_upload(staging_object, staged.size, "image")
+
+    try:
+        attach_staged(db, job.id, target_path, staging_object)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    return {"message": "Upload successful", "job_id": job_id, "index": index, **_record_upload(db, job)}
+
 
-        # Upload to MinIO
-        storage.upload_file(tmp_path, target_path)
+@router.post("/{job_id}/upload-volume")
+def upload_job_volume(
+    job_id: UUID,
+    files: List[UploadFile] = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload a volumetric input: one NIfTI file or all slices of a DICOM series.
+
+    Files are spooled to disk and converted into memory-mappable .npy chunks
+    before being stored, so the volume is never held in memory as a whole.
+    """
+    import tempfile
+    import shutil
+    from app.volumes import store_volume
+
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if job.status != JobStatus.UPLOADING:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot upload to job in status {job.status}"
+        )
 
-        # Clean up temp file
-        os.unlink(tmp_path)
+    if not is_volume_input(job.input_path):
+        raise HTTPException(status_code=400, detail="This job is not a volume job")
 
-        return {"message": "Upload successful", "job_id": job_id, "index": index}
+    try:
+        with tempfile.TemporaryDirectory() as raw_dir:
+            raw_paths = []
+            for idx, upload in enumerate(files):
+                # Index prefix keeps duplicate DICOM filenames apart
+                filename = f"{idx:05d}_{os.path.basename(upload.filename or 'slice')}"
+                raw_path = os.path.join(raw_dir, filename)
+                with open(raw_path, "wb") as f:
+                    shutil.copyfileobj(upload.file, f)
+                raw_paths.append(raw_path)
+
+            try:
+                manifest = store_volume(raw_paths, job.input_path)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Could not read volume: {str(e)}")
+
+        return {
+            "message": "Upload successful",
+            "job_id": job_id,
+            "shape": manifest["shape"],
+            "chunks": len(manifest["chunks"]),
+            **_record_upload(db, job)
+        }
 
     except HTTPException:
         raise
@@ -317,15 +662,93 @@ async def upload_batch_job_input(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+def _archive_response(jobs: List[Job], filename: str, per_job_folders: bool):
+    """Stream a ZIP of the outputs of every succeeded job in the list."""
+    from fastapi.responses import StreamingResponse
+    from app.archives import stream_zip, output_arcname
+
+    entries = []
+    seen = set()
+    for job in jobs:
+        if job.status != JobStatus.SUCCEEDED or not job.output_paths:
+            continue
+        folder = f"{(job.name or str(job.id)).replace('/', '_')}/" if per_job_folders else ""
+        for object_name in json.loads(job.output_paths):
+            arcname = f"{folder}{output_arcname(object_name)}"
+            if arcname in seen:
+                # Two jobs with the same name
+                arcname = f"{job.id}/{output_arcname(object_name)}"
+            seen.add(arcname)
+            entries.append((arcname, object_name))
+
+    if not entries:
+        raise HTTPException(status_code=400, detail="No outputs available for these jobs")
+
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.get("/outputs/archive")
+async def download_outputs_archive(
+    job_ids: List[UUID] = Query(...),
+    current_user: User = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Stream one ZIP with a folder of outputs per job."""
+    jobs = db.query(Job).filter(Job.id.in_(job_ids)).all()
+    if len(jobs) != len(set(job_ids)):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    for job in jobs:
+        # Same ownership rule as single-job outputs
+        if job.user_id and (not current_user or job.user_id != current_user.id):
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    return _archive_response(jobs, "outputs.zip", per_job_folders=True)
+
+
+@router.get("/{job_id}/outputs/archive")
+async def download_job_outputs_archive(
+    job_id: UUID,
+    current_user: User = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Stream a ZIP of all outputs of one job."""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Check ownership (only if job has a user)
+    if job.user_id:
+        if not current_user or job.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    return _archive_response([job], f"job_{job_id}_outputs.zip", per_job_folders=False)
+
+
 @router.get("/{job_id}/download/{output_index}")
 async def download_job_output(
     job_id: UUID,
     output_index: int,
+    request: Request,
+    variant: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Proxy endpoint for downloading job output files from MinIO."""
-    from fastapi.responses import StreamingResponse
+    """
+    Proxy endpoint for downloading job output files from MinIO.
+
+    With variant=thumb or variant=preview, a downscaled WebP/JPEG copy is
+    served instead (rendered once, then stored alongside the outputs).
+    """
+    from fastapi.responses import StreamingResponse, RedirectResponse
     import io
+    from app import derivatives
+
+    if variant and variant not in derivatives.VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Unknown variant: {variant}")
 
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
@@ -340,6 +763,33 @@ async def download_job_output(
 
     object_path = output_paths[output_index]
 
+    if settings.STORAGE_TRANSFER_MODE == "direct" and not variant:
+        # Hand the transfer to MinIO; the API never touches the bytes
+        return RedirectResponse(
+            storage.get_presigned_download_url(object_path),
+            status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        )
+
+    if variant:
+        fmt = derivatives.choose_format(request.headers.get("accept"))
+        try:
+            # Decoding and resizing is CPU-bound; keep it off the event loop
+            data = await run_in_threadpool(derivatives.get_derivative, object_path, variant, fmt)
+        except derivatives.SourceTooLarge as e:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Could not render {variant}: {str(e)}")
+        # Outputs of a finished job never change
+        return Response(
+            content=data,
+            media_type=derivatives.content_type(fmt),
+            headers={
+                "Cache-Control": "public, max-age=31536000, immutable",
+                "Vary": "Accept",
+                "Content-Disposition": f"inline; filename={object_path.split('/')[-1]}.{fmt}"
+            }
+        )
+
     try:
         # Download from MinIO
         response = storage.client.get_object(storage.bucket, object_path)
@@ -404,7 +854,8 @@ async def get_job_outputs(
     return {
         "job_id": job.id,
         "status": job.status,
-        "output_urls": output_urls
+        "output_urls": output_urls,
+        "archive_url": f"/api/jobs/{job.id}/outputs/archive" if output_urls else None
     }
 
 
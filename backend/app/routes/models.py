@@ -1,4 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+import json
+import hashlib
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+import redis
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
@@ -10,11 +17,22 @@ from app.schemas import (
 )
 from app.auth import get_current_user, get_current_user_optional, get_developer_user
 from app.storage import storage
-from app.tasks.celery_app import celery_app
+from app.middleware import validate_stored_upload
+from app import derivatives
+from app.cache import LRUCache, get_async_redis
+from app.config import settings
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/models", tags=["models"])
 
+# Hot demo images by object path; paths are content-addressed, so entries never go stale
+_demo_image_cache = LRUCache(
+    max_entries=settings.DEMO_IMAGE_CACHE_MAX_ENTRIES,
+    max_bytes=settings.DEMO_IMAGE_CACHE_MAX_BYTES
+)
+
 
 @router.post("/", response_model=ModelResponse, status_code=status.HTTP_201_CREATED)
 async def create_model(
@@ -29,16 +47,113 @@ async def create_model(
         is_public=model_data.is_public,
         imaging_modality_tags=model_data.imaging_modality_tags,
         organ_tags=model_data.organ_tags,
+        tiling_enabled=model_data.tiling_enabled,
+        cache_results=model_data.cache_results,
         owner_id=current_user.id
     )
     db.add(new_model)
     db.commit()
     db.refresh(new_model)
+    await invalidate_catalog()
     return new_model
 
 
+CATALOG_VERSION_KEY = "catalog:version"
+
+
+def _normalize_tags(tags: Optional[str]) -> List[str]:
+    """Comma-separated tag filter -> sorted, de-duplicated list (order never matters)."""
+    if not tags:
+        return []
+    return sorted({tag.strip() for tag in tags.split(',') if tag.strip()})
+
+
+def _serialize_models(db: Session, models: List[Model]) -> list:
+    """ModelResponse dicts with owner usernames, resolved in one query."""
+    owner_ids = {model.owner_id for model in models if model.owner_id}
+    usernames = {}
+    if owner_ids:
+        usernames = dict(db.query(User.id, User.username).filter(User.id.in_(owner_ids)).all())
+
+    return [
+        {
+            "id": model.id,
+            "name": model.name,
+            "description": model.description,
+            "owner_id": model.owner_id,
+            "is_public": model.is_public,
+            "before_image_path": model.before_image_path,
+            "after_image_path": model.after_image_path,
+            "imaging_modality_tags": model.imaging_modality_tags or [],
+            "organ_tags": model.organ_tags or [],
+            "tiling_enabled": model.tiling_enabled,
+            "cache_results": model.cache_results,
+            "created_at": model.created_at,
+            "owner_username": usernames.get(model.owner_id)
+        }
+        for model in models
+    ]
+
+
+async def invalidate_catalog():
+    """Bump the catalog version; cached public listings under older versions are never read again."""
+    try:
+        await get_async_redis().incr(CATALOG_VERSION_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate model catalog cache: {e}")
+
+
+async def _cached_catalog(modality_list: List[str], organ_list: List[str], build) -> tuple[str, bytes]:
+    """
+    Return (etag, JSON body) for a public catalog query, from Redis if cached.
+
+    The version is read before the database, so a listing built from data
+    that changes concurrently is stored under a version that is already stale.
+    """
+    client = get_async_redis()
+    cache_key = None
+    try:
+        version = int(await client.get(CATALOG_VERSION_KEY) or 0)
+        cache_key = f"catalog:{version}:{','.join(modality_list)}:{','.join(organ_list)}"
+        etag, body = await client.hmget(cache_key, "etag", "body")
+        if etag is not None:
+            return etag.decode(), body
+    except redis.RedisError as e:
+        logger.warning(f"Model catalog cache unavailable: {e}")
+
+    body = json.dumps(jsonable_encoder(build())).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    if cache_key:
+        try:
+            pipe = client.pipeline()
+            pipe.hset(cache_key, mapping={"etag": etag, "body": body})
+            pipe.expire(cache_key, settings.CATALOG_CACHE_TTL_SECONDS)
+            await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Model catalog cache unavailable: {e}")
+
+    return etag, body
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag.
+
+    The header may list several tags or be "*"; comparison is weak, as
+    If-None-Match requires, so W/ prefixes are ignored on both sides.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
 @router.get("/", response_model=List[ModelResponse])
 async def list_models(
+    request: Request,
     public_only: bool = False,
     imaging_modality_tags: Optional[str] = None,
     organ_tags: Optional[str] = None,
@@ -50,61 +165,43 @@ async def list_models(
     - If public_only=True: Return all public models (from any user) - no auth required
     - If public_only=False: Return only current user's models (public and private) - requires auth
     - Optional tag filters (comma-separated): imaging_modality_tags, organ_tags
-    """
-    query = db.query(Model)
-    if public_only:
-        # Show all public models (no auth required)
-        query = query.filter(Model.is_public == True)
-    else:
-        # Show only current user's models (requires auth)
-        if not current_user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Authentication required to view your models"
-            )
-        query = query.filter(Model.owner_id == current_user.id)
 
-    # Apply tag filters - models must contain ALL selected tags
-    if imaging_modality_tags:
-        modality_list = [tag.strip() for tag in imaging_modality_tags.split(',')]
-        # Filter models that contain ALL of the specified imaging modality tags
+    Public listings are cached per tag filter and support If-None-Match.
+    """
+    modality_list = _normalize_tags(imaging_modality_tags)
+    organ_list = _normalize_tags(organ_tags)
+
+    def build():
+        query = db.query(Model)
+        if public_only:
+            # Show all public models (no auth required)
+            query = query.filter(Model.is_public == True)
+        else:
+            # Show only current user's models
+            query = query.filter(Model.owner_id == current_user.id)
+
+        # Apply tag filters - models must contain ALL selected tags
         for tag in modality_list:
             query = query.filter(Model.imaging_modality_tags.any(tag))
-
-    if organ_tags:
-        organ_list = [tag.strip() for tag in organ_tags.split(',')]
-        # Filter models that contain ALL of the specified organ tags
         for tag in organ_list:
             query = query.filter(Model.organ_tags.any(tag))
 
-    models = query.all()
+        return _serialize_models(db, query.all())
 
-    # Add owner username to each model
-    result = []
-    for model in models:
-        model_dict = {
-            "id": model.id,
-            "name": model.name,
-            "description": model.description,
-            "owner_id": model.owner_id,
-            "is_public": model.is_public,
-            "before_image_path": model.before_image_path,
-            "after_image_path": model.after_image_path,
-            "imaging_modality_tags": model.imaging_modality_tags or [],
-            "organ_tags": model.organ_tags or [],
-            "created_at": model.created_at,
-            "owner_username": None
-        }
-
-        # Get owner username if owner exists
-        if model.owner_id:
-            owner = db.query(User).filter(User.id == model.owner_id).first()
-            if owner:
-                model_dict["owner_username"] = owner.username
-
-        result.append(model_dict)
+    if not public_only:
+        # Show only current user's models (requires auth)
+        if not current_user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Authentication required to view your models"
+            )
+        return build()
 
-    return result
+    etag, body = await _cached_catalog(modality_list, organ_list, build)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # All /versions routes must come before /{model_id} to avoid routing conflicts
@@ -153,6 +250,14 @@ def create_model_version(
     new_version.package_path = object_name
     db.commit()
 
+    if settings.STORAGE_TRANSFER_MODE == "direct":
+        # Client PUTs straight to MinIO; trigger_build verifies the object
+        return {
+            "version_id": new_version.id,
+            "upload_url": upload_url,
+            "upload_method": "PUT"
+        }
+
     # Return API upload endpoint instead of presigned URL for browser compatibility
     upload_endpoint = f"/api/models/versions/{new_version.id}/upload"
 
@@ -191,6 +296,13 @@ def trigger_build(
             detail=f"Cannot build version in status {version.status}"
         )
 
+    # Direct uploads never pass through the API, so check the package landed
+    # and is within the upload limits
+    package = storage.stat_object(version.package_path)
+    if package is None:
+        raise HTTPException(status_code=400, detail="Model package has not been uploaded")
+    validate_stored_upload(version.package_path, package.size, "zip")
+
     # Update status and trigger build task
     version.status = ModelVersionStatus.BUILDING
     db.commit()
@@ -263,6 +375,11 @@ def delete_model_version(
 
     db.delete(version)
     db.commit()
+
+    # Inputs of the deleted jobs may no longer be referenced
+    from app.tasks.inference import collect_input_blobs_task
+    collect_input_blobs_task.delay()
+
     return {"message": "Version deleted successfully"}
 
 
@@ -296,6 +413,8 @@ async def list_favorite_models(
             "after_image_path": model.after_image_path,
             "imaging_modality_tags": model.imaging_modality_tags or [],
             "organ_tags": model.organ_tags or [],
+            "tiling_enabled": model.tiling_enabled,
+            "cache_results": model.cache_results,
             "created_at": model.created_at,
             "owner_username": None
         }
@@ -355,9 +474,12 @@ async def update_model(
     model.is_public = model_data.is_public
     model.imaging_modality_tags = model_data.imaging_modality_tags
     model.organ_tags = model_data.organ_tags
+    model.tiling_enabled = model_data.tiling_enabled
+    model.cache_results = model_data.cache_results
 
     db.commit()
     db.refresh(model)
+    await invalidate_catalog()
     return model
 
 
@@ -378,6 +500,12 @@ async def delete_model(
 
     db.delete(model)
     db.commit()
+    await invalidate_catalog()
+
+    # Inputs of the deleted jobs may no longer be referenced
+    from app.tasks.inference import collect_input_blobs_task
+    collect_input_blobs_task.delay()
+
     return {"message": "Model deleted successfully"}
 
 
@@ -408,6 +536,8 @@ async def copy_model(
         is_public=False,  # Copies are private by default
         imaging_modality_tags=original_model.imaging_modality_tags or [],
         organ_tags=original_model.organ_tags or [],
+        tiling_enabled=original_model.tiling_enabled,
+        cache_results=original_model.cache_results,
         owner_id=current_user.id
     )
     db.add(new_model)
@@ -428,11 +558,19 @@ async def copy_model(
             package_path=orig_version.package_path,  # Reuse same package in MinIO
             docker_image=orig_version.docker_image,  # Reuse same Docker image
             docker_image_digest=orig_version.docker_image_digest,
-            build_logs=orig_version.build_logs
+            build_logs=orig_version.build_logs,
+            benchmark_import_time_ms=orig_version.benchmark_import_time_ms,
+            benchmark_first_inference_ms=orig_version.benchmark_first_inference_ms,
+            benchmark_p50_ms=orig_version.benchmark_p50_ms,
+            benchmark_p95_ms=orig_version.benchmark_p95_ms,
+            benchmark_peak_memory_mb=orig_version.benchmark_peak_memory_mb,
+            cpu_limit=orig_version.cpu_limit,
+            memory_limit_mb=orig_version.memory_limit_mb
         )
         db.add(new_version)
 
     db.commit()
+    await invalidate_catalog()
 
     return new_model
 
@@ -509,6 +647,7 @@ async def upload_before_image(
     try:
         # Delete old image if it exists
         if model.before_image_path:
+            _demo_image_cache.pop(model.before_image_path)
             try:
                 storage.delete_object(model.before_image_path)
             except Exception as e:
@@ -523,16 +662,20 @@ async def upload_before_image(
             tmp_file.write(content)
             tmp_path = tmp_file.name
 
-        # Upload to MinIO
-        object_name = f"model_demos/{model_id}/before.png"
+        # Content-addressed name: a new image gets a new path, which versions caches
+        object_name = f"model_demos/{model_id}/before_{hashlib.sha256(content).hexdigest()[:16]}.png"
         storage.upload_file(tmp_path, object_name)
 
         # Clean up temp file
         os.unlink(tmp_path)
 
         # Update model record
+        # Card thumbnails are requested right away by the catalog
+        derivatives.pregenerate(object_name, content)
+
         model.before_image_path = object_name
         db.commit()
+        await invalidate_catalog()
 
         return {"message": "Before image uploaded successfully", "path": object_name}
 
@@ -559,6 +702,7 @@ async def upload_after_image(
     try:
         # Delete old image if it exists
         if model.after_image_path:
+            _demo_image_cache.pop(model.after_image_path)
             try:
                 storage.delete_object(model.after_image_path)
             except Exception as e:
@@ -573,16 +717,20 @@ async def upload_after_image(
             tmp_file.write(content)
             tmp_path = tmp_file.name
 
-        # Upload to MinIO
-        object_name = f"model_demos/{model_id}/after.png"
+        # Content-addressed name: a new image gets a new path, which versions caches
+        object_name = f"model_demos/{model_id}/after_{hashlib.sha256(content).hexdigest()[:16]}.png"
         storage.upload_file(tmp_path, object_name)
 
         # Clean up temp file
         os.unlink(tmp_path)
 
         # Update model record
+        # Card thumbnails are requested right away by the catalog
+        derivatives.pregenerate(object_name, content)
+
         model.after_image_path = object_name
         db.commit()
+        await invalidate_catalog()
 
         return {"message": "After image uploaded successfully", "path": object_name}
 
@@ -590,14 +738,75 @@ async def upload_after_image(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
+def _serve_demo_image(request: Request, object_name: str, filename: str, variant: Optional[str] = None) -> Response:
+    """
+    Serve a demo image (or a downscaled variant of it) with validators, from
+    the in-process cache when hot.
+
+    Requests carrying ?v=<current path> are immutable (a new upload gets a new
+    path), so browsers may keep them for a year; other requests revalidate.
+    """
+    fmt = None
+    cache_key = object_name
+    if variant:
+        fmt = derivatives.choose_format(request.headers.get("accept"))
+        cache_key = derivatives.derivative_name(object_name, variant, fmt)
+
+    cached = _demo_image_cache.get(cache_key)
+    if cached is None:
+        stat = storage.client.stat_object(storage.bucket, object_name)
+        if variant:
+            data = derivatives.get_derivative(object_name, variant, fmt)
+            etag = f'"{stat.etag}-{variant}-{fmt}"'
+        else:
+            data = storage.get_bytes(object_name)
+            etag = f'"{stat.etag}"'
+        cached = (etag, formatdate(stat.last_modified.timestamp(), usegmt=True), data)
+        if len(data) <= settings.DEMO_IMAGE_CACHE_MAX_ENTRY_BYTES:
+            _demo_image_cache.set(cache_key, cached, size=len(data))
+
+    etag, last_modified, data = cached
+    if request.query_params.get("v") == object_name:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = f"public, max-age={settings.DEMO_IMAGE_MAX_AGE_SECONDS}"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": cache_control,
+        "Content-Disposition": f"inline; filename={filename}"
+    }
+    if variant:
+        headers["Vary"] = "Accept"
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None:
+        try:
+            not_modified = parsedate_to_datetime(if_modified_since) >= parsedate_to_datetime(last_modified)
+        except (TypeError, ValueError):
+            not_modified = False
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    media_type = derivatives.content_type(fmt) if fmt else "image/png"
+    return Response(content=data, media_type=media_type, headers=headers)
+
+
 @router.get("/{model_id}/demo/before")
 async def download_before_image(
     model_id: UUID,
+    request: Request,
+    variant: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Download before demo image"""
-    from fastapi.responses import StreamingResponse
-    import io
+    """Download before demo image (variant: thumb or preview for a downscaled copy)"""
+    if variant and variant not in derivatives.VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Unknown variant: {variant}")
 
     model = db.query(Model).filter(Model.id == model_id).first()
     if not model:
@@ -607,15 +816,8 @@ async def download_before_image(
         raise HTTPException(status_code=404, detail="No before image available")
 
     try:
-        # Download from MinIO
-        response = storage.client.get_object(storage.bucket, model.before_image_path)
-        file_data = response.read()
-
-        return StreamingResponse(
-            io.BytesIO(file_data),
-            media_type="image/png",
-            headers={"Content-Disposition": "inline; filename=before.png"}
-        )
+        # MinIO reads and variant rendering block; keep them off the event loop
+        return await run_in_threadpool(_serve_demo_image, request, model.before_image_path, "before.png", variant)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
 
@@ -623,11 +825,13 @@ async def download_before_image(
 @router.get("/{model_id}/demo/after")
 async def download_after_image(
     model_id: UUID,
+    request: Request,
+    variant: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Download after demo image"""
-    from fastapi.responses import StreamingResponse
-    import io
+    """Download after demo image (variant: thumb or preview for a downscaled copy)"""
+    if variant and variant not in derivatives.VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Unknown variant: {variant}")
 
     model = db.query(Model).filter(Model.id == model_id).first()
     if not model:
@@ -637,14 +841,7 @@ async def download_after_image(
         raise HTTPException(status_code=404, detail="No after image available")
 
     try:
-        # Download from MinIO
-        response = storage.client.get_object(storage.bucket, model.after_image_path)
-        file_data = response.read()
-
-        return StreamingResponse(
-            io.BytesIO(file_data),
-            media_type="image/png",
-            headers={"Content-Disposition": "inline; filename=after.png"}
-        )
+        # MinIO reads and variant rendering block; keep them off the event loop
+        return await run_in_threadpool(_serve_demo_image, request, model.after_image_path, "after.png", variant)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Download failed: {str(e)}")
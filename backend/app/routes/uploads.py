@@ -0,0 +1,256 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Header, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+from uuid import UUID
+import os
+import tempfile
+from app.db import get_db
+from app.models import User, UserRole, Job, JobStatus, ModelVersion, ModelVersionStatus, UploadSession, UploadSessionStatus
+from app.schemas import UploadSessionCreate, UploadSessionResponse, UploadPartResponse
+from app.auth import get_current_user_optional
+from app.storage import storage
+from app.volumes import NIFTI_EXTENSIONS, is_volume_input, store_volume
+from app.middleware import validate_file_upload
+from app.config import settings
+from app import uploads
+
+router = APIRouter(prefix="/api/uploads", tags=["uploads"])
+
+
+def _session_response(db: Session, session: UploadSession) -> dict:
+    return {
+        "upload_id": session.id,
+        "kind": session.kind,
+        "target_id": session.target_id,
+        "status": session.status.value,
+        "size": session.size,
+        "chunk_size": session.chunk_size,
+        "part_count": session.part_count,
+        "uploaded_parts": uploads.uploaded_parts(db, session),
+    }
+
+
+def _get_session(db: Session, upload_id: UUID, current_user: Optional[User]) -> UploadSession:
+    session = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if session.user_id and (current_user is None or current_user.id != session.user_id):
+        raise HTTPException(status_code=403, detail="Not authorized to access this upload")
+    return session
+
+
+def _require_active(session: UploadSession):
+    if session.status != UploadSessionStatus.ACTIVE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Upload is {session.status.value.lower()}"
+        )
+
+
+def _require_open(session: UploadSession):
+    if session.status not in uploads.OPEN_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Upload is {session.status.value.lower()}"
+        )
+
+
+def _resolve_target(db: Session, data: UploadSessionCreate, current_user: Optional[User]) -> str:
+    """Check the caller may upload to the target; return the object the upload is assembled in."""
+    if data.kind == "model_package":
+        if current_user is None:
+            raise HTTPException(status_code=401, detail="Not authenticated")
+        if current_user.role != UserRole.DEVELOPER:
+            raise HTTPException(status_code=403, detail="Only developers can perform this action")
+
+        validate_file_upload(data.filename, data.size)
+        version = db.query(ModelVersion).filter(ModelVersion.id == data.target_id).first()
+        if not version:
+            raise HTTPException(status_code=404, detail="Version not found")
+        if version.status != ModelVersionStatus.UPLOADING:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot upload to version in status {version.status}"
+            )
+        return version.package_path
+
+    if data.size > settings.MAX_UPLOAD_SIZE_MB * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {settings.MAX_UPLOAD_SIZE_MB}MB"
+        )
+    if not data.filename.lower().endswith(NIFTI_EXTENSIONS):
+        # A DICOM series is many small files; it goes through /api/jobs/{id}/upload-volume
+        raise HTTPException(status_code=400, detail="Resumable volume uploads take a single NIfTI file")
+
+    job = db.query(Job).filter(Job.id == data.target_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != JobStatus.UPLOADING:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot upload to job in status {job.status}"
+        )
+    if not is_volume_input(job.input_path):
+        raise HTTPException(status_code=400, detail="This job is not a volume job")
+    return f"uploads/{job.id}/volume/{os.path.basename(data.filename)}"
+
+
+def _finish_volume(db: Session, session: UploadSession) -> dict:
+    """
+    Convert an assembled NIfTI upload into the job's chunked volume.
+
+    The session is marked completed and the assembled object deleted only once
+    the volume is stored; on failure both are kept so the client can retry.
+    """
+    from app.routes.jobs import _record_upload
+
+    job = db.query(Job).filter(Job.id == session.target_id).first()
+    if not job or job.status != JobStatus.UPLOADING:
+        raise HTTPException(status_code=400, detail="Job is no longer accepting uploads")
+
+    with tempfile.TemporaryDirectory() as raw_dir:
+        raw_path = os.path.join(raw_dir, os.path.basename(session.object_name))
+        storage.download_file(session.object_name, raw_path)
+        try:
+            manifest = store_volume([raw_path], job.input_path)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Could not read volume: {str(e)}")
+
+    uploads.finish(db, session)
+    storage.delete_object(session.object_name)
+
+    return {
+        "job_id": job.id,
+        "shape": manifest["shape"],
+        "chunks": len(manifest["chunks"]),
+        **_record_upload(db, job)
+    }
+
+
+@router.post("/", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload(
+    data: UploadSessionCreate,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """
+    Open a resumable upload for a model package or a NIfTI volume.
+
+    Opening an upload for the same file and target again returns the existing
+    session with the parts already received, so a restarted client resumes.
+    """
+    if data.size <= 0:
+        raise HTTPException(status_code=400, detail="Upload size must be positive")
+
+    object_name = _resolve_target(db, data, current_user)
+    uploads.expire_stale(db)
+
+    session = uploads.find_resumable(db, data.kind, data.target_id, data.filename, data.size, data.sha256)
+    if session is None:
+        session = uploads.open_session(
+            db, data.kind, data.target_id,
+            current_user.id if current_user else None,
+            data.filename, object_name, data.size, data.sha256
+        )
+    return _session_response(db, session)
+
+
+@router.get("/{upload_id}", response_model=UploadSessionResponse)
+def get_upload(
+    upload_id: UUID,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Upload progress; uploaded_parts lists what does not need to be sent again."""
+    return _session_response(db, _get_session(db, upload_id, current_user))
+
+
+@router.put("/{upload_id}/parts/{part_number}", response_model=UploadPartResponse)
+async def upload_part(
+    upload_id: UUID,
+    part_number: int,
+    request: Request,
+    x_content_sha256: Optional[str] = Header(None),
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload one part as the raw request body.
+
+    Parts may be sent in parallel and in any order. An optional
+    X-Content-SHA256 header is checked against the received bytes.
+    """
+    session = _get_session(db, upload_id, current_user)
+    _require_active(session)
+
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > session.chunk_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Parts are at most {session.chunk_size} bytes"
+        )
+
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > session.chunk_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Parts are at most {session.chunk_size} bytes"
+            )
+
+    try:
+        part = await run_in_threadpool(uploads.put_part, db, session, part_number, bytes(data), x_content_sha256)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    return {"part_number": part.part_number, "size": part.size, "etag": part.etag, "sha256": part.sha256}
+
+
+@router.post("/{upload_id}/complete")
+def complete_upload(
+    upload_id: UUID,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """
+    Assemble the parts, verify size and checksum, and hand the file to its target.
+
+    Model packages are then ready for /api/models/versions/{id}/build; NIfTI
+    volumes are converted and counted towards the job's inputs. If that handoff
+    fails, the upload stays assembled and completing it again retries it.
+    """
+    session = _get_session(db, upload_id, current_user)
+    _require_open(session)
+
+    try:
+        uploads.complete(db, session)
+    except uploads.UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+    result = {"message": "Upload successful", "upload_id": session.id, "size": session.size}
+    if session.kind == "job_volume":
+        result.update(_finish_volume(db, session))
+    else:
+        uploads.finish(db, session)
+        result["version_id"] = session.target_id
+    return result
+
+
+@router.delete("/{upload_id}")
+def abort_upload(
+    upload_id: UUID,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """Abort an unfinished upload and discard its parts."""
+    session = _get_session(db, upload_id, current_user)
+    _require_open(session)
+    uploads.abort(db, session)
+    return {"message": "Upload aborted", "upload_id": session.id}
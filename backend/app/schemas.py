@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 from uuid import UUID
 from app.models import ModelVersionStatus, JobStatus, UserRole, ImagingModalityTag, OrganTag
@@ -45,6 +45,8 @@ class ModelCreate(BaseModel):
     is_public: bool = False
     imaging_modality_tags: List[str] = []
     organ_tags: List[str] = []
+    tiling_enabled: bool = False
+    cache_results: bool = True
 
 
 class ModelResponse(BaseModel):
@@ -58,6 +60,8 @@ class ModelResponse(BaseModel):
     after_image_path: Optional[str] = None
     imaging_modality_tags: List[str] = []
     organ_tags: List[str] = []
+    tiling_enabled: bool = False
+    cache_results: bool = True
     created_at: datetime
 
     class Config:
@@ -80,6 +84,13 @@ class ModelVersionResponse(BaseModel):
     docker_image_digest: Optional[str]
     build_logs: Optional[str]
     error_message: Optional[str]
+    benchmark_import_time_ms: Optional[float] = None
+    benchmark_first_inference_ms: Optional[float] = None
+    benchmark_p50_ms: Optional[float] = None
+    benchmark_p95_ms: Optional[float] = None
+    benchmark_peak_memory_mb: Optional[float] = None
+    cpu_limit: Optional[float] = None
+    memory_limit_mb: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -90,6 +101,7 @@ class ModelVersionResponse(BaseModel):
 class PresignedUploadResponse(BaseModel):
     version_id: UUID
     upload_url: str
+    upload_method: str = "POST"  # "PUT" for a presigned MinIO URL (raw body)
     fields: Optional[dict] = None
 
 
@@ -103,6 +115,8 @@ class BuildTriggerResponse(BaseModel):
 class JobCreate(BaseModel):
     version_id: UUID
     name: Optional[str] = None
+    input_type: Literal["image", "volume"] = "image"  # "volume" for NIfTI / DICOM series
+    auto_run: bool = False  # Queue automatically once the input is uploaded
 
 
 class JobResponse(BaseModel):
@@ -114,6 +128,10 @@ class JobResponse(BaseModel):
     input_path: Optional[str]
     output_paths: Optional[str]
     error_message: Optional[str]
+    tile_count: Optional[int] = None
+    tiles_completed: Optional[int] = None
+    inputs_uploaded: Optional[int] = None
+    inputs_expected: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     progress: Optional[int] = None
@@ -126,12 +144,15 @@ class JobResponse(BaseModel):
 class JobInputUploadResponse(BaseModel):
     job_id: UUID
     upload_url: str
+    upload_method: str = "POST"  # "PUT" for a presigned MinIO URL (raw body)
+    complete_url: Optional[str] = None  # POST here after a direct upload
 
 
 class JobOutputResponse(BaseModel):
     job_id: UUID
     status: JobStatus
     output_urls: List[str]
+    archive_url: Optional[str] = None  # ZIP of all outputs
 
 
 # Batch job schemas
@@ -140,11 +161,14 @@ class BatchJobCreate(BaseModel):
     image_count: int
     filenames: List[str]
     name: Optional[str] = None  # Base name for the batch job
+    auto_run: bool = False  # Queue automatically once every image is uploaded
 
 
 class BatchJobUploadUrl(BaseModel):
     filename: str
     url: str
+    upload_method: str = "POST"
+    complete_url: Optional[str] = None
 
 
 class BatchJobResponse(BaseModel):
@@ -162,9 +186,42 @@ class MultipleJobsCreate(BaseModel):
 class SingleJobInfo(BaseModel):
     job_id: UUID
     upload_url: str
+    upload_method: str = "POST"
+    complete_url: Optional[str] = None
     filename: str
     name: Optional[str]  # Auto-generated name for this job
 
 
 class BatchStatusRequest(BaseModel):
     job_ids: List[UUID]
+
+
+class BulkRunRequest(BaseModel):
+    job_ids: List[UUID]
+
+
+# Resumable upload schemas
+class UploadSessionCreate(BaseModel):
+    kind: Literal["model_package", "job_volume"]
+    target_id: UUID  # Model version id or job id
+    filename: str
+    size: int  # Total size in bytes
+    sha256: Optional[str] = None  # Checksum of the whole file, verified on completion
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: UUID
+    kind: str
+    target_id: UUID
+    status: str
+    size: int
+    chunk_size: int
+    part_count: int
+    uploaded_parts: List[int]  # Part numbers the server already has
+
+
+class UploadPartResponse(BaseModel):
+    part_number: int
+    size: int
+    etag: str
+    sha256: str
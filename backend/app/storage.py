@@ -1,31 +1,109 @@
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import Part
 from minio.error import S3Error
 from app.config import settings
 from typing import Optional
 from datetime import timedelta
+import io
+import os
 import logging
+import threading
+import certifi
+import urllib3
 
 logger = logging.getLogger(__name__)
 
 
 class StorageClient:
+    """
+    MinIO access for the API and workers.
+
+    The MinIO client and its connection pool are created on first use, not at
+    import, so importing a route or task module does no network I/O and a
+    prefork worker never inherits sockets opened in its parent. Bucket
+    creation happens once per process role in a startup hook (ensure_bucket).
+    """
+
     def __init__(self):
-        self.client = Minio(
-            settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ACCESS_KEY,
-            secret_key=settings.MINIO_SECRET_KEY,
-            secure=settings.MINIO_SECURE,
-        )
         self.bucket = settings.MINIO_BUCKET
-        self._ensure_bucket()
+        self.pool_maxsize = settings.MINIO_POOL_MAXSIZE or 10
+        self._client = None
+        self._public_client = None
+        self._lock = threading.Lock()
+
+    def configure(self, pool_maxsize: int):
+        """Size the connection pool to the process's concurrency; call before first use."""
+        if settings.MINIO_POOL_MAXSIZE:
+            # An explicit setting wins over the role's default
+            return
+        if self._client is not None:
+            logger.warning("Storage client already created; pool size unchanged")
+            return
+        self.pool_maxsize = max(1, pool_maxsize)
+
+    @property
+    def client(self) -> Minio:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = Minio(
+                        settings.MINIO_ENDPOINT,
+                        access_key=settings.MINIO_ACCESS_KEY,
+                        secret_key=settings.MINIO_SECRET_KEY,
+                        secure=settings.MINIO_SECURE,
+                        region=settings.MINIO_REGION,
+                        http_client=self._http_client(),
+                    )
+        return self._client
+
+    @property
+    def public_client(self) -> Minio:
+        """
+        Client for presigning URLs that browsers use.
+
+        SigV4 signs the host, so the URLs must be signed for the external
+        endpoint rather than rewritten afterwards. With the region given,
+        presigning is computed locally and never contacts that endpoint.
+        """
+        if self._public_client is None:
+            secure = settings.MINIO_EXTERNAL_SECURE
+            self._public_client = Minio(
+                settings.MINIO_EXTERNAL_ENDPOINT,
+                access_key=settings.MINIO_ACCESS_KEY,
+                secret_key=settings.MINIO_SECRET_KEY,
+                secure=settings.MINIO_SECURE if secure is None else secure,
+                region=settings.MINIO_REGION,
+            )
+        return self._public_client
 
-    def _ensure_bucket(self):
-        """Ensure the bucket exists, create if it doesn't."""
+    def _http_client(self) -> urllib3.PoolManager:
+        """One pooled urllib3 manager per process, shared by every request thread."""
+        return urllib3.PoolManager(
+            # MinIO's default waits 5 minutes to connect; fail fast, read patiently
+            timeout=urllib3.Timeout(
+                connect=settings.MINIO_CONNECT_TIMEOUT_SECONDS,
+                read=settings.MINIO_READ_TIMEOUT_SECONDS
+            ),
+            maxsize=self.pool_maxsize,
+            block=False,
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+            retries=urllib3.Retry(
+                total=5,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504]
+            ),
+        )
+
+    def ensure_bucket(self):
+        """Ensure the bucket exists, create if it doesn't. Run once at startup."""
         try:
             if not self.client.bucket_exists(self.bucket):
                 self.client.make_bucket(self.bucket)
                 logger.info(f"Created bucket: {self.bucket}")
-        except S3Error as e:
+        except Exception as e:
+            # Don't keep the process from starting; requests fail until MinIO is reachable
             logger.error(f"Error ensuring bucket exists: {e}")
 
     def get_presigned_upload_url(self, object_name: str, expires: int = None) -> str:
@@ -33,15 +111,11 @@ class StorageClient:
         if expires is None:
             expires = settings.PRESIGNED_URL_EXPIRY
         try:
-            url = self.client.presigned_put_object(
+            return self.public_client.presigned_put_object(
                 self.bucket,
                 object_name,
                 expires=timedelta(seconds=expires)
             )
-            # Replace internal endpoint with external endpoint for browser access
-            # This preserves the AWS signature while changing the hostname
-            url = url.replace(f"http://{settings.MINIO_ENDPOINT}", f"http://{settings.MINIO_EXTERNAL_ENDPOINT}")
-            return url
         except S3Error as e:
             logger.error(f"Error generating presigned upload URL: {e}")
             raise
@@ -51,15 +125,11 @@ class StorageClient:
         if expires is None:
             expires = settings.PRESIGNED_URL_EXPIRY
         try:
-            url = self.client.presigned_get_object(
+            return self.public_client.presigned_get_object(
                 self.bucket,
                 object_name,
                 expires=timedelta(seconds=expires)
             )
-            # Replace internal endpoint with external endpoint for browser access
-            # This preserves the AWS signature while changing the hostname
-            url = url.replace(f"http://{settings.MINIO_ENDPOINT}", f"http://{settings.MINIO_EXTERNAL_ENDPOINT}")
-            return url
         except S3Error as e:
             logger.error(f"Error generating presigned download URL: {e}")
             raise
@@ -80,6 +150,118 @@ class StorageClient:
             logger.error(f"Error uploading file {object_name}: {e}")
             raise
 
+    def upload_bytes(self, data: bytes, object_name: str, content_type: str = "application/octet-stream"):
+        """Upload an in-memory payload to MinIO."""
+        try:
+            self.client.put_object(self.bucket, object_name, io.BytesIO(data), len(data), content_type=content_type)
+        except S3Error as e:
+            logger.error(f"Error uploading object {object_name}: {e}")
+            raise
+
+    def get_bytes(self, object_name: str) -> Optional[bytes]:
+        """Read a small object into memory, or None if it doesn't exist."""
+        try:
+            response = self.client.get_object(self.bucket, object_name)
+            try:
+                return response.read()
+            finally:
+                response.close()
+                response.release_conn()
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            logger.error(f"Error reading object {object_name}: {e}")
+            raise
+
+    def read_head(self, object_name: str, length: int) -> bytes:
+        """Read the first length bytes of an object (e.g. to check its file signature)."""
+        try:
+            response = self.client.get_object(self.bucket, object_name, offset=0, length=length)
+            try:
+                return response.read()
+            finally:
+                response.close()
+                response.release_conn()
+        except S3Error as e:
+            logger.error(f"Error reading object {object_name}: {e}")
+            raise
+
+    def stat_object(self, object_name: str):
+        """Object metadata (size, etag, last_modified), or None if it doesn't exist."""
+        try:
+            return self.client.stat_object(self.bucket, object_name)
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                return None
+            logger.error(f"Error checking object {object_name}: {e}")
+            raise
+
+    def copy_object(self, source_object: str, object_name: str):
+        """Server-side copy within the bucket; no bytes pass through the API."""
+        try:
+            self.client.copy_object(self.bucket, object_name, CopySource(self.bucket, source_object))
+        except S3Error as e:
+            logger.error(f"Error copying object {source_object} to {object_name}: {e}")
+            raise
+
+    # Multipart uploads. The minio client only drives these internally from
+    # put_object; resumable uploads need the individual S3 calls, so they go
+    # through its underscore API here and nowhere else.
+
+    def create_multipart_upload(self, object_name: str, content_type: str = "application/octet-stream") -> str:
+        """Start a multipart upload and return its UploadId."""
+        try:
+            return self.client._create_multipart_upload(self.bucket, object_name, {"Content-Type": content_type})
+        except S3Error as e:
+            logger.error(f"Error starting multipart upload {object_name}: {e}")
+            raise
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """Upload one part of a multipart upload and return its ETag."""
+        try:
+            return self.client._upload_part(self.bucket, object_name, data, None, upload_id, part_number)
+        except S3Error as e:
+            logger.error(f"Error uploading part {part_number} of {object_name}: {e}")
+            raise
+
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: list):
+        """Assemble a multipart upload from (part_number, etag) pairs in ascending order."""
+        try:
+            self.client._complete_multipart_upload(
+                self.bucket, object_name, upload_id,
+                [Part(part_number, etag) for part_number, etag in parts]
+            )
+        except S3Error as e:
+            logger.error(f"Error completing multipart upload {object_name}: {e}")
+            raise
+
+    def abort_multipart_upload(self, object_name: str, upload_id: str):
+        """Abort a multipart upload, discarding its parts. Unknown uploads are ignored."""
+        try:
+            self.client._abort_multipart_upload(self.bucket, object_name, upload_id)
+        except S3Error as e:
+            if e.code == "NoSuchUpload":
+                return
+            logger.error(f"Error aborting multipart upload {object_name}: {e}")
+            raise
+
+    def object_exists(self, object_name: str) -> bool:
+        try:
+            self.client.stat_object(self.bucket, object_name)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            raise
+
+    def list_objects_info(self, prefix: str):
+        """List objects with a given prefix, including size and last_modified."""
+        try:
+            return list(self.client.list_objects(self.bucket, prefix=prefix, recursive=True))
+        except S3Error as e:
+            logger.error(f"Error listing objects with prefix {prefix}: {e}")
+            raise
+
     def list_objects(self, prefix: str):
         """List objects with a given prefix."""
         try:
@@ -2,12 +2,14 @@ import os
 import tempfile
 import zipfile
 import shutil
-import docker
 import logging
+import json
 from app.tasks.celery_app import celery_app
-from app.db import SessionLocal
+from app.tasks.resources import read_package_profile, memory_from_benchmark, parse_memory_mb
+from app.db import session_scope
 from app.models import ModelVersion, ModelVersionStatus
 from app.storage import storage
+from app.volumes import MANIFEST_NAME, VOLUME_FORMAT
 from app.config import settings
 from uuid import UUID
 
@@ -48,6 +50,77 @@ except Exception as e:
 """
 
 
+BENCHMARK_SCRIPT = """import sys
+import json
+import os
+import time
+import math
+import shutil
+import tempfile
+import resource
+import traceback
+
+sys.path.insert(0, '/app/user_code')
+
+INPUT_DIR = '/app/benchmark_inputs'
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def timed_run(run, input_path):
+    output_dir = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        run(input_path, output_dir)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if not os.listdir(output_dir):
+            raise RuntimeError(f"No output files generated for {os.path.basename(input_path)}")
+        return elapsed_ms
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+try:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    start = time.perf_counter()
+    from predict import run
+    import_ms = (time.perf_counter() - start) * 1000
+
+    inputs = [os.path.join(INPUT_DIR, name) for name in sorted(os.listdir(INPUT_DIR))]
+
+    # The very first call pays for lazy weight loading, JIT warmup, etc.
+    first_inference_ms = timed_run(run, inputs[0])
+
+    latencies = []
+    for _ in range(iterations):
+        for input_path in inputs:
+            latencies.append(timed_run(run, input_path))
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_memory_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(json.dumps({
+        "status": "success",
+        "import_time_ms": import_ms,
+        "first_inference_ms": first_inference_ms,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "peak_memory_mb": peak_memory_mb,
+        "samples": len(latencies),
+    }))
+
+except Exception as e:
+    error_msg = traceback.format_exc()
+    print(json.dumps({"status": "error", "error": str(e), "traceback": error_msg}), file=sys.stderr)
+    sys.exit(1)
+"""
+
+
 DOCKERFILE_TEMPLATE = """FROM python:3.11-slim
 
 # Install system dependencies
@@ -62,6 +135,7 @@ WORKDIR /app
 # Copy user code and requirements
 COPY user_code/ /app/user_code/
 COPY runner/ /app/runner/
+COPY benchmark_inputs/ /app/benchmark_inputs/
 
 # Install Python dependencies
 RUN pip install --no-cache-dir -r /app/user_code/requirements.txt
@@ -71,17 +145,141 @@ ENTRYPOINT ["python", "/app/runner/runner.py"]
 """
 
 
+def write_benchmark_inputs(input_dir: str, input_type: str = "image"):
+    """
+    Write the synthetic input set used by the post-build benchmark.
+
+    input_type is the package's declared benchmark_input: PNG images, or a
+    chunked volume in the same layout jobs with volume inputs receive. For
+    "none" the directory is left empty.
+    """
+    import numpy as np
+
+    os.makedirs(input_dir, exist_ok=True)
+    rng = np.random.default_rng(0)
+    size = settings.BENCHMARK_IMAGE_SIZE
+
+    if input_type == "volume":
+        write_benchmark_volume(os.path.join(input_dir, "ct_noise"), rng)
+        return
+    if input_type == "none":
+        return
+
+    from PIL import Image
+
+    # RGB noise, a grayscale gradient and a smaller RGB image cover the
+    # common input shapes without shipping real patient data in the image.
+    noise = rng.integers(0, 256, size=(size, size, 3), dtype=np.uint8)
+    Image.fromarray(noise, mode="RGB").save(os.path.join(input_dir, "rgb_noise.png"))
+
+    gradient = np.tile(np.linspace(0, 255, size, dtype=np.uint8), (size, 1))
+    Image.fromarray(gradient, mode="L").save(os.path.join(input_dir, "gray_gradient.png"))
+
+    small = rng.integers(0, 256, size=(size // 2, size // 2, 3), dtype=np.uint8)
+    Image.fromarray(small, mode="RGB").save(os.path.join(input_dir, "rgb_small.png"))
+
+
+def write_benchmark_volume(volume_dir: str, rng):
+    """Write a CT-like int16 noise volume as .npy chunks plus a volume.json manifest."""
+    import numpy as np
+
+    os.makedirs(volume_dir)
+    # Keeps the volume baked into the image to a few MB
+    size = settings.BENCHMARK_IMAGE_SIZE // 2
+    step = settings.VOLUME_CHUNK_SLICES
+    num_slices = 2 * step
+
+    chunks = []
+    for index, start in enumerate(range(0, num_slices, step)):
+        name = f"chunk_{index:04d}.npy"
+        np.save(os.path.join(volume_dir, name), rng.integers(-1024, 3072, size=(step, size, size), dtype=np.int16))
+        chunks.append(name)
+
+    manifest = {
+        "source": "synthetic",
+        "axes": ["z", "x", "y"],
+        "shape": [num_slices, size, size],
+        "dtype": "int16",
+        "spacing": [1.0, 1.0, 1.0],
+        "chunks": chunks,
+        "format": VOLUME_FORMAT,
+        "chunk_slices": step,
+    }
+    with open(os.path.join(volume_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+
+
+def run_benchmark(docker_client, image_tag: str, cpu: float, memory_mb: int) -> dict:
+    """
+    Run the benchmark entrypoint of a freshly built image and return its metrics.
+
+    The synthetic inputs are baked into the image, so no volume mounts are needed.
+    Raises RuntimeError if the model fails or exceeds the configured latency limits.
+    """
+    container = docker_client.containers.run(
+        image_tag,
+        entrypoint=["python", "/app/runner/benchmark.py", str(settings.BENCHMARK_ITERATIONS)],
+        remove=False,
+        network_mode='none',
+        mem_limit=f"{memory_mb}m",
+        cpu_period=100000,
+        cpu_quota=int(cpu * 100000),
+        detach=True
+    )
+
+    try:
+        try:
+            result = container.wait(timeout=settings.BENCHMARK_TIMEOUT_SECONDS)
+        except Exception as e:
+            try:
+                container.kill()
+            except:
+                pass
+            raise RuntimeError(f"Benchmark timed out after {settings.BENCHMARK_TIMEOUT_SECONDS}s: {str(e)}")
+
+        if result['StatusCode'] != 0:
+            logs = container.logs(stderr=True, stdout=True).decode('utf-8')
+            raise RuntimeError(f"Benchmark exited with code {result['StatusCode']}. Logs: {logs}")
+
+        stdout = container.logs(stdout=True, stderr=False).decode('utf-8').strip()
+        metrics = json.loads(stdout.splitlines()[-1])
+    finally:
+        try:
+            container.remove()
+        except:
+            pass
+
+    if metrics["first_inference_ms"] > settings.BENCHMARK_MAX_FIRST_INFERENCE_SECONDS * 1000:
+        raise RuntimeError(
+            f"First inference took {metrics['first_inference_ms']:.0f} ms "
+            f"(limit {settings.BENCHMARK_MAX_FIRST_INFERENCE_SECONDS}s)"
+        )
+    if metrics["p95_ms"] > settings.BENCHMARK_MAX_P95_SECONDS * 1000:
+        raise RuntimeError(
+            f"Steady-state p95 latency is {metrics['p95_ms']:.0f} ms "
+            f"(limit {settings.BENCHMARK_MAX_P95_SECONDS}s)"
+        )
+
+    return metrics
+
+
 @celery_app.task(name="app.tasks.build.build_model_task", bind=True)
 def build_model_task(self, version_id: str):
-    """Build a Docker image from uploaded model package."""
-    db = SessionLocal()
+    """
+    Build a Docker image from uploaded model package.
+
+    The version is read and written in short transactions; no DB connection is
+    held through the image build, benchmark and push.
+    """
     version_uuid = UUID(version_id)
     build_logs = []
 
     try:
-        version = db.query(ModelVersion).filter(ModelVersion.id == version_uuid).first()
-        if not version:
-            raise ValueError(f"Version {version_id} not found")
+        with session_scope() as db:
+            version = db.query(ModelVersion).filter(ModelVersion.id == version_uuid).first()
+            if not version:
+                raise ValueError(f"Version {version_id} not found")
+            version_package_path = version.package_path
 
         build_logs.append(f"Starting build for version {version_id}")
 
@@ -89,8 +287,8 @@ def build_model_task(self, version_id: str):
         with tempfile.TemporaryDirectory() as build_dir:
             # Download package from MinIO
             package_path = os.path.join(build_dir, "package.zip")
-            build_logs.append(f"Downloading package from {version.package_path}")
-            storage.download_file(version.package_path, package_path)
+            build_logs.append(f"Downloading package from {version_package_path}")
+            storage.download_file(version_package_path, package_path)
 
             # Extract package
             user_code_dir = os.path.join(build_dir, "user_code")
@@ -106,6 +304,10 @@ def build_model_task(self, version_id: str):
             if not os.path.exists(os.path.join(user_code_dir, "requirements.txt")):
                 raise ValueError("requirements.txt not found in package")
 
+            resource_profile = read_package_profile(user_code_dir)
+            if resource_profile:
+                build_logs.append(f"Declared resource profile: {resource_profile}")
+
             build_logs.append("Package validated")
 
             # Create runner directory
@@ -115,13 +317,21 @@ def build_model_task(self, version_id: str):
             with open(os.path.join(runner_dir, "runner.py"), "w") as f:
                 f.write(RUNNER_SCRIPT)
 
+            with open(os.path.join(runner_dir, "benchmark.py"), "w") as f:
+                f.write(BENCHMARK_SCRIPT)
+
+            benchmark_input = resource_profile.get("benchmark_input", "image")
+            write_benchmark_inputs(os.path.join(build_dir, "benchmark_inputs"), benchmark_input)
+
             # Create Dockerfile
             with open(os.path.join(build_dir, "Dockerfile"), "w") as f:
                 f.write(DOCKERFILE_TEMPLATE)
 
             build_logs.append("Build context prepared")
 
-            # Build Docker image
+            # Build Docker image (docker is imported here so the API, which
+            # imports this module to enqueue builds, doesn't load it)
+            import docker
             docker_client = docker.from_env()
             image_tag = f"{settings.REGISTRY_URL}/model-{version_id}:latest"
 
@@ -140,7 +350,45 @@ def build_model_task(self, version_id: str):
 
             build_logs.append("Docker image built successfully")
 
-            # Push to local registry
+            # Declared limits win; anything undeclared is measured or defaulted
+            result = {
+                "cpu_limit": resource_profile.get("cpu", float(settings.CONTAINER_CPU_LIMIT)),
+                "memory_limit_mb": resource_profile.get("memory_mb"),
+            }
+
+            # Benchmark the local image against the inputs baked into it (no volume mounts needed)
+            if settings.BENCHMARK_ENABLED and benchmark_input != "none":
+                build_logs.append(f"Running post-build benchmark ({benchmark_input} inputs)")
+                metrics = run_benchmark(
+                    docker_client,
+                    image_tag,
+                    result["cpu_limit"],
+                    result["memory_limit_mb"] or parse_memory_mb(settings.CONTAINER_MEMORY_LIMIT)
+                )
+
+                result.update(
+                    benchmark_import_time_ms=metrics["import_time_ms"],
+                    benchmark_first_inference_ms=metrics["first_inference_ms"],
+                    benchmark_p50_ms=metrics["p50_ms"],
+                    benchmark_p95_ms=metrics["p95_ms"],
+                    benchmark_peak_memory_mb=metrics["peak_memory_mb"],
+                )
+
+                build_logs.append(
+                    f"Benchmark: import {metrics['import_time_ms']:.0f} ms, "
+                    f"first inference {metrics['first_inference_ms']:.0f} ms, "
+                    f"p50 {metrics['p50_ms']:.0f} ms, p95 {metrics['p95_ms']:.0f} ms, "
+                    f"peak memory {metrics['peak_memory_mb']:.0f} MB ({metrics['samples']} samples)"
+                )
+                if result["memory_limit_mb"] is None:
+                    result["memory_limit_mb"] = memory_from_benchmark(metrics["peak_memory_mb"])
+            elif benchmark_input == "none":
+                build_logs.append("Skipping benchmark (benchmark_input is none)")
+            else:
+                build_logs.append("Skipping benchmark (disabled)")
+
+            # Push only an image that passed the benchmark, so a failed build
+            # leaves nothing in the registry
             build_logs.append(f"Pushing to registry: {image_tag}")
 
             for line in docker_client.images.push(image_tag, stream=True, decode=True):
@@ -153,15 +401,23 @@ def build_model_task(self, version_id: str):
 
             build_logs.append(f"Image pushed successfully. Digest: {image_digest}")
 
-            # Skip smoke test for now (volume mounting issues on some platforms)
-            build_logs.append("Skipping smoke test")
+            build_logs.append(
+                f"Resource profile: {result['cpu_limit']} CPU, "
+                f"{result['memory_limit_mb'] or min(parse_memory_mb(settings.CONTAINER_MEMORY_LIMIT), settings.MAX_INFERENCE_MEMORY_GB * 1024)} MB"
+            )
 
             # Update version status
-            version.status = ModelVersionStatus.READY
-            version.docker_image = image_tag
-            version.docker_image_digest = image_digest
-            version.build_logs = "\n".join(build_logs)
-            db.commit()
+            with session_scope() as db:
+                db.query(ModelVersion).filter(ModelVersion.id == version_uuid).update(
+                    {
+                        **result,
+                        "status": ModelVersionStatus.READY,
+                        "docker_image": image_tag,
+                        "docker_image_digest": image_digest,
+                        "build_logs": "\n".join(build_logs),
+                    },
+                    synchronize_session=False
+                )
 
             build_logs.append("Build completed successfully")
             logger.info(f"Build completed for version {version_id}")
@@ -170,14 +426,14 @@ def build_model_task(self, version_id: str):
         logger.error(f"Build failed for version {version_id}: {str(e)}")
         build_logs.append(f"ERROR: {str(e)}")
 
-        version = db.query(ModelVersion).filter(ModelVersion.id == version_uuid).first()
-        if version:
-            version.status = ModelVersionStatus.FAILED
-            version.error_message = str(e)
-            version.build_logs = "\n".join(build_logs)
-            db.commit()
+        with session_scope() as db:
+            db.query(ModelVersion).filter(ModelVersion.id == version_uuid).update(
+                {
+                    "status": ModelVersionStatus.FAILED,
+                    "error_message": str(e),
+                    "build_logs": "\n".join(build_logs),
+                },
+                synchronize_session=False
+            )
 
         raise
-
-    finally:
-        db.close()
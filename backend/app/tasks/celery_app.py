@@ -1,17 +1,30 @@
 from celery import Celery
+from celery.signals import celeryd_after_setup, worker_ready, worker_process_init
 from app.config import settings
 
+# Task modules a worker imports at startup, by WORKER_ROLE. Producers (the API)
+# import task modules lazily where they enqueue, so this only affects workers.
+ROLE_TASK_MODULES = {
+    "build": ["app.tasks.build"],
+    "inference": ["app.tasks.inference", "app.tasks.tiling"],
+}
+ALL_TASK_MODULES = ["app.tasks.build", "app.tasks.inference", "app.tasks.tiling"]
+
+if settings.WORKER_ROLE and settings.WORKER_ROLE not in ROLE_TASK_MODULES:
+    raise ValueError(f"Unknown WORKER_ROLE {settings.WORKER_ROLE!r}; expected one of {sorted(ROLE_TASK_MODULES)}")
+
 celery_app = Celery(
     "cv_platform",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.tasks.build", "app.tasks.inference"]
+    include=ROLE_TASK_MODULES.get(settings.WORKER_ROLE, ALL_TASK_MODULES)
 )
 
 # Configure task routes
 celery_app.conf.task_routes = {
     "app.tasks.build.*": {"queue": "build"},
     "app.tasks.inference.*": {"queue": "inference"},
+    "app.tasks.tiling.*": {"queue": "inference"},
 }
 
 celery_app.conf.update(
@@ -21,3 +34,100 @@ celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
 )
+
+
+def task_time_limits() -> dict:
+    """
+    Soft time limit per long-running task, summed from the phases it goes
+    through: image pull, input downloads, the container run(s), output uploads,
+    or for builds the package download, image build, benchmark and push.
+    """
+    transfers = 2 * settings.STORAGE_TRANSFER_TIMEOUT_SECONDS
+    model_run = settings.IMAGE_PULL_TIMEOUT_SECONDS + transfers + settings.CONTAINER_TIMEOUT
+    return {
+        "app.tasks.build.build_model_task": (
+            settings.STORAGE_TRANSFER_TIMEOUT_SECONDS
+            + settings.MAX_BUILD_TIME_SECONDS
+            + settings.IMAGE_PUSH_TIMEOUT_SECONDS
+            + settings.BENCHMARK_TIMEOUT_SECONDS
+        ),
+        "app.tasks.inference.run_inference_task": model_run,
+        # A batch allows CONTAINER_TIMEOUT per job it carries
+        "app.tasks.inference.run_inference_batch_task": (
+            model_run + settings.CONTAINER_TIMEOUT * (settings.INFERENCE_BATCH_MAX_SIZE - 1)
+        ),
+        "app.tasks.tiling.run_tile_task": model_run,
+        # Blending the tiles is bounded like a model run
+        "app.tasks.tiling.stitch_tiles_task": transfers + settings.CONTAINER_TIMEOUT,
+    }
+
+
+def visibility_timeout() -> int:
+    """Seconds before Redis redelivers an unacked task: the longest hard limit plus a margin."""
+    return (
+        max(task_time_limits().values())
+        + settings.CELERY_TASK_CLEANUP_SECONDS
+        + settings.CELERY_VISIBILITY_MARGIN_SECONDS
+    )
+
+
+def execution_profile() -> dict:
+    """
+    Celery settings for tasks that each hold a container for minutes.
+
+    - Late acks with a prefetch of one: a worker process holds only the task
+      it is running, so queued work goes to whichever process frees up first
+      instead of waiting behind a long job on a busy worker. A worker that dies
+      mid-task leaves the message unacked and it is delivered again.
+    - Each long task has a soft time limit from task_time_limits() (it fails
+      the job or build) and a hard one shortly after. The Redis visibility
+      timeout covers the longest hard limit plus headroom, so a slow but live
+      task is never redelivered to a second worker.
+    - Results are ignored by default, since job state lives in Postgres. Tile
+      tasks opt back in because their chord joins on them; anything that is
+      stored expires.
+    - Worker processes are recycled after a fixed number of tasks.
+    """
+    limits = task_time_limits()
+    cleanup = settings.CELERY_TASK_CLEANUP_SECONDS
+    return {
+        "task_acks_late": True,
+        "task_reject_on_worker_lost": True,
+        "worker_prefetch_multiplier": settings.CELERY_PREFETCH_MULTIPLIER,
+        "worker_max_tasks_per_child": settings.CELERY_MAX_TASKS_PER_CHILD,
+        "task_ignore_result": True,
+        "result_expires": settings.CELERY_RESULT_EXPIRES_SECONDS,
+        "task_annotations": {
+            name: {"soft_time_limit": limit, "time_limit": limit + cleanup}
+            for name, limit in limits.items()
+        },
+        "broker_transport_options": {
+            "visibility_timeout": visibility_timeout(),
+        },
+    }
+
+
+celery_app.conf.update(**execution_profile())
+
+
+@celeryd_after_setup.connect
+def size_storage_pool(sender, instance, **kwargs):
+    """Match the MinIO connection pool to the worker's concurrency."""
+    from app.storage import storage
+    storage.configure(pool_maxsize=instance.concurrency)
+
+
+@worker_ready.connect
+def check_storage_bucket(**kwargs):
+    # Runs in the main process after the pool has forked, so children never
+    # inherit its connections
+    from app.storage import storage
+    storage.ensure_bucket()
+
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    # Connections opened before the fork must not be shared with the parent;
+    # each child starts with an empty pool of its own
+    from app.db import engine
+    engine.dispose(close=False)
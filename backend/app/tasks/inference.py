@@ -1,65 +1,497 @@
 import os
 import tempfile
 import shutil
-import docker
 import logging
 import json
-import time
+from celery import group
+from celery.exceptions import Retry
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload, selectinload
 from app.tasks.celery_app import celery_app
-from app.db import SessionLocal
-from app.models import Job, JobStatus
+from app.tasks import resources, routing
+from app.db import session_scope, connections_in_use
+from app.models import Job, JobStatus, JobInput, ModelVersion
 from app.storage import storage
+from app.volumes import MANIFEST_NAME, is_volume_input
+from app import result_cache
+from app.blobs import input_objects, collect_garbage
 from app.config import settings
 from uuid import UUID
 
 logger = logging.getLogger(__name__)
 
 
+# Mounted into the container for micro-batched runs, so it works with images
+# built before batching existed. Each job gets /workspace/in/<job_id>/ and
+# /workspace/out/<job_id>/; per-job results go to /workspace/out/_batch_status.json.
+BATCH_RUNNER_SCRIPT = """import sys
+import json
+import os
+import traceback
+
+sys.path.insert(0, '/app/user_code')
+
+IN_DIR = '/workspace/in'
+OUT_DIR = '/workspace/out'
+
+try:
+    import predict
+except Exception as e:
+    error_msg = traceback.format_exc()
+    print(json.dumps({"status": "error", "error": str(e), "traceback": error_msg}), file=sys.stderr)
+    sys.exit(1)
+
+job_ids = sorted(os.listdir(IN_DIR))
+input_paths = []
+output_dirs = []
+for job_id in job_ids:
+    job_in = os.path.join(IN_DIR, job_id)
+    input_paths.append(os.path.join(job_in, os.listdir(job_in)[0]))
+    job_out = os.path.join(OUT_DIR, job_id)
+    os.makedirs(job_out, exist_ok=True)
+    output_dirs.append(job_out)
+
+statuses = {}
+
+if hasattr(predict, 'run_batch'):
+    # Model handles the whole batch at once (e.g. one forward pass)
+    try:
+        predict.run_batch(input_paths, output_dirs)
+        batch_error = None
+    except Exception as e:
+        batch_error = str(e)
+    for job_id, output_dir in zip(job_ids, output_dirs):
+        if batch_error:
+            statuses[job_id] = {"status": "error", "error": batch_error}
+        elif not os.listdir(output_dir):
+            statuses[job_id] = {"status": "error", "error": "No output files generated"}
+        else:
+            statuses[job_id] = {"status": "success"}
+else:
+    # Amortize interpreter startup and model import across jobs
+    for job_id, input_path, output_dir in zip(job_ids, input_paths, output_dirs):
+        try:
+            predict.run(input_path, output_dir)
+            if not os.listdir(output_dir):
+                raise RuntimeError("No output files generated")
+            statuses[job_id] = {"status": "success"}
+        except Exception as e:
+            statuses[job_id] = {"status": "error", "error": str(e)}
+
+with open(os.path.join(OUT_DIR, '_batch_status.json'), 'w') as f:
+    json.dump(statuses, f)
+
+print(json.dumps({"status": "success", "jobs": len(job_ids)}))
+"""
+
+
+def make_work_dir(prefix: str) -> tuple[str, str]:
+    """
+    Create a work directory and return (path, host_path).
+
+    Temp directories live under /app/temp which is mounted from the host, so
+    Docker-in-Docker can bind mount them; host_path is the same directory as
+    seen by the Docker daemon.
+    """
+    temp_base = '/app/temp'
+    os.makedirs(temp_base, exist_ok=True)
+    work_dir = tempfile.mkdtemp(dir=temp_base, prefix=prefix)
+
+    # Convert container path to host path for Docker volume mounts
+    # /app is mounted from ./backend on the host (ClinMesh/backend)
+    # Get the absolute path to the backend directory on the host
+    container_base = '/app'
+    # __file__ is /app/app/tasks/inference.py, so go up 3 levels to get /app
+    current_file = os.path.abspath(__file__)  # /app/app/tasks/inference.py
+    app_root = os.path.dirname(os.path.dirname(os.path.dirname(current_file)))  # /app
+
+    # This assumes we're running in Docker and /app is mounted from the host
+    # The host path would be something like /Users/.../ClinMesh/backend
+    # For now, use an environment variable or hardcode the detection
+    host_base = os.environ.get('HOST_BACKEND_PATH', app_root)
+    host_work_dir = work_dir.replace(container_base, host_base)
+
+    logger.info(f"Created work directory: {work_dir} (host: {host_work_dir})")
+    return work_dir, host_work_dir
+
+
+def pull_image(docker_client, image: str):
+    import docker
+    logger.info(f"Pulling image {image}")
+    try:
+        docker_client.images.pull(image)
+    except docker.errors.ImageNotFound:
+        # Image might already be local
+        pass
+
+
+def run_container(docker_client, image: str, volumes: dict, cpu_limit: float, memory_limit_mb: int,
+                  timeout: int = None, **kwargs):
+    """Run a model container to completion with resource limits and timeout (CONTAINER_TIMEOUT by default)."""
+    if connections_in_use():
+        # Tasks should have released their sessions before getting here
+        logger.warning(f"{connections_in_use()} DB connection(s) held while running a container")
+    logger.info(f"Running container {image}")
+
+    container = docker_client.containers.run(
+        image,
+        remove=False,
+        volumes=volumes,
+        network_mode='none',
+        mem_limit=f"{memory_limit_mb}m",
+        cpu_period=100000,
+        cpu_quota=int(cpu_limit * 100000),
+        detach=True,
+        **kwargs
+    )
+
+    # Wait for container with timeout
+    timeout = timeout or settings.CONTAINER_TIMEOUT
+
+    try:
+        result = container.wait(timeout=timeout)
+        exit_code = result['StatusCode']
+
+        if exit_code != 0:
+            logs = container.logs(stderr=True, stdout=True).decode('utf-8')
+            raise RuntimeError(f"Container exited with code {exit_code}. Logs: {logs}")
+
+    except Exception as e:
+        # Timeout or other error - kill container
+        logger.error(f"Container execution error: {str(e)}")
+        try:
+            container.kill()
+        except:
+            pass
+        raise RuntimeError(f"Inference timeout or error: {str(e)}")
+
+    finally:
+        # Cleanup container
+        try:
+            container.remove()
+        except:
+            pass
+
+
+def upload_outputs(job_id: str, output_dir: str) -> list:
+    """Upload every file in output_dir to MinIO and return the object names."""
+    output_files = os.listdir(output_dir)
+    if not output_files:
+        raise RuntimeError("No output files generated")
+
+    logger.info(f"Output files generated: {output_files}")
+
+    output_paths = []
+    for filename in output_files:
+        local_path = os.path.join(output_dir, filename)
+        object_name = f"job_outputs/{job_id}/{filename}"
+
+        logger.info(f"Uploading output {filename} to {object_name}")
+        storage.upload_file(local_path, object_name)
+        output_paths.append(object_name)
+    return output_paths
+
+
+def is_batchable(spec: dict) -> bool:
+    """
+    Whether a job may be parked for micro-batching.
+
+    Only single-image jobs are. Jobs that may be tiled are not: the batch
+    runner does not tile, and whether a job needs it is decided once its input
+    is downloaded. The batch runner consults the result cache per job.
+    """
+    return (
+        settings.INFERENCE_BATCHING_ENABLED
+        and is_single_input(spec["input_path"])
+        and not spec["tiling_enabled"]
+    )
+
+
+def is_single_input(input_path: str) -> bool:
+    """Whether a job's input_path is a single image (not a batch JSON array or a volume)."""
+    if is_volume_input(input_path):
+        return False
+    try:
+        return not isinstance(json.loads(input_path), list)
+    except (json.JSONDecodeError, TypeError):
+        return True
+
+
+def download_volume(manifest_path: str, volume_dir: str):
+    """Download a volume's manifest and chunks straight to disk (never into memory)."""
+    os.makedirs(volume_dir)
+    local_manifest = os.path.join(volume_dir, MANIFEST_NAME)
+    storage.download_file(manifest_path, local_manifest)
+    with open(local_manifest) as f:
+        manifest = json.load(f)
+
+    volume_prefix = manifest_path.rsplit("/", 1)[0]
+    logger.info(f"Downloading volume {manifest['shape']} in {len(manifest['chunks'])} chunks")
+    for chunk in manifest["chunks"]:
+        storage.download_file(f"{volume_prefix}/{chunk}", os.path.join(volume_dir, chunk))
+
+
+def pending_batch_key(version_id: str) -> str:
+    return f"pending_batch:{version_id}"
+
+
+def inflight_batch_key(version_id: str, task_id: str) -> str:
+    return f"pending_batch:{version_id}:inflight:{task_id}"
+
+
+def claim_batch(client, version_id: str, task_id: str) -> list:
+    """
+    Move up to INFERENCE_BATCH_MAX_SIZE parked entries to this flush's in-flight list.
+
+    The move is atomic, so a parked job is always in exactly one list. Anything
+    a previous delivery of the same task left in flight (its worker died) is
+    parked again first and claimed along with the rest.
+    """
+    requeue_batch(client, version_id, task_id)
+    pipe = client.pipeline()
+    for _ in range(settings.INFERENCE_BATCH_MAX_SIZE):
+        pipe.lmove(pending_batch_key(version_id), inflight_batch_key(version_id, task_id), "LEFT", "RIGHT")
+    return [entry for entry in pipe.execute() if entry is not None]
+
+
+def requeue_batch(client, version_id: str, task_id: str):
+    """Park a flush's in-flight entries again, at the head and in their original order."""
+    while client.lmove(inflight_batch_key(version_id, task_id), pending_batch_key(version_id), "RIGHT", "LEFT"):
+        pass
+
+
+def park_entries(client, version_id: str, task_id: str, entries: list):
+    """Move some of a flush's in-flight entries back to the end of the parked list."""
+    pipe = client.pipeline()
+    for entry in entries:
+        pipe.lrem(inflight_batch_key(version_id, task_id), 1, entry)
+        pipe.rpush(pending_batch_key(version_id), entry)
+    pipe.execute()
+
+
+def enqueue_inference(spec: dict):
+    """
+    Enqueue inference for a QUEUED job, given its execution spec.
+
+    The spec travels in the message, so the worker starts without reading the
+    job back. With micro-batching enabled, batchable jobs are parked in a
+    per-version Redis list and a flush task is scheduled after the batching
+    window; the first flush to fire takes up to INFERENCE_BATCH_MAX_SIZE parked
+    jobs and later ones pick up the remainder (or find nothing and exit).
+    """
+    version_id = spec["version_id"]
+    queue = routing.route_inference(version_id)
+
+    if is_batchable(spec):
+        resources.get_redis().rpush(pending_batch_key(version_id), json.dumps(spec))
+        run_inference_batch_task.apply_async(
+            args=[version_id],
+            queue=queue,
+            countdown=settings.INFERENCE_BATCH_WINDOW_MS / 1000
+        )
+        return
+
+    run_inference_task.apply_async(args=[spec["job_id"], spec], queue=queue)
+
+
+def enqueue_many(specs: list):
+    """
+    Enqueue inference for many QUEUED jobs, given their execution specs.
+
+    Each task is routed on its own, counting the ones already routed in this
+    call (routing.route_many), parked batch jobs are pushed in one Redis
+    pipeline, and all tasks are published as a single Celery group over one
+    broker connection.
+    """
+    parked = {}
+    single = []
+    for spec in specs:
+        if is_batchable(spec):
+            parked.setdefault(spec["version_id"], []).append(json.dumps(spec))
+        else:
+            single.append(spec)
+
+    # One flush per full batch; each takes up to INFERENCE_BATCH_MAX_SIZE
+    flushes = [
+        version_id
+        for version_id, entries in parked.items()
+        for _ in range(-(-len(entries) // settings.INFERENCE_BATCH_MAX_SIZE))
+    ]
+    queues = routing.route_many([spec["version_id"] for spec in single] + flushes)
+
+    signatures = [
+        run_inference_task.si(spec["job_id"], spec).set(queue=queue)
+        for spec, queue in zip(single, queues)
+    ]
+
+    if parked:
+        pipe = resources.get_redis().pipeline()
+        for version_id, entries in parked.items():
+            pipe.rpush(pending_batch_key(version_id), *entries)
+        pipe.execute()
+        countdown = settings.INFERENCE_BATCH_WINDOW_MS / 1000
+        signatures.extend(
+            run_inference_batch_task.si(version_id).set(queue=queue, countdown=countdown)
+            for version_id, queue in zip(flushes, queues[len(single):])
+        )
+
+    if signatures:
+        group(signatures).apply_async()
+
+
+def execution_spec(job) -> dict:
+    """
+    Everything a worker needs to run a job, as plain values.
+
+    Built by the API when the job is queued and carried in the task message.
+    A queued job's version and inputs no longer change, so the spec is never
+    stale and workers don't read the job back.
+    """
+    version = job.version
+    cpu_limit, memory_limit_mb = resources.get_resource_profile(version)
+    return {
+        "job_id": str(job.id),
+        "version_id": str(version.id),
+        "docker_image": version.docker_image,
+        "docker_image_digest": version.docker_image_digest,
+        "input_path": job.input_path,
+        "input_objects": input_objects(job),
+        "cpu_limit": cpu_limit,
+        "memory_limit_mb": memory_limit_mb,
+        "cacheable": result_cache.is_cacheable(version),
+        "tiling_enabled": version.model.tiling_enabled,
+    }
+
+
+def load_specs(db, job_ids: list) -> list:
+    """Execution specs for many jobs, loading their versions and input blobs in bulk."""
+    jobs = (
+        db.query(Job)
+        .options(
+            joinedload(Job.version).joinedload(ModelVersion.model),
+            selectinload(Job.inputs).joinedload(JobInput.blob)
+        )
+        .filter(Job.id.in_([UUID(str(job_id)) for job_id in job_ids]))
+        .all()
+    )
+    return [execution_spec(job) for job in jobs]
+
+
+def start_jobs(job_ids: list) -> tuple[set, set]:
+    """
+    Move QUEUED jobs to RUNNING, owned by this worker process.
+
+    Returns (started, held). started are the ids this process may now run: the
+    ones that were still queued, plus RUNNING jobs whose owner has no heartbeat
+    any more (it died mid-run and the message was delivered again). held are
+    RUNNING jobs whose owner is alive; they must not run twice, but the caller
+    should check back in case that owner is about to be proven dead. Anything
+    else was deleted or has finished.
+    """
+    process = resources.process_id()
+    ids = [UUID(job_id) for job_id in job_ids]
+    with session_scope() as db:
+        result = db.execute(
+            update(Job)
+            .where(Job.id.in_(ids), Job.status == JobStatus.QUEUED)
+            .values(status=JobStatus.RUNNING, worker_id=process)
+            .returning(Job.id)
+            .execution_options(synchronize_session=False)
+        )
+        started = {str(job_id) for (job_id,) in result}
+
+        # Jobs handed off to tile tasks have no owner and are never taken over
+        owners = dict(
+            db.query(Job.id, Job.worker_id)
+            .filter(Job.id.in_(ids), Job.status == JobStatus.RUNNING, Job.worker_id.isnot(None))
+            .filter(Job.worker_id != process)
+            .all()
+        )
+        alive = resources.live_processes(sorted(set(owners.values())))
+        held = set()
+        for job_id, owner in owners.items():
+            if owner in alive:
+                held.add(str(job_id))
+                continue
+            # Take over only if nobody else did in the meantime
+            taken = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == JobStatus.RUNNING, Job.worker_id == owner)
+                .values(worker_id=process)
+                .returning(Job.id)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if taken:
+                logger.info(f"Taking over job {job_id} from dead worker process {owner}")
+                started.add(str(job_id))
+    return started, held
+
+
+def set_job_status(job_id: str, status: JobStatus, **values):
+    """Write a job's status (and any result columns) in its own short transaction."""
+    with session_scope() as db:
+        db.query(Job).filter(Job.id == UUID(job_id)).update(
+            {"status": status, **values},
+            synchronize_session=False
+        )
+
+
 @celery_app.task(name="app.tasks.inference.run_inference_task", bind=True)
-def run_inference_task(self, job_id: str):
-    """Run inference using a built model container."""
-    db = SessionLocal()
-    job_uuid = UUID(job_id)
+def run_inference_task(self, job_id: str, spec: dict = None):
+    """
+    Run inference using a built model container.
+
+    Everything needed to run the job comes in the spec, so the worker's DB
+    traffic is the RUNNING transition and one UPDATE with the result, each in
+    its own short transaction.
+    """
+    reserved = False
 
     try:
-        job = db.query(Job).filter(Job.id == job_uuid).first()
-        if not job:
-            raise ValueError(f"Job {job_id} not found")
+        if spec is None:
+            # Messages published before the spec was part of the payload
+            with session_scope() as db:
+                specs = load_specs(db, [job_id])
+            if not specs:
+                raise ValueError(f"Job {job_id} not found")
+            spec = specs[0]
+
+        if not spec["docker_image"]:
+            raise ValueError("Model version has no Docker image")
+
+        # Admit the container only if its resource profile fits on this host
+        cpu_limit, memory_limit_mb = spec["cpu_limit"], spec["memory_limit_mb"]
+        if not resources.fits_host(cpu_limit, memory_limit_mb):
+            raise ValueError(
+                f"Model requires {cpu_limit} CPU / {memory_limit_mb} MB, "
+                f"more than this worker provides"
+            )
+        if not resources.try_reserve(self.request.id, cpu_limit, memory_limit_mb):
+            # Spill over to the shared queue so any worker with room can take it
+            logger.info(f"Host at capacity, requeueing job {job_id}")
+            raise self.retry(
+                countdown=settings.RESOURCE_ADMISSION_RETRY_SECONDS,
+                max_retries=None,
+                queue=routing.SHARED_QUEUE
+            )
+        reserved = True
 
         # Update status
-        job.status = JobStatus.RUNNING
-        db.commit()
+        started, held = start_jobs([job_id])
+        if held:
+            # Another delivery of this job is running; check again once a dead
+            # owner's heartbeat would have expired
+            raise self.retry(countdown=settings.WORKER_HEARTBEAT_TTL_SECONDS, max_retries=None)
+        if not started:
+            logger.info(f"Job {job_id} is no longer queued, skipping")
+            return
 
         # Update progress: Starting
         self.update_state(state='PROGRESS', meta={'current': 10, 'total': 100, 'status': 'Starting inference...'})
 
-        logger.info(f"Starting inference for job {job_id}")
+        logger.info(f"Starting inference for job {job_id} ({cpu_limit} CPU, {memory_limit_mb} MB)")
 
-        version = job.version
-        if not version.docker_image:
-            raise ValueError("Model version has no Docker image")
-
-        # Create temp directories under /app/temp which is mounted from host
-        # This allows Docker-in-Docker to mount these directories
-        temp_base = '/app/temp'
-        os.makedirs(temp_base, exist_ok=True)
-        work_dir = tempfile.mkdtemp(dir=temp_base, prefix=f'job_{job_id}_')
-
-        # Convert container path to host path for Docker volume mounts
-        # /app is mounted from ./backend on the host (ClinMesh/backend)
-        # Get the absolute path to the backend directory on the host
-        container_base = '/app'
-        # __file__ is /app/app/tasks/inference.py, so go up 3 levels to get /app
-        current_file = os.path.abspath(__file__)  # /app/app/tasks/inference.py
-        app_root = os.path.dirname(os.path.dirname(os.path.dirname(current_file)))  # /app
-
-        # This assumes we're running in Docker and /app is mounted from the host
-        # The host path would be something like /Users/.../ClinMesh/backend
-        # For now, use an environment variable or hardcode the detection
-        host_base = os.environ.get('HOST_BACKEND_PATH', app_root)
-        host_work_dir = work_dir.replace(container_base, host_base)
-
-        logger.info(f"Created work directory: {work_dir} (host: {host_work_dir})")
+        work_dir, host_work_dir = make_work_dir(f'job_{job_id}_')
         try:
             input_dir = os.path.join(work_dir, "in")
             output_dir = os.path.join(work_dir, "out")
@@ -68,136 +500,329 @@ def run_inference_task(self, job_id: str):
             os.makedirs(input_dir)
             os.makedirs(output_dir)
 
-            # Download input image(s) from MinIO
-            # Check if this is a batch job (input_path is JSON array) or single job
-            try:
-                input_paths = json.loads(job.input_path)
-                is_batch = isinstance(input_paths, list)
-            except (json.JSONDecodeError, TypeError):
-                # Not JSON, treat as single file path
-                input_paths = [job.input_path]
-                is_batch = False
-
-            logger.info(f"Downloading {len(input_paths)} input file(s)")
-
             # Update progress: Downloading inputs
             self.update_state(state='PROGRESS', meta={'current': 20, 'total': 100, 'status': 'Downloading input files...'})
 
-            for idx, input_path in enumerate(input_paths):
-                input_ext = input_path.split('.')[-1]
-                if is_batch:
-                    # For batch jobs, preserve filenames or use index
-                    filename = input_path.split('/')[-1]
-                    local_input_path = os.path.join(input_dir, filename)
-                else:
-                    # For single jobs, use simple name
-                    local_input_path = os.path.join(input_dir, f"input.{input_ext}")
-
-                logger.info(f"Downloading input from {input_path} to {local_input_path}")
-                storage.download_file(input_path, local_input_path)
+            is_batch = False
+            job_input_path = spec["input_path"]
+            if is_volume_input(job_input_path):
+                # Volumes reach the model as a directory of memory-mappable chunks
+                download_volume(job_input_path, os.path.join(input_dir, "volume"))
+            else:
+                # Download input image(s) from MinIO
+                # Check if this is a batch job (input_path is JSON array) or single job
+                try:
+                    input_paths = json.loads(job_input_path)
+                    is_batch = isinstance(input_paths, list)
+                except (json.JSONDecodeError, TypeError):
+                    # Not JSON, treat as single file path
+                    input_paths = [job_input_path]
+                    is_batch = False
+
+                logger.info(f"Downloading {len(input_paths)} input file(s)")
+
+                for idx, input_path in enumerate(input_paths):
+                    input_ext = input_path.split('.')[-1]
+                    if is_batch:
+                        # For batch jobs, preserve filenames or use index
+                        filename = input_path.split('/')[-1]
+                        local_input_path = os.path.join(input_dir, filename)
+                    else:
+                        # For single jobs, use simple name
+                        local_input_path = os.path.join(input_dir, f"input.{input_ext}")
+
+                    logger.info(f"Downloading input from {input_path} to {local_input_path}")
+                    storage.download_file(spec["input_objects"].get(input_path, input_path), local_input_path)
+
+            # Reruns of the same inputs on the same image reuse earlier outputs
+            input_hash = None
+            if spec["cacheable"]:
+                input_hash = result_cache.hash_inputs(input_dir)
+                cached_outputs = result_cache.lookup(spec["docker_image_digest"], input_hash)
+                if cached_outputs:
+                    set_job_status(job_id, JobStatus.SUCCEEDED, output_paths=json.dumps(cached_outputs))
+                    logger.info(f"Result cache hit for job {job_id}")
+                    return
+
+            # Very large images are split into tiles and fanned out across workers
+            if not is_batch and not is_volume_input(job_input_path) and spec["tiling_enabled"]:
+                from app.tasks import tiling
+                if tiling.needs_tiling(local_input_path):
+                    self.update_state(state='PROGRESS', meta={'current': 30, 'total': 100, 'status': 'Splitting into tiles...'})
+                    tiling.start_tiled_inference(spec, local_input_path, work_dir)
+                    return
 
             # Pull Docker image
+            import docker
             docker_client = docker.from_env()
-            logger.info(f"Pulling image {version.docker_image}")
 
             # Update progress: Pulling Docker image
             self.update_state(state='PROGRESS', meta={'current': 40, 'total': 100, 'status': 'Preparing model...'})
 
-            try:
-                docker_client.images.pull(version.docker_image)
-            except docker.errors.ImageNotFound:
-                # Image might already be local
-                pass
-
-            # Run container with resource limits and timeout
-            logger.info(f"Running container {version.docker_image}")
+            pull_image(docker_client, spec["docker_image"])
 
             # Update progress: Running inference
             self.update_state(state='PROGRESS', meta={'current': 50, 'total': 100, 'status': 'Running inference...'})
 
-            container = docker_client.containers.run(
-                version.docker_image,
-                remove=False,
-                volumes={
+            run_container(
+                docker_client,
+                spec["docker_image"],
+                {
                     host_input_dir: {'bind': '/workspace/in', 'mode': 'ro'},
                     host_output_dir: {'bind': '/workspace/out', 'mode': 'rw'}
                 },
-                network_mode='none',
-                mem_limit=settings.CONTAINER_MEMORY_LIMIT,
-                cpu_period=100000,
-                cpu_quota=int(float(settings.CONTAINER_CPU_LIMIT) * 100000),
-                detach=True
+                cpu_limit,
+                memory_limit_mb
             )
 
-            # Wait for container with timeout
-            start_time = time.time()
-            timeout = settings.CONTAINER_TIMEOUT
-
-            try:
-                result = container.wait(timeout=timeout)
-                exit_code = result['StatusCode']
-
-                if exit_code != 0:
-                    logs = container.logs(stderr=True, stdout=True).decode('utf-8')
-                    raise RuntimeError(f"Container exited with code {exit_code}. Logs: {logs}")
-
-            except Exception as e:
-                # Timeout or other error - kill container
-                logger.error(f"Container execution error: {str(e)}")
-                try:
-                    container.kill()
-                except:
-                    pass
-                raise RuntimeError(f"Inference timeout or error: {str(e)}")
-
-            finally:
-                # Cleanup container
-                try:
-                    container.remove()
-                except:
-                    pass
-
-            # Check outputs
-            output_files = os.listdir(output_dir)
-            if not output_files:
-                raise RuntimeError("No output files generated")
-
-            logger.info(f"Output files generated: {output_files}")
+            # The image is now local on this host
+            routing.mark_warm(spec["version_id"])
 
             # Update progress: Uploading results
             self.update_state(state='PROGRESS', meta={'current': 80, 'total': 100, 'status': 'Uploading results...'})
 
             # Upload outputs to MinIO
-            output_paths = []
-            for filename in output_files:
-                local_path = os.path.join(output_dir, filename)
-                object_name = f"job_outputs/{job_id}/{filename}"
+            output_paths = upload_outputs(job_id, output_dir)
 
-                logger.info(f"Uploading output {filename} to {object_name}")
-                storage.upload_file(local_path, object_name)
-                output_paths.append(object_name)
+            if input_hash:
+                store_result(spec, input_hash, output_paths)
 
             # Update job status
-            job.status = JobStatus.SUCCEEDED
-            job.output_paths = json.dumps(output_paths)
-            db.commit()
+            set_job_status(job_id, JobStatus.SUCCEEDED, output_paths=json.dumps(output_paths))
 
             logger.info(f"Inference completed successfully for job {job_id}")
         finally:
             # Clean up temp directory
-            if 'work_dir' in locals():
-                shutil.rmtree(work_dir, ignore_errors=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    except Retry:
+        raise
 
     except Exception as e:
         logger.error(f"Inference failed for job {job_id}: {str(e)}")
+        set_job_status(job_id, JobStatus.FAILED, error_message=str(e))
+        raise
+
+    finally:
+        if reserved:
+            resources.release(self.request.id)
+
+
+def store_result(spec: dict, input_hash: str, output_paths: list):
+    """Record a job's outputs in the result cache, trimming it every so many writes."""
+    result_cache.store(spec["docker_image_digest"], input_hash, output_paths)
+    if resources.get_redis().incr("result_cache:writes") % settings.RESULT_CACHE_EVICT_EVERY == 0:
+        evict_result_cache_task.delay()
+
+
+@celery_app.task(name="app.tasks.inference.evict_result_cache_task")
+def evict_result_cache_task():
+    """Trim the result cache index (TTL and size bound)."""
+    result_cache.evict()
+
+
+@celery_app.task(name="app.tasks.inference.collect_input_blobs_task")
+def collect_input_blobs_task():
+    """Delete input blobs no job references any more."""
+    with session_scope() as db:
+        removed = collect_garbage(db)
+    logger.info(f"Removed {removed} unreferenced input blobs")
+
+
+@celery_app.task(name="app.tasks.inference.run_inference_batch_task", bind=True)
+def run_inference_batch_task(self, version_id: str):
+    """
+    Run parked single-input jobs for one model version through a single container.
+
+    Parked entries are the jobs' execution specs, so the batch starts with one
+    UPDATE to RUNNING and ends with one bulk UPDATE of the results. Claimed
+    entries stay in an in-flight list until those results are written; if they
+    never are, the entries are parked again for another flush. Jobs found in
+    the result cache are settled before the container starts and left out of it.
+    """
+    client = resources.get_redis()
+    entries = claim_batch(client, version_id, self.request.id)
+    if not entries:
+        # An earlier flush already took these jobs
+        return
+
+    reserved = False
+    settled = False
+    retrying = False
+    specs = [json.loads(entry) for entry in entries]
+    entry_for = {spec["job_id"]: entry for spec, entry in zip(specs, entries)}
+
+    try:
+        docker_image = specs[0]["docker_image"]
+        if not docker_image:
+            raise ValueError("Model version has no Docker image")
+
+        cpu_limit, memory_limit_mb = specs[0]["cpu_limit"], specs[0]["memory_limit_mb"]
+        if not resources.fits_host(cpu_limit, memory_limit_mb):
+            raise ValueError(
+                f"Model requires {cpu_limit} CPU / {memory_limit_mb} MB, "
+                f"more than this worker provides"
+            )
+        batch_timeout = settings.CONTAINER_TIMEOUT * len(specs)
+        if not resources.try_reserve(self.request.id, cpu_limit, memory_limit_mb, batch_timeout):
+            # Put the jobs back at the head of the list and try again later
+            logger.info(f"Host at capacity, requeueing batch of {len(specs)} for version {version_id}")
+            requeue_batch(client, version_id, self.request.id)
+            retrying = True
+            raise self.retry(
+                countdown=settings.RESOURCE_ADMISSION_RETRY_SECONDS,
+                max_retries=None,
+                queue=routing.SHARED_QUEUE
+            )
+        reserved = True
+
+        started, held = start_jobs([spec["job_id"] for spec in specs])
+        if held:
+            # Another delivery is running these; check again once a dead
+            # owner's heartbeat would have expired
+            park_entries(client, version_id, self.request.id, [entry_for[job_id] for job_id in held])
+            run_inference_batch_task.apply_async(
+                args=[version_id],
+                queue=routing.SHARED_QUEUE,
+                countdown=settings.WORKER_HEARTBEAT_TTL_SECONDS
+            )
+        specs = [spec for spec in specs if spec["job_id"] in started]
+        if not specs:
+            settled = True
+            return
+
+        logger.info(f"Starting batched inference of {len(specs)} jobs for version {version_id}")
 
-        job = db.query(Job).filter(Job.id == job_uuid).first()
-        if job:
-            job.status = JobStatus.FAILED
-            job.error_message = str(e)
-            db.commit()
+        work_dir, host_work_dir = make_work_dir(f'batch_{version_id}_')
+        try:
+            input_dir = os.path.join(work_dir, "in")
+            output_dir = os.path.join(work_dir, "out")
+            runner_dir = os.path.join(work_dir, "runner")
+            os.makedirs(input_dir)
+            os.makedirs(output_dir)
+            os.makedirs(runner_dir)
+
+            with open(os.path.join(runner_dir, "batch_runner.py"), "w") as f:
+                f.write(BATCH_RUNNER_SCRIPT)
+
+            # Reruns of the same inputs on the same image reuse earlier outputs
+            input_hashes = {}
+            cache_hits = []
+            for spec in specs:
+                job_input_dir = os.path.join(input_dir, spec["job_id"])
+                os.makedirs(job_input_dir)
+                input_path = spec["input_path"]
+                input_ext = input_path.split('.')[-1]
+                storage.download_file(
+                    spec["input_objects"].get(input_path, input_path),
+                    os.path.join(job_input_dir, f"input.{input_ext}")
+                )
+                if spec["cacheable"]:
+                    input_hash = result_cache.hash_inputs(job_input_dir)
+                    cached_outputs = result_cache.lookup(spec["docker_image_digest"], input_hash)
+                    if cached_outputs:
+                        cache_hits.append({
+                            "id": UUID(spec["job_id"]),
+                            "status": JobStatus.SUCCEEDED,
+                            "output_paths": json.dumps(cached_outputs),
+                            "error_message": None,
+                        })
+                        shutil.rmtree(job_input_dir)
+                    else:
+                        input_hashes[spec["job_id"]] = input_hash
+
+            if cache_hits:
+                # Settled now, so a failing container cannot fail them too
+                with session_scope() as db:
+                    db.execute(update(Job), cache_hits)
+                logger.info(f"Result cache hit for {len(cache_hits)} of {len(specs)} batched jobs")
+                hit_ids = {str(hit["id"]) for hit in cache_hits}
+                specs = [spec for spec in specs if spec["job_id"] not in hit_ids]
+                if not specs:
+                    settled = True
+                    return
+
+            import docker
+            docker_client = docker.from_env()
+            pull_image(docker_client, docker_image)
+
+            run_container(
+                docker_client,
+                docker_image,
+                {
+                    os.path.join(host_work_dir, "in"): {'bind': '/workspace/in', 'mode': 'ro'},
+                    os.path.join(host_work_dir, "out"): {'bind': '/workspace/out', 'mode': 'rw'},
+                    os.path.join(host_work_dir, "runner"): {'bind': '/workspace/runner', 'mode': 'ro'}
+                },
+                cpu_limit,
+                memory_limit_mb,
+                # The runner calls the model once per job it was given
+                timeout=settings.CONTAINER_TIMEOUT * len(specs),
+                entrypoint=["python", "/workspace/runner/batch_runner.py"]
+            )
+
+            routing.mark_warm(version_id)
+
+            with open(os.path.join(output_dir, "_batch_status.json")) as f:
+                statuses = json.load(f)
+
+            # Fan results back out to the individual jobs, uploading before
+            # any connection is taken
+            results = []
+            for spec in specs:
+                job_id = spec["job_id"]
+                result = {"id": UUID(job_id), "status": JobStatus.FAILED, "output_paths": None, "error_message": None}
+                job_status = statuses.get(job_id, {"status": "error", "error": "Job missing from batch results"})
+                if job_status["status"] != "success":
+                    result["error_message"] = job_status.get("error")
+                else:
+                    try:
+                        output_paths = upload_outputs(job_id, os.path.join(output_dir, job_id))
+                        result.update(status=JobStatus.SUCCEEDED, output_paths=json.dumps(output_paths))
+                        if job_id in input_hashes:
+                            store_result(spec, input_hashes[job_id], output_paths)
+                    except Exception as e:
+                        result["error_message"] = str(e)
+                results.append(result)
+
+            # One executemany UPDATE by primary key for the whole batch
+            with session_scope() as db:
+                db.execute(update(Job), results)
+            settled = True
+
+            logger.info(f"Batched inference completed for version {version_id}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    except Retry:
+        raise
+
+    except Exception as e:
+        logger.error(f"Batched inference failed for version {version_id}: {str(e)}")
+
+        if specs:
+            with session_scope() as db:
+                db.query(Job).filter(
+                    Job.id.in_([UUID(spec["job_id"]) for spec in specs]),
+                    Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+                ).update(
+                    {"status": JobStatus.FAILED, "error_message": str(e)},
+                    synchronize_session=False
+                )
+        settled = True
 
         raise
 
     finally:
-        db.close()
+        if reserved:
+            resources.release(self.request.id)
+        if settled:
+            client.delete(inflight_batch_key(version_id, self.request.id))
+        elif not retrying:
+            # The jobs' outcomes were never written; let another flush run them
+            requeue_batch(client, version_id, self.request.id)
+            run_inference_batch_task.apply_async(
+                args=[version_id],
+                queue=routing.SHARED_QUEUE,
+                countdown=settings.RESOURCE_ADMISSION_RETRY_SECONDS
+            )
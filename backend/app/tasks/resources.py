@@ -0,0 +1,239 @@
+"""
+Per-version container resource profiles and host admission control.
+
+Each inference worker host has a fixed CPU/memory budget. Before a container
+is started, its reservation is added to a per-host ledger in Redis; containers
+are admitted as long as the sum of reservations fits (first-fit bin packing),
+so small models can run densely while large ones wait for room.
+"""
+import json
+import math
+import os
+import socket
+import threading
+import time
+import redis
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Atomically drop expired reservations, check remaining capacity and reserve.
+# KEYS[1] = ledger hash, ARGV = task_id, cpu, memory_mb, cpu_capacity,
+# memory_capacity_mb, now, expires_at
+ADMIT_SCRIPT = """
+local cpu_used = 0
+local mem_used = 0
+local entries = redis.call('HGETALL', KEYS[1])
+for i = 1, #entries, 2 do
+    local cpu, mem, expires = string.match(entries[i + 1], '([^:]+):([^:]+):([^:]+)')
+    if tonumber(expires) < tonumber(ARGV[6]) then
+        redis.call('HDEL', KEYS[1], entries[i])
+    else
+        cpu_used = cpu_used + tonumber(cpu)
+        mem_used = mem_used + tonumber(mem)
+    end
+end
+if cpu_used + tonumber(ARGV[2]) > tonumber(ARGV[4]) or mem_used + tonumber(ARGV[3]) > tonumber(ARGV[5]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2] .. ':' .. ARGV[3] .. ':' .. ARGV[7])
+return 1
+"""
+
+
+_redis_client = None
+
+
+def get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _redis_client
+
+
+def parse_memory_mb(limit: str) -> int:
+    """Convert a Docker-style memory limit ('8g', '512m') to megabytes."""
+    limit = limit.strip().lower()
+    units = {"k": 1 / 1024, "m": 1, "g": 1024, "t": 1024 * 1024}
+    if limit and limit[-1] in units:
+        return int(float(limit[:-1]) * units[limit[-1]])
+    # Plain number of bytes
+    return int(int(limit) / (1024 * 1024))
+
+
+def host_cpu_capacity() -> float:
+    if settings.WORKER_CPU_CAPACITY:
+        return settings.WORKER_CPU_CAPACITY
+    return float(os.cpu_count() or 1)
+
+
+def host_memory_capacity_mb() -> int:
+    if settings.WORKER_MEMORY_CAPACITY_MB:
+        return settings.WORKER_MEMORY_CAPACITY_MB
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return parse_memory_mb(settings.CONTAINER_MEMORY_LIMIT)
+
+
+# What the post-build benchmark feeds the model; "none" skips the benchmark
+BENCHMARK_INPUTS = ("image", "volume", "none")
+
+
+def read_package_profile(user_code_dir: str) -> dict:
+    """
+    Read the optional resources.json declared in a model package.
+
+    Returns a dict with 'cpu', 'memory_mb' and/or 'benchmark_input' keys
+    (possibly empty).
+    """
+    manifest_path = os.path.join(user_code_dir, "resources.json")
+    if not os.path.exists(manifest_path):
+        return {}
+
+    with open(manifest_path) as f:
+        declared = json.load(f)
+
+    profile = {}
+    if declared.get("cpu") is not None:
+        cpu = float(declared["cpu"])
+        if cpu <= 0 or cpu > settings.MAX_INFERENCE_CPU_CORES:
+            raise ValueError(f"resources.json: cpu must be between 0 and {settings.MAX_INFERENCE_CPU_CORES}")
+        profile["cpu"] = cpu
+    if declared.get("memory_mb") is not None:
+        memory_mb = int(declared["memory_mb"])
+        if memory_mb <= 0 or memory_mb > settings.MAX_INFERENCE_MEMORY_GB * 1024:
+            raise ValueError(f"resources.json: memory_mb must be between 0 and {settings.MAX_INFERENCE_MEMORY_GB * 1024}")
+        profile["memory_mb"] = memory_mb
+    if declared.get("benchmark_input") is not None:
+        if declared["benchmark_input"] not in BENCHMARK_INPUTS:
+            raise ValueError(f"resources.json: benchmark_input must be one of {', '.join(BENCHMARK_INPUTS)}")
+        profile["benchmark_input"] = declared["benchmark_input"]
+    return profile
+
+
+def memory_from_benchmark(peak_memory_mb: float) -> int:
+    """
+    Size a memory reservation from the measured benchmark peak plus headroom.
+
+    Only RESOURCE_MIN_MEMORY_MB is a floor, so small models reserve little and
+    leave room for others. A model that needs more than the cap is rejected
+    rather than clamped below its measured peak, where it would be OOM-killed
+    at inference time.
+    """
+    cap_mb = settings.MAX_INFERENCE_MEMORY_GB * 1024
+    memory_mb = math.ceil(peak_memory_mb * settings.RESOURCE_MEMORY_HEADROOM)
+    if memory_mb > cap_mb:
+        raise ValueError(
+            f"Benchmark peak memory {peak_memory_mb:.0f} MB needs {memory_mb} MB with headroom, "
+            f"more than the {cap_mb} MB inference limit"
+        )
+    return max(memory_mb, settings.RESOURCE_MIN_MEMORY_MB)
+
+
+def get_resource_profile(version) -> tuple[float, int]:
+    """Return (cpu, memory_mb) for a model version, falling back to the global limits."""
+    cpu = version.cpu_limit or float(settings.CONTAINER_CPU_LIMIT)
+    # The default container limit may be set above the inference cap
+    memory_mb = version.memory_limit_mb or min(
+        parse_memory_mb(settings.CONTAINER_MEMORY_LIMIT), settings.MAX_INFERENCE_MEMORY_GB * 1024
+    )
+    return cpu, memory_mb
+
+
+def fits_host(cpu: float, memory_mb: int) -> bool:
+    """Whether a profile could ever be admitted on this host, even when idle."""
+    return cpu <= host_cpu_capacity() and memory_mb <= host_memory_capacity_mb()
+
+
+def worker_name() -> str:
+    return settings.WORKER_HOSTNAME or socket.gethostname()
+
+
+def process_heartbeat_key(process: str) -> str:
+    return f"worker_process:{process}"
+
+
+_process_heartbeat_pid = None
+
+
+def _process_heartbeat_loop(process: str):
+    while True:
+        time.sleep(settings.WORKER_HEARTBEAT_INTERVAL_SECONDS)
+        try:
+            get_redis().set(process_heartbeat_key(process), 1, ex=settings.WORKER_HEARTBEAT_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.warning(f"Process heartbeat failed: {e}")
+
+
+def process_id() -> str:
+    """
+    This worker process as recorded on the jobs it runs ("host:pid").
+
+    The first call in a process starts a heartbeat for it, so other workers
+    can tell whether a job's owner is still alive.
+    """
+    global _process_heartbeat_pid
+    process = f"{worker_name()}:{os.getpid()}"
+    if _process_heartbeat_pid != os.getpid():
+        # First call, or first since a fork (threads don't survive one)
+        get_redis().set(process_heartbeat_key(process), 1, ex=settings.WORKER_HEARTBEAT_TTL_SECONDS)
+        threading.Thread(
+            target=_process_heartbeat_loop, args=(process,), name="process-heartbeat", daemon=True
+        ).start()
+        _process_heartbeat_pid = os.getpid()
+    return process
+
+
+def live_processes(processes: list) -> set:
+    """The given worker processes that still have a heartbeat."""
+    try:
+        pipe = get_redis().pipeline()
+        for process in processes:
+            pipe.exists(process_heartbeat_key(process))
+        return {process for process, alive in zip(processes, pipe.execute()) if alive}
+    except redis.RedisError as e:
+        # Without Redis no owner can be proven dead
+        logger.warning(f"Process heartbeats unavailable: {e}")
+        return set(processes)
+
+
+def ledger_key(name: str = None) -> str:
+    return f"worker_resources:{name or worker_name()}"
+
+
+def try_reserve(task_id: str, cpu: float, memory_mb: int, seconds: int = None) -> bool:
+    """
+    Try to reserve capacity on this host for a container. Returns True if admitted.
+
+    seconds is how long the container may run (CONTAINER_TIMEOUT by default).
+    """
+    now = time.time()
+    # Reservations expire on their own if the worker dies before releasing them
+    expires_at = now + (seconds or settings.CONTAINER_TIMEOUT) + settings.RESOURCE_RESERVATION_GRACE_SECONDS
+    try:
+        admitted = get_redis().eval(
+            ADMIT_SCRIPT, 1, ledger_key(),
+            task_id, cpu, memory_mb,
+            host_cpu_capacity(), host_memory_capacity_mb(),
+            now, expires_at
+        )
+    except redis.RedisError as e:
+        # Fail open like the rate limiter: losing admission control beats losing jobs
+        logger.warning(f"Resource admission unavailable, admitting {task_id}: {e}")
+        return True
+    return bool(admitted)
+
+
+def release(task_id: str):
+    """Release a reservation made by try_reserve."""
+    try:
+        get_redis().hdel(ledger_key(), task_id)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to release resource reservation for {task_id}: {e}")
@@ -0,0 +1,235 @@
+"""
+Model-affinity routing for inference tasks.
+
+Every inference worker also consumes a private queue (inference.<hostname>)
+and publishes a heartbeat to Redis. After running a model version it records
+itself as warm for that version (image pulled, page cache hot). At enqueue
+time a job is sent to the least loaded live warm worker, counting both its
+running containers and the tasks already waiting in its private queue; when
+every warm worker is saturated, or none exist, it spills over to the shared
+queue where any worker can pick it up. Tasks left in the private queue of a
+worker whose heartbeat has expired are moved to the shared queue by the
+remaining workers. They keep watching that queue for a visibility timeout,
+since Redis redelivers the dead worker's unacked tasks to it only then.
+"""
+import threading
+import time
+import logging
+import redis
+from celery.signals import celeryd_after_setup, worker_ready, worker_shutdown
+from app.config import settings
+from app.tasks.resources import get_redis, ledger_key, worker_name
+
+logger = logging.getLogger(__name__)
+
+SHARED_QUEUE = "inference"
+
+# Every worker host that has had a private queue
+WORKERS_KEY = "inference_workers"
+
+# Dead worker hosts -> when a task was last found in their private queue
+DEAD_WORKERS_KEY = "inference_workers_dead"
+
+_worker_slots = None
+_broker_client = None
+_heartbeat_stop = threading.Event()
+
+
+def worker_queue(name: str = None) -> str:
+    """Private queue consumed only by the given (default: this) worker host."""
+    return f"{SHARED_QUEUE}.{name or worker_name()}"
+
+
+def heartbeat_key(name: str) -> str:
+    return f"inference_worker:{name}"
+
+
+def warm_key(version_id: str) -> str:
+    return f"warm_versions:{version_id}"
+
+
+def get_broker_redis():
+    """Client for the Redis that holds the Celery queues (the broker)."""
+    global _broker_client
+    if settings.CELERY_BROKER_URL == settings.REDIS_URL:
+        return get_redis()
+    if _broker_client is None:
+        _broker_client = redis.from_url(settings.CELERY_BROKER_URL, decode_responses=True)
+    return _broker_client
+
+
+def mark_warm(version_id: str):
+    """Record that this worker has the given version warm."""
+    if not settings.INFERENCE_AFFINITY_ENABLED:
+        return
+    try:
+        client = get_redis()
+        pipe = client.pipeline()
+        pipe.zadd(warm_key(version_id), {worker_name(): time.time()})
+        pipe.expire(warm_key(version_id), settings.WARM_VERSION_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Failed to record warm version {version_id}: {e}")
+
+
+def free_slots(version_id: str) -> dict:
+    """Free slots of each live worker that has the version warm."""
+    client = get_redis()
+    min_score = time.time() - settings.WARM_VERSION_TTL_SECONDS
+    candidates = client.zrangebyscore(warm_key(version_id), min_score, "+inf")
+    if not candidates:
+        return {}
+
+    pipe = client.pipeline()
+    for name in candidates:
+        pipe.get(heartbeat_key(name))
+        pipe.hlen(ledger_key(name))
+    replies = pipe.execute()
+
+    # Tasks routed to a worker but not picked up yet count against it too
+    pipe = get_broker_redis().pipeline()
+    for name in candidates:
+        pipe.llen(worker_queue(name))
+    waiting = pipe.execute()
+
+    free = {}
+    for i, name in enumerate(candidates):
+        slots, in_flight = replies[2 * i], replies[2 * i + 1]
+        if slots is None:
+            # No recent heartbeat - worker is gone
+            continue
+        free[name] = int(slots) - in_flight - waiting[i]
+    return free
+
+
+def route_inference(version_id: str) -> str:
+    """
+    Choose the queue for a job: the least loaded live worker that has the
+    version warm, or the shared queue if there is none with a free slot.
+    """
+    return route_many([version_id])[0]
+
+
+def route_many(version_ids: list) -> list:
+    """
+    Choose a queue for each of several jobs, given their version ids.
+
+    Worker load is read once per version, then jobs are assigned one at a
+    time, each taking a slot on the worker it was sent to, so a bulk run
+    spreads over the warm workers and spills to the shared queue once they
+    are full.
+    """
+    if not settings.INFERENCE_AFFINITY_ENABLED:
+        return [SHARED_QUEUE] * len(version_ids)
+
+    try:
+        free_by_version = {version_id: free_slots(version_id) for version_id in set(version_ids)}
+    except Exception as e:
+        logger.warning(f"Affinity routing unavailable: {e}")
+        return [SHARED_QUEUE] * len(version_ids)
+
+    assigned = {}
+    queues = []
+    for version_id in version_ids:
+        best = None
+        best_free = 0
+        for name, free in free_by_version[version_id].items():
+            free -= assigned.get(name, 0)
+            if free > best_free:
+                best, best_free = name, free
+        if best:
+            assigned[best] = assigned.get(best, 0) + 1
+            queues.append(worker_queue(best))
+        else:
+            queues.append(SHARED_QUEUE)
+    return queues
+
+
+def reclaim_dead_queues() -> int:
+    """
+    Move tasks out of the private queues of workers without a heartbeat.
+
+    They go to the front of the shared queue in their original order, so they
+    don't wait for a worker that may never come back. Tasks the worker had
+    taken but not acked reappear in its queue only after the visibility
+    timeout, so a dead worker is forgotten once its queue has stayed empty for
+    longer than that. Returns how many moved.
+    """
+    from app.tasks.celery_app import visibility_timeout
+
+    client = get_redis()
+    names = sorted(client.smembers(WORKERS_KEY))
+    pipe = client.pipeline()
+    for name in names:
+        pipe.exists(heartbeat_key(name))
+    dead = [name for name, alive in zip(names, pipe.execute()) if not alive]
+
+    broker = get_broker_redis()
+    now = time.time()
+    moved = 0
+    for name in dead:
+        found = 0
+        # Celery pushes on the left and pops on the right: moving newest first
+        # onto the right of the shared queue leaves the oldest next in line
+        while broker.lmove(worker_queue(name), SHARED_QUEUE, "LEFT", "RIGHT"):
+            found += 1
+        moved += found
+
+        last_seen = client.hget(DEAD_WORKERS_KEY, name)
+        if found or last_seen is None:
+            client.hset(DEAD_WORKERS_KEY, name, now)
+        elif now - float(last_seen) > visibility_timeout():
+            pipe = client.pipeline()
+            pipe.srem(WORKERS_KEY, name)
+            pipe.hdel(DEAD_WORKERS_KEY, name)
+            pipe.execute()
+    if moved:
+        logger.info(f"Moved {moved} task(s) from the queues of {', '.join(dead)} to {SHARED_QUEUE}")
+    return moved
+
+
+def _heartbeat_loop():
+    while not _heartbeat_stop.is_set():
+        try:
+            pipe = get_redis().pipeline()
+            pipe.set(heartbeat_key(worker_name()), _worker_slots, ex=settings.WORKER_HEARTBEAT_TTL_SECONDS)
+            pipe.sadd(WORKERS_KEY, worker_name())
+            # A restarted host is no longer dead
+            pipe.hdel(DEAD_WORKERS_KEY, worker_name())
+            pipe.execute()
+            reclaim_dead_queues()
+        except Exception as e:
+            logger.warning(f"Worker heartbeat failed: {e}")
+        _heartbeat_stop.wait(settings.WORKER_HEARTBEAT_INTERVAL_SECONDS)
+
+
+@celeryd_after_setup.connect
+def add_worker_queue(sender, instance, **kwargs):
+    """Subscribe inference workers to their private affinity queue."""
+    global _worker_slots
+    if not settings.INFERENCE_AFFINITY_ENABLED:
+        return
+    if SHARED_QUEUE not in instance.app.amqp.queues.consume_from:
+        # Build workers and other roles don't take inference work
+        return
+    _worker_slots = instance.concurrency
+    instance.app.amqp.queues.select_add(worker_queue())
+    logger.info(f"Consuming affinity queue {worker_queue()}")
+
+
+@worker_ready.connect
+def start_heartbeat(**kwargs):
+    if _worker_slots is None:
+        return
+    threading.Thread(target=_heartbeat_loop, name="affinity-heartbeat", daemon=True).start()
+
+
+@worker_shutdown.connect
+def stop_heartbeat(**kwargs):
+    if _worker_slots is None:
+        return
+    _heartbeat_stop.set()
+    try:
+        get_redis().delete(heartbeat_key(worker_name()))
+    except Exception:
+        pass
@@ -0,0 +1,376 @@
+"""
+Tiled fan-out inference for very large images (EM, whole-slide).
+
+A large input is copied once into an on-disk NumPy memmap, split into
+overlapping tiles which are uploaded and fanned out as individual tile tasks
+(a Celery chord), and the tile outputs are stitched back into a memmapped
+accumulator with linear blending across the overlaps. The parent job stays
+RUNNING and tracks progress through tile_count / tiles_completed.
+"""
+import os
+import json
+import shutil
+import struct
+import zlib
+import logging
+from celery import chord
+from celery.exceptions import Retry
+from uuid import UUID
+from sqlalchemy import update
+from app.tasks.celery_app import celery_app
+from app.tasks import resources, routing
+from app.tasks.inference import make_work_dir, pull_image, run_container, load_specs, set_job_status
+from app.db import session_scope
+from app.models import Job, JobStatus
+from app.storage import storage
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _imaging():
+    """
+    numpy and PIL, imported on first use.
+
+    Every inference worker registers the tile tasks, but most never tile, so
+    they don't pay for these imports at startup.
+    """
+    import numpy as np
+    from PIL import Image
+    # Gigapixel inputs are expected here; keep a (much higher) bomb guard
+    Image.MAX_IMAGE_PIXELS = settings.TILING_MAX_PIXELS
+    return np, Image
+
+
+def tiles_prefix(job_id: str) -> str:
+    return f"job_tiles/{job_id}"
+
+
+def image_shape(path: str) -> tuple[int, int]:
+    """Return (height, width) without decoding pixel data."""
+    np, Image = _imaging()
+    if path.endswith(".npy"):
+        array = np.load(path, mmap_mode="r")
+        return array.shape[0], array.shape[1]
+    with Image.open(path) as img:
+        return img.height, img.width
+
+
+def needs_tiling(path: str) -> bool:
+    height, width = image_shape(path)
+    return height * width > settings.TILING_THRESHOLD_PIXELS
+
+
+def tile_starts(length: int, tile_size: int, overlap: int) -> list:
+    """Start offsets along one axis so tiles cover [0, length) with the given overlap."""
+    if length <= tile_size:
+        return [0]
+    stride = tile_size - overlap
+    starts = list(range(0, length - tile_size + 1, stride))
+    if starts[-1] + tile_size < length:
+        starts.append(length - tile_size)
+    return starts
+
+
+def tile_grid(height: int, width: int) -> list:
+    """List of (y, x, h, w) tiles covering an image."""
+    size, overlap = settings.TILE_SIZE, settings.TILE_OVERLAP
+    return [
+        (y, x, min(size, height), min(size, width))
+        for y in tile_starts(height, size, overlap)
+        for x in tile_starts(width, size, overlap)
+    ]
+
+
+def load_as_memmap(path: str, work_dir: str):
+    """
+    Open an input as a read-only memmap.
+
+    .npy inputs are mapped directly; other formats are decoded once into an
+    on-disk .npy so that every later tile read is a cheap memmap slice. The
+    copy (and any mode conversion) goes one band of rows at a time, so no
+    full-size array exists besides Pillow's decoded image.
+
+    Pillow decodes PNG, JPEG and compressed TIFF only as a whole, so that one
+    image does have to fit in memory. Inputs whose decoded size exceeds
+    TILING_MAX_DECODE_MB are refused before anything is decoded.
+    """
+    np, Image = _imaging()
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+
+    memmap_path = os.path.join(work_dir, "input.npy")
+    with Image.open(path) as img:
+        decoded_mb = img.width * img.height * len(img.getbands()) / (1024 * 1024)
+        if decoded_mb > settings.TILING_MAX_DECODE_MB:
+            raise ValueError(
+                f"Decoding this {img.width}x{img.height} {img.format} image needs about {decoded_mb:.0f} MB, "
+                f"more than the {settings.TILING_MAX_DECODE_MB} MB allowed"
+            )
+        mode = "L" if img.mode == "L" else "RGB"
+        shape = (img.height, img.width) if mode == "L" else (img.height, img.width, 3)
+        array = np.lib.format.open_memmap(memmap_path, mode="w+", dtype=np.uint8, shape=shape)
+        band = settings.TILE_SIZE
+        for y in range(0, img.height, band):
+            rows = img.crop((0, y, img.width, min(y + band, img.height)))
+            array[y:y + band] = np.asarray(rows.convert(mode))
+        array.flush()
+        del array
+    return np.load(memmap_path, mmap_mode="r")
+
+
+def write_png(path: str, height: int, width: int, channels: int, bands):
+    """
+    Write an 8-bit grayscale or RGB PNG from an iterable of row bands.
+
+    Pillow only encodes whole in-memory images; this streams the bands through
+    zlib, so a gigapixel output never has to fit in memory.
+    """
+    np, _ = _imaging()
+
+    def write_chunk(f, kind: bytes, data: bytes):
+        f.write(struct.pack(">I", len(data)))
+        f.write(kind)
+        f.write(data)
+        f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    color_type = 0 if channels == 1 else 2
+    compressor = zlib.compressobj()
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        write_chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        for rows in bands:
+            rows = rows.reshape(rows.shape[0], width * channels)
+            # Each scanline starts with its filter type (0: none)
+            scanlines = np.hstack([np.zeros((rows.shape[0], 1), dtype=np.uint8), rows])
+            data = compressor.compress(scanlines.tobytes())
+            if data:
+                write_chunk(f, b"IDAT", data)
+        write_chunk(f, b"IDAT", compressor.flush())
+        write_chunk(f, b"IEND", b"")
+
+
+def discard_tiles(job_id: str):
+    """Delete a tiled job's intermediate tile objects."""
+    for object_path in storage.list_objects(f"{tiles_prefix(job_id)}/"):
+        storage.delete_object(object_path)
+
+
+def blend_weights(h: int, w: int):
+    """Per-pixel weights that ramp up linearly over the overlap at each tile edge."""
+    np, _ = _imaging()
+    ramp = settings.TILE_OVERLAP + 1
+
+    def axis(n):
+        i = np.arange(n, dtype=np.float32)
+        return np.minimum(1.0, np.minimum(i + 1, n - i) / ramp)
+
+    return np.outer(axis(h), axis(w))
+
+
+def start_tiled_inference(spec: dict, input_path: str, work_dir: str):
+    """Split a job's input into tiles, upload them and fan out tile tasks."""
+    np, Image = _imaging()
+    job_id = spec["job_id"]
+    image = load_as_memmap(input_path, work_dir)
+    height, width = image.shape[0], image.shape[1]
+    tiles = tile_grid(height, width)
+
+    logger.info(f"Tiling job {job_id}: {width}x{height} into {len(tiles)} tiles")
+
+    tile_dir = os.path.join(work_dir, "tiles")
+    os.makedirs(tile_dir)
+    for idx, (y, x, h, w) in enumerate(tiles):
+        tile_path = os.path.join(tile_dir, f"{idx}.png")
+        Image.fromarray(np.ascontiguousarray(image[y:y + h, x:x + w])).save(tile_path)
+        storage.upload_file(tile_path, f"{tiles_prefix(job_id)}/in/{idx}.png")
+        os.unlink(tile_path)
+
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    with open(manifest_path, "w") as f:
+        json.dump({"height": height, "width": width, "tiles": tiles}, f)
+    storage.upload_file(manifest_path, f"{tiles_prefix(job_id)}/manifest.json")
+
+    # Commit before fan-out so tile tasks see the counters. The job now
+    # belongs to its tiles rather than this worker process.
+    with session_scope() as db:
+        db.query(Job).filter(Job.id == UUID(job_id)).update(
+            {"tile_count": len(tiles), "tiles_completed": 0, "worker_id": None},
+            synchronize_session=False
+        )
+
+    queue = routing.route_inference(spec["version_id"])
+    chord(
+        run_tile_task.s(job_id, idx, spec).set(queue=queue) for idx in range(len(tiles))
+    )(stitch_tiles_task.s(job_id).set(queue=routing.SHARED_QUEUE))
+
+
+def fail_job(job_id: str, message: str):
+    with session_scope() as db:
+        db.query(Job).filter(Job.id == UUID(job_id), Job.status != JobStatus.FAILED).update(
+            {"status": JobStatus.FAILED, "error_message": message},
+            synchronize_session=False
+        )
+
+
+# Not ignore_result: the stitch chord waits on every tile's result
+@celery_app.task(name="app.tasks.tiling.run_tile_task", bind=True, ignore_result=False)
+def run_tile_task(self, job_id: str, tile_index: int, spec: dict = None):
+    """Run the model on a single tile of a tiled job, described by the parent's spec."""
+    reserved = False
+
+    try:
+        with session_scope() as db:
+            job_status = db.query(Job.status).filter(Job.id == UUID(job_id)).scalar()
+            if job_status != JobStatus.RUNNING:
+                # Another tile already failed the job
+                raise RuntimeError(f"Job {job_id} is no longer running")
+            if spec is None:
+                # Tiles fanned out before the spec was part of the payload
+                spec = load_specs(db, [job_id])[0]
+
+        cpu_limit, memory_limit_mb = spec["cpu_limit"], spec["memory_limit_mb"]
+        if not resources.try_reserve(self.request.id, cpu_limit, memory_limit_mb):
+            raise self.retry(
+                countdown=settings.RESOURCE_ADMISSION_RETRY_SECONDS,
+                max_retries=None,
+                queue=routing.SHARED_QUEUE
+            )
+        reserved = True
+
+        work_dir, host_work_dir = make_work_dir(f'tile_{job_id}_{tile_index}_')
+        try:
+            input_dir = os.path.join(work_dir, "in")
+            output_dir = os.path.join(work_dir, "out")
+            os.makedirs(input_dir)
+            os.makedirs(output_dir)
+
+            storage.download_file(f"{tiles_prefix(job_id)}/in/{tile_index}.png", os.path.join(input_dir, "input.png"))
+
+            import docker
+            docker_client = docker.from_env()
+            pull_image(docker_client, spec["docker_image"])
+            run_container(
+                docker_client,
+                spec["docker_image"],
+                {
+                    os.path.join(host_work_dir, "in"): {'bind': '/workspace/in', 'mode': 'ro'},
+                    os.path.join(host_work_dir, "out"): {'bind': '/workspace/out', 'mode': 'rw'}
+                },
+                cpu_limit,
+                memory_limit_mb
+            )
+            routing.mark_warm(spec["version_id"])
+
+            # Tiled models produce one image per tile; the first output is stitched
+            output_files = sorted(os.listdir(output_dir))
+            if not output_files:
+                raise RuntimeError("No output files generated")
+            storage.upload_file(
+                os.path.join(output_dir, output_files[0]),
+                f"{tiles_prefix(job_id)}/out/{tile_index}.png"
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        with session_scope() as db:
+            job_status = db.execute(
+                update(Job)
+                .where(Job.id == UUID(job_id))
+                .values(tiles_completed=Job.tiles_completed + 1)
+                .returning(Job.status)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+        if job_status != JobStatus.RUNNING:
+            # Another tile failed the job while this one ran; nothing will stitch
+            discard_tiles(job_id)
+
+    except Retry:
+        raise
+
+    except Exception as e:
+        logger.error(f"Tile {tile_index} of job {job_id} failed: {str(e)}")
+        fail_job(job_id, f"Tile {tile_index} failed: {str(e)}")
+        try:
+            discard_tiles(job_id)
+        except Exception as cleanup_error:
+            logger.warning(f"Could not delete tiles of job {job_id}: {cleanup_error}")
+        raise
+
+    finally:
+        if reserved:
+            resources.release(self.request.id)
+
+
+@celery_app.task(name="app.tasks.tiling.stitch_tiles_task", bind=True)
+def stitch_tiles_task(self, tile_results, job_id: str):
+    """Blend tile outputs back into a full-size output image."""
+    np, Image = _imaging()
+    work_dir, _ = make_work_dir(f'stitch_{job_id}_')
+    try:
+        manifest_path = os.path.join(work_dir, "manifest.json")
+        storage.download_file(f"{tiles_prefix(job_id)}/manifest.json", manifest_path)
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        height, width = manifest["height"], manifest["width"]
+
+        accumulator = None
+        weight_sum = np.lib.format.open_memmap(
+            os.path.join(work_dir, "weights.npy"), mode="w+", dtype=np.float32, shape=(height, width)
+        )
+        mode = None
+
+        for idx, (y, x, h, w) in enumerate(manifest["tiles"]):
+            tile_path = os.path.join(work_dir, f"{idx}.png")
+            storage.download_file(f"{tiles_prefix(job_id)}/out/{idx}.png", tile_path)
+            with Image.open(tile_path) as tile_img:
+                if mode is None:
+                    mode = "L" if tile_img.mode in ("L", "1", "I", "F") else "RGB"
+                    shape = (height, width) if mode == "L" else (height, width, 3)
+                    accumulator = np.lib.format.open_memmap(
+                        os.path.join(work_dir, "accumulator.npy"), mode="w+", dtype=np.float32, shape=shape
+                    )
+                if tile_img.size != (w, h):
+                    raise RuntimeError(f"Tile {idx} output is {tile_img.size}, expected {(w, h)}")
+                tile = np.asarray(tile_img.convert(mode), dtype=np.float32)
+            os.unlink(tile_path)
+
+            weights = blend_weights(h, w)
+            if mode == "RGB":
+                accumulator[y:y + h, x:x + w] += tile * weights[..., None]
+            else:
+                accumulator[y:y + h, x:x + w] += tile * weights
+            weight_sum[y:y + h, x:x + w] += weights
+
+        # Normalize and encode in row bands to keep memory bounded
+        def bands():
+            band = settings.TILE_SIZE
+            for y in range(0, height, band):
+                weights = weight_sum[y:y + band]
+                if mode == "RGB":
+                    weights = weights[..., None]
+                yield np.clip(accumulator[y:y + band] / weights, 0, 255).astype(np.uint8)
+
+        output_path = os.path.join(work_dir, "output.png")
+        write_png(output_path, height, width, 1 if mode == "L" else 3, bands())
+        object_name = f"job_outputs/{job_id}/output.png"
+        storage.upload_file(output_path, object_name)
+
+        set_job_status(job_id, JobStatus.SUCCEEDED, output_paths=json.dumps([object_name]))
+
+        # Tiles are intermediate data
+        discard_tiles(job_id)
+
+        logger.info(f"Stitched {len(manifest['tiles'])} tiles for job {job_id}")
+
+    except Exception as e:
+        logger.error(f"Stitching failed for job {job_id}: {str(e)}")
+        fail_job(job_id, f"Stitching failed: {str(e)}")
+        try:
+            discard_tiles(job_id)
+        except Exception as cleanup_error:
+            logger.warning(f"Could not delete tiles of job {job_id}: {cleanup_error}")
+        raise
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
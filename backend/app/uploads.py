@@ -0,0 +1,220 @@
+"""
+Resumable chunked uploads backed by MinIO multipart uploads.
+
+A client opens an UploadSession for a file of known size, then PUTs fixed-size
+parts in any order and in parallel. Each accepted part is recorded in
+upload_parts, so after a failure the client asks which parts the server has
+and sends only the rest. Completion assembles the parts in MinIO and checks the
+result against the declared size and, if one was given, the SHA-256 of the
+whole file. The session then stays ASSEMBLED until its target has taken the
+file (a NIfTI volume, for instance, is converted first), so a handoff that
+fails can be retried without uploading again. Parts never pass through the API in one piece larger than the
+chunk size, so memory use per request is bounded by UPLOAD_CHUNK_SIZE_MB.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
+from app.models import UploadSession, UploadPart, UploadSessionStatus
+from app.storage import storage
+from app.blobs import hash_object
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# S3 limits: every part but the last must be at least 5 MB; at most 10000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+
+# Sessions that still hold a multipart upload or an assembled object
+OPEN_STATUSES = (UploadSessionStatus.ACTIVE, UploadSessionStatus.ASSEMBLED)
+
+
+class UploadError(Exception):
+    """A request that does not fit the session; the message is safe to show the client."""
+
+
+def chunk_size_for(size: int) -> int:
+    """Part size for a file: the configured chunk size, grown if needed to stay within MAX_PARTS."""
+    chunk_size = max(settings.UPLOAD_CHUNK_SIZE_MB * 1024 * 1024, MIN_PART_SIZE)
+    while -(-size // chunk_size) > MAX_PARTS:
+        chunk_size *= 2
+    return chunk_size
+
+
+def expected_part_size(session: UploadSession, part_number: int) -> int:
+    """Parts are fixed-size, so every part's length is known up front."""
+    if part_number < session.part_count:
+        return session.chunk_size
+    return session.size - session.chunk_size * (session.part_count - 1)
+
+
+def find_resumable(db, kind: str, target_id, filename: str, size: int, sha256) -> UploadSession:
+    """An open session for the same file and target, so a restarted client can resume it."""
+    return db.query(UploadSession).filter(
+        UploadSession.kind == kind,
+        UploadSession.target_id == target_id,
+        UploadSession.status.in_(OPEN_STATUSES),
+        UploadSession.filename == filename,
+        UploadSession.size == size,
+        UploadSession.sha256 == sha256,
+    ).first()
+
+
+def open_session(db, kind: str, target_id, user_id, filename: str, object_name: str, size: int, sha256) -> UploadSession:
+    """Start a multipart upload for a target, aborting any other open session for it."""
+    for stale in db.query(UploadSession).filter(
+        UploadSession.kind == kind,
+        UploadSession.target_id == target_id,
+        UploadSession.status.in_(OPEN_STATUSES),
+    ):
+        abort(db, stale, commit=False)
+
+    session = UploadSession(
+        kind=kind,
+        target_id=target_id,
+        user_id=user_id,
+        filename=filename,
+        object_name=object_name,
+        multipart_upload_id=storage.create_multipart_upload(object_name),
+        size=size,
+        chunk_size=chunk_size_for(size),
+        sha256=sha256,
+    )
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    return session
+
+
+def uploaded_parts(db, session: UploadSession) -> list:
+    return [
+        number for (number,) in db.query(UploadPart.part_number)
+        .filter(UploadPart.session_id == session.id)
+        .order_by(UploadPart.part_number)
+    ]
+
+
+def put_part(db, session: UploadSession, part_number: int, data: bytes, sha256=None) -> UploadPart:
+    """
+    Store one part in MinIO and record it.
+
+    Re-sending a part replaces it, so a client that is unsure whether a part
+    arrived can simply send it again.
+    """
+    if not 1 <= part_number <= session.part_count:
+        raise UploadError(f"Part number must be between 1 and {session.part_count}")
+    expected = expected_part_size(session, part_number)
+    if len(data) != expected:
+        raise UploadError(f"Part {part_number} must be {expected} bytes, got {len(data)}")
+
+    digest = hashlib.sha256(data).hexdigest()
+    if sha256 and sha256.lower() != digest:
+        raise UploadError(f"Checksum mismatch for part {part_number}")
+
+    etag = storage.upload_part(session.object_name, session.multipart_upload_id, part_number, data)
+
+    values = {"etag": etag, "size": len(data), "sha256": digest, "uploaded_at": datetime.utcnow()}
+    db.execute(
+        insert(UploadPart)
+        .values(session_id=session.id, part_number=part_number, **values)
+        .on_conflict_do_update(index_elements=[UploadPart.session_id, UploadPart.part_number], set_=values)
+    )
+    # Keeps a session that is still receiving parts from being expired
+    db.execute(update(UploadSession).where(UploadSession.id == session.id).values(updated_at=values["uploaded_at"]))
+    db.commit()
+    return UploadPart(session_id=session.id, part_number=part_number, **values)
+
+
+def complete(db, session: UploadSession):
+    """
+    Assemble the parts and verify the result, leaving the session ASSEMBLED.
+
+    A missing part leaves the session open for the client to fill in; a size
+    or checksum mismatch of the assembled object discards it. An already
+    assembled session is left as it is, so completing again retries only the
+    handoff to the target.
+    """
+    # Row lock so two concurrent completions cannot both assemble the upload
+    db.refresh(session, with_for_update=True)
+    if session.status == UploadSessionStatus.ASSEMBLED:
+        db.commit()
+        return
+    if session.status != UploadSessionStatus.ACTIVE:
+        raise UploadError(f"Upload is {session.status.value.lower()}")
+
+    parts = (
+        db.query(UploadPart)
+        .filter(UploadPart.session_id == session.id)
+        .order_by(UploadPart.part_number)
+        .all()
+    )
+    received = {part.part_number for part in parts}
+    missing = [n for n in range(1, session.part_count + 1) if n not in received]
+    if missing:
+        raise UploadError(f"Missing parts: {missing[:20]}{'...' if len(missing) > 20 else ''}")
+
+    storage.complete_multipart_upload(
+        session.object_name, session.multipart_upload_id,
+        [(part.part_number, part.etag) for part in parts]
+    )
+
+    stat = storage.stat_object(session.object_name)
+    problem = None
+    if stat is None or stat.size != session.size:
+        problem = f"Assembled upload is {stat.size if stat else 0} bytes, expected {session.size}"
+    elif session.sha256:
+        digest, _ = hash_object(session.object_name)
+        if digest != session.sha256.lower():
+            problem = "Checksum mismatch for the assembled upload"
+
+    if problem:
+        storage.delete_object(session.object_name)
+        session.status = UploadSessionStatus.ABORTED
+        db.commit()
+        raise UploadError(problem)
+
+    # Parts stay recorded until the handoff, so a resuming client sees nothing left to send
+    session.status = UploadSessionStatus.ASSEMBLED
+    db.commit()
+
+
+def finish(db, session: UploadSession):
+    """Mark an assembled upload as taken by its target."""
+    session.status = UploadSessionStatus.COMPLETED
+    db.query(UploadPart).filter(UploadPart.session_id == session.id).delete()
+    db.commit()
+
+
+def abort(db, session: UploadSession, commit: bool = True):
+    """Discard an unfinished upload, its parts and any assembled object."""
+    try:
+        if session.status == UploadSessionStatus.ASSEMBLED:
+            storage.delete_object(session.object_name)
+        else:
+            storage.abort_multipart_upload(session.object_name, session.multipart_upload_id)
+    except Exception as e:
+        # MinIO also expires abandoned multipart uploads on its own
+        logger.warning(f"Could not abort upload {session.id}: {e}")
+    session.status = UploadSessionStatus.ABORTED
+    db.query(UploadPart).filter(UploadPart.session_id == session.id).delete()
+    if commit:
+        db.commit()
+
+
+def expire_stale(db, limit: int = 20) -> int:
+    """Abort sessions nobody has touched for UPLOAD_SESSION_TTL_HOURS."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    stale = (
+        db.query(UploadSession)
+        .filter(UploadSession.status.in_(OPEN_STATUSES), UploadSession.updated_at < cutoff)
+        .limit(limit)
+        .all()
+    )
+    for session in stale:
+        abort(db, session, commit=False)
+    if stale:
+        db.commit()
+        logger.info(f"Expired {len(stale)} stale upload sessions")
+    return len(stale)
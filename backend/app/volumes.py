@@ -0,0 +1,174 @@
+"""
+Ingest of volumetric inputs (NIfTI volumes, DICOM series).
+
+Volumes are converted slab by slab into uncompressed .npy chunks plus a
+volume.json manifest. Chunks can be memory-mapped by workers and model code
+with np.load(..., mmap_mode='r'), so a 500-slice CT never has to be
+decompressed into RAM in one piece.
+"""
+import os
+import json
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+VOLUME_FORMAT = "clinmesh-volume-v1"
+MANIFEST_NAME = "volume.json"
+
+NIFTI_EXTENSIONS = (".nii", ".nii.gz")
+
+
+def is_volume_input(input_path: str) -> bool:
+    """Whether a job's input_path points at a volume manifest."""
+    return bool(input_path) and input_path.endswith(f"/{MANIFEST_NAME}")
+
+
+def _write_chunks(out_dir: str, num_slices: int, read_slab) -> list:
+    """Write slabs of VOLUME_CHUNK_SLICES slices as .npy files; return the chunk names."""
+    import numpy as np
+
+    chunks = []
+    step = settings.VOLUME_CHUNK_SLICES
+    for index, start in enumerate(range(0, num_slices, step)):
+        name = f"chunk_{index:04d}.npy"
+        np.save(os.path.join(out_dir, name), np.ascontiguousarray(read_slab(start, min(start + step, num_slices))))
+        chunks.append(name)
+    return chunks
+
+
+def _chunk_dtype(out_dir: str, chunks: list) -> str:
+    """The dtype the chunks were actually written with."""
+    import numpy as np
+
+    return str(np.load(os.path.join(out_dir, chunks[0]), mmap_mode="r").dtype)
+
+
+def convert_nifti(path: str, out_dir: str) -> dict:
+    """
+    Convert a NIfTI volume, reading it through nibabel's lazy array proxy.
+
+    The proxy applies scl_slope/scl_inter, so a scaled volume is stored as
+    floats rather than in its on-disk dtype.
+    """
+    import numpy as np
+    import nibabel as nib
+
+    img = nib.load(path)
+    shape = img.shape
+    if len(shape) < 3:
+        raise ValueError(f"Expected a 3D or 4D NIfTI volume, got shape {shape}")
+
+    # Chunk along z; each slab is (slices, x, y[, t])
+    def read_slab(start, end):
+        return np.moveaxis(np.asarray(img.dataobj[:, :, start:end, ...]), 2, 0)
+
+    chunks = _write_chunks(out_dir, shape[2], read_slab)
+    zooms = img.header.get_zooms()
+
+    return {
+        "source": "nifti",
+        "axes": ["z", "x", "y", "t"][:len(shape)],
+        "shape": [shape[2], shape[0], shape[1], *shape[3:]],
+        "dtype": _chunk_dtype(out_dir, chunks),
+        "spacing": [float(zooms[2]), float(zooms[0]), float(zooms[1])],
+        "chunks": chunks,
+    }
+
+
+def convert_dicom_series(paths: list, out_dir: str) -> dict:
+    """Convert a DICOM series (one file per slice), ordered by slice position."""
+    import numpy as np
+    import pydicom
+
+    headers = []
+    for path in paths:
+        ds = pydicom.dcmread(path, stop_before_pixels=True)
+        if "ImagePositionPatient" in ds:
+            position = float(ds.ImagePositionPatient[2])
+        else:
+            position = float(getattr(ds, "InstanceNumber", 0))
+        headers.append((position, path, ds))
+    headers.sort(key=lambda item: item[0])
+
+    first = headers[0][2]
+    rows, cols = int(first.Rows), int(first.Columns)
+
+    def read_slab(start, end):
+        slab = []
+        for _, path, _ in headers[start:end]:
+            pixels = pydicom.dcmread(path).pixel_array
+            if pixels.shape != (rows, cols):
+                raise ValueError(f"Slice {os.path.basename(path)} is {pixels.shape}, expected {(rows, cols)}")
+            slab.append(pixels)
+        return np.stack(slab)
+
+    chunks = _write_chunks(out_dir, len(headers), read_slab)
+
+    pixel_spacing = [float(v) for v in getattr(first, "PixelSpacing", [1.0, 1.0])]
+    if len(headers) > 1:
+        slice_spacing = abs(headers[1][0] - headers[0][0]) or float(getattr(first, "SliceThickness", 1.0))
+    else:
+        slice_spacing = float(getattr(first, "SliceThickness", 1.0))
+
+    return {
+        "source": "dicom",
+        "axes": ["z", "y", "x"],
+        "shape": [len(headers), rows, cols],
+        "dtype": _chunk_dtype(out_dir, chunks),
+        "spacing": [slice_spacing, *pixel_spacing],
+        # Stored values are raw; apply these to get e.g. Hounsfield units
+        "rescale_slope": float(getattr(first, "RescaleSlope", 1.0)),
+        "rescale_intercept": float(getattr(first, "RescaleIntercept", 0.0)),
+        "chunks": chunks,
+    }
+
+
+def convert_volume(paths: list, out_dir: str) -> dict:
+    """
+    Convert uploaded files into chunked .npy format and write the manifest.
+
+    A single .nii/.nii.gz file is treated as a NIfTI volume; anything else is
+    treated as the slices of one DICOM series.
+    """
+    if len(paths) == 1 and paths[0].lower().endswith(NIFTI_EXTENSIONS):
+        manifest = convert_nifti(paths[0], out_dir)
+    elif any(path.lower().endswith(NIFTI_EXTENSIONS) for path in paths):
+        raise ValueError("Upload a single NIfTI file or a DICOM series, not both")
+    else:
+        manifest = convert_dicom_series(paths, out_dir)
+
+    manifest["format"] = VOLUME_FORMAT
+    manifest["chunk_slices"] = settings.VOLUME_CHUNK_SLICES
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f)
+
+    logger.info(f"Converted {manifest['source']} volume {manifest['shape']} into {len(manifest['chunks'])} chunks")
+    return manifest
+
+
+def store_volume(raw_paths: list, manifest_object: str) -> dict:
+    """
+    Convert uploaded volume files and store the chunks next to manifest_object.
+
+    The manifest is uploaded last, so its presence means the volume is complete.
+    Unreadable input raises ValueError; storage errors propagate unchanged.
+    """
+    import tempfile
+    from app.storage import storage
+
+    with tempfile.TemporaryDirectory() as volume_dir:
+        try:
+            manifest = convert_volume(raw_paths, volume_dir)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(str(e)) from e
+
+        volume_prefix = manifest_object.rsplit("/", 1)[0]
+        for chunk in manifest["chunks"]:
+            storage.upload_file(os.path.join(volume_dir, chunk), f"{volume_prefix}/{chunk}")
+        storage.upload_file(os.path.join(volume_dir, MANIFEST_NAME), manifest_object)
+
+    return manifest
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark and regression check per process role.
+
+Starts each role's entry point in fresh interpreters under `python -X
+importtime` and reports the median total import time and the packages that
+cost the most. Roles:
+
+    api               import app.main
+    build-worker      what `celery worker` imports with WORKER_ROLE=build
+    inference-worker  what `celery worker` imports with WORKER_ROLE=inference
+
+Exits non-zero if a role's median exceeds its budget, or if a role imports a
+module it must not need (e.g. docker in the API, fastapi in a worker). The
+forbidden-module check is deterministic; the time budget catches everything
+else, with headroom for machine noise.
+
+Usage:
+    python benchmark_imports.py [--runs 5] [--role api] [--budget-scale 1.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+WORKER_ENTRY = (
+    "import importlib\n"
+    "from app.tasks.celery_app import celery_app\n"
+    "for name in celery_app.conf.include:\n"
+    "    importlib.import_module(name)\n"
+)
+
+# role -> (entry code, extra env, budget in ms, modules that must not be imported)
+ROLES = {
+    "api": (
+        "import app.main",
+        {},
+        2000,
+        ["docker", "numpy", "PIL", "nibabel", "pydicom", "app.tasks.build", "app.tasks.inference", "app.tasks.tiling"],
+    ),
+    "build-worker": (
+        WORKER_ENTRY,
+        {"WORKER_ROLE": "build"},
+        1200,
+        ["fastapi", "app.routes", "app.tasks.inference", "app.tasks.tiling", "docker", "numpy", "PIL"],
+    ),
+    "inference-worker": (
+        WORKER_ENTRY,
+        {"WORKER_ROLE": "inference"},
+        1200,
+        ["fastapi", "app.routes", "app.tasks.build", "docker", "numpy", "PIL", "nibabel", "pydicom"],
+    ),
+}
+
+
+def parse_importtime(stderr: str) -> list:
+    """Parse -X importtime output into (self_us, cumulative_us, depth, module) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def measure(code: str, env: dict) -> list:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        tail = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(tail[-1] if tail else "import failed")
+    return parse_importtime(result.stderr)
+
+
+def top_packages(rows: list, count: int) -> list:
+    """Self time summed by top-level package, largest first."""
+    totals = defaultdict(int)
+    for self_us, _, _, module in rows:
+        totals[module.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--role", choices=sorted(ROLES), action="append", help="Role(s) to check (default: all)")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="Multiply every time budget, e.g. for slow CI machines")
+    parser.add_argument("--top", type=int, default=8, help="Number of most expensive packages to list")
+    args = parser.parse_args()
+
+    # Importing must not touch MinIO; a closed port makes any attempt obvious
+    base_env = dict(os.environ, MINIO_ENDPOINT="127.0.0.1:9", PYTHONDONTWRITEBYTECODE="1")
+    failures = []
+
+    for role in args.role or list(ROLES):
+        code, extra_env, budget_ms, forbidden = ROLES[role]
+        budget_ms *= args.budget_scale
+        env = dict(base_env, **extra_env)
+
+        totals = []
+        imported = set()
+        for _ in range(args.runs):
+            rows = measure(code, env)
+            totals.append(sum(cumulative for _, cumulative, depth, _ in rows if depth == 0) / 1000)
+            imported.update(module for _, _, _, module in rows)
+        median_ms = statistics.median(totals)
+
+        print(f"{role}: median {median_ms:.0f} ms (budget {budget_ms:.0f} ms), {len(imported)} modules")
+        for package, self_us in top_packages(rows, args.top):
+            print(f"    {package:<28}{self_us / 1000:>8.1f} ms")
+
+        unexpected = sorted(
+            name for name in forbidden
+            if any(module == name or module.startswith(name + ".") for module in imported)
+        )
+        if unexpected:
+            failures.append(f"{role} imports {', '.join(unexpected)}")
+        if median_ms > budget_ms:
+            failures.append(f"{role} took {median_ms:.0f} ms, budget is {budget_ms:.0f} ms")
+        print()
+
+    if failures:
+        print("FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
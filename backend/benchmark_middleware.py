@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the HTTP middleware stack.
+
+Drives a small ASGI app in-process (no server, no sockets) and reports
+requests/sec for /health, GET /api/jobs/{id} and a streamed download, once
+with the middleware wrapped in Starlette's BaseHTTPMiddleware ("before") and
+once with the pure ASGI middleware from app.middleware ("after"). Both
+variants run the same rate limit check and add the same headers, so the
+difference is the wrapping overhead.
+
+Usage:
+    python benchmark_middleware.py [--requests 5000] [--redis]
+
+Without --redis rate limiting is disabled and only the middleware plumbing is
+measured; with it, every request also runs the Redis token bucket.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from app.config import settings
+from app.middleware import RateLimitMiddleware, SecurityHeadersMiddleware
+
+DOWNLOAD_CHUNKS = 64
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """The rate limiter as it was mounted before: through BaseHTTPMiddleware."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.limiter = RateLimitMiddleware(app)
+
+    async def dispatch(self, request, call_next):
+        rejection, rate_headers = await self.limiter.check(request.scope)
+        if rejection is not None:
+            return rejection
+        response = await call_next(request)
+        for name, value in rate_headers:
+            response.headers[name] = value
+        return response
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.headers = SecurityHeadersMiddleware(app).headers
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        for name, value in self.headers:
+            response.headers[name] = value
+        return response
+
+
+def build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    if legacy:
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware)
+    else:
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RateLimitMiddleware)
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    @app.get("/api/jobs/{job_id}")
+    async def get_job(job_id: uuid.UUID):
+        return {"id": str(job_id), "status": "SUCCEEDED", "output_paths": None}
+
+    @app.get("/api/jobs/{job_id}/download/{output_index}")
+    async def download(job_id: uuid.UUID, output_index: int):
+        chunk = b"\0" * DOWNLOAD_CHUNK_SIZE
+
+        async def body():
+            for _ in range(DOWNLOAD_CHUNKS):
+                yield chunk
+
+        return StreamingResponse(body(), media_type="application/octet-stream")
+
+    return app
+
+
+async def request(app, path: str) -> int:
+    """Send one GET through the ASGI app; returns the number of body bytes received."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"benchmark")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    done = asyncio.Event()
+    received = 0
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like a real server: the client only disconnects after the response
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"{path} returned {message['status']}")
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return received
+
+
+async def measure(app, path: str, count: int) -> float:
+    # Warm up routing and the rate limiter's local buckets
+    for _ in range(min(100, count)):
+        await request(app, path)
+    start = time.perf_counter()
+    for _ in range(count):
+        await request(app, path)
+    return count / (time.perf_counter() - start)
+
+
+async def run(count: int):
+    job_id = uuid.uuid4()
+    endpoints = [
+        ("/health", "/health", count),
+        ("GET /api/jobs/{id}", f"/api/jobs/{job_id}", count),
+        ("streaming download (4 MB)", f"/api/jobs/{job_id}/download/0", max(1, count // 10)),
+    ]
+    apps = {"before": build_app(legacy=True), "after": build_app(legacy=False)}
+
+    print(f"{'endpoint':<28}{'before (req/s)':>16}{'after (req/s)':>16}{'change':>10}")
+    for label, path, n in endpoints:
+        rates = {name: await measure(app, path, n) for name, app in apps.items()}
+        change = (rates["after"] / rates["before"] - 1) * 100
+        print(f"{label:<28}{rates['before']:>16.0f}{rates['after']:>16.0f}{change:>+9.0f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTTP middleware stack")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per endpoint")
+    parser.add_argument("--redis", action="store_true", help="Run the Redis rate limiter on every request")
+    args = parser.parse_args()
+
+    # Middleware reads this when the app stack is built
+    settings.RATE_LIMIT_ENABLED = args.redis
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
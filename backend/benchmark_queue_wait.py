@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Queue-wait benchmark for the Celery execution profile.
+
+Starts a few real Celery workers and feeds them a Poisson stream of sleep
+tasks with skewed durations: most are short, a few are long, like a mix of
+small images and large or slow models. It then reports how long tasks waited
+between being published and starting. It runs once with Celery's defaults
+("before": prefetch 4 per process, ack on receipt) and once with
+app.tasks.celery_app.execution_profile() ("after").
+
+With the defaults, a worker busy with long tasks has already reserved more,
+so short tasks wait behind it while processes on other workers sit idle. That
+shows up in the p95/p99 waits.
+
+Needs a Redis broker (CELERY_BROKER_URL by default); each run uses its own
+queue on it. Durations are scaled down (seconds instead of minutes) so a
+run takes about two minutes per profile. They are not scaled further because
+with a prefetch of one, a process only asks Redis for its next task after
+finishing the last, which can take up to a second: noise next to a container
+run, but not next to a 0.1 s sleep.
+
+Usage:
+    python benchmark_queue_wait.py [--broker redis://localhost:6379/0]
+                                   [--jobs 200] [--workers 3] [--concurrency 2]
+                                   [--load 0.8] [--long-fraction 0.1]
+                                   [--short 0.5] [--long 15] [--profile after]
+"""
+import argparse
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from celery import Celery
+from celery.signals import worker_ready
+
+PROFILES = ["before", "after"]
+
+
+def make_app(profile: str, broker: str, queue: str) -> Celery:
+    app = Celery("queue_wait_benchmark", broker=broker)
+    app.conf.update(
+        task_serializer="json",
+        accept_content=["json"],
+        task_default_queue=queue,
+        task_ignore_result=True,
+        worker_hijack_root_logger=False,
+        broker_connection_retry_on_startup=True,
+    )
+    if profile == "after":
+        from app.tasks.celery_app import execution_profile, check_storage_bucket
+        # The benchmark workers have no MinIO to check
+        worker_ready.disconnect(check_storage_bucket)
+        app.conf.update(**execution_profile())
+    return app
+
+
+# Workers import this module with -A; the driver sets these for them
+BENCH_DIR = os.environ.get("QUEUE_WAIT_BENCH_DIR") or tempfile.gettempdir()
+app = make_app(
+    os.environ.get("QUEUE_WAIT_PROFILE", "before"),
+    os.environ.get("QUEUE_WAIT_BROKER", "memory://"),
+    os.environ.get("QUEUE_WAIT_QUEUE", "queue_wait_benchmark"),
+)
+
+
+@app.task(name="benchmark.run")
+def run(published_at: float, duration: float):
+    started_at = time.time()
+    time.sleep(duration)
+    with open(os.path.join(BENCH_DIR, "waits.log"), "a") as f:
+        f.write(f"{started_at - published_at:.4f} {duration}\n")
+
+
+@worker_ready.connect
+def mark_ready(**kwargs):
+    open(os.path.join(BENCH_DIR, f"ready.{os.getpid()}"), "w").close()
+
+
+def start_workers(env: dict, args) -> list:
+    workers = [
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "celery", "-A", "benchmark_queue_wait", "worker",
+                "--queues", env["QUEUE_WAIT_QUEUE"], "--concurrency", str(args.concurrency),
+                "--hostname", f"bench{idx}@%h",
+                "--without-gossip", "--without-mingle", "--without-heartbeat", "--loglevel", "warning",
+            ],
+            env=env,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for idx in range(args.workers)
+    ]
+    bench_dir = env["QUEUE_WAIT_BENCH_DIR"]
+    deadline = time.time() + 60
+    while sum(name.startswith("ready.") for name in os.listdir(bench_dir)) < len(workers):
+        if time.time() > deadline or any(worker.poll() is not None for worker in workers):
+            stop_workers(workers)
+            raise RuntimeError("Workers did not start")
+        time.sleep(0.1)
+    return workers
+
+
+def stop_workers(workers: list):
+    for worker in workers:
+        worker.send_signal(signal.SIGTERM)
+    for worker in workers:
+        try:
+            worker.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_profile(profile: str, durations: list, args) -> list:
+    """Publish the workload against fresh workers; return (wait, duration) per task."""
+    bench_dir = tempfile.mkdtemp(prefix=f"queue_wait_{profile}_")
+    queue = f"queue_wait_benchmark_{uuid.uuid4().hex[:8]}"
+    env = dict(
+        os.environ,
+        QUEUE_WAIT_BENCH_DIR=bench_dir,
+        QUEUE_WAIT_PROFILE=profile,
+        QUEUE_WAIT_BROKER=args.broker,
+        QUEUE_WAIT_QUEUE=queue,
+    )
+    try:
+        workers = start_workers(env, args)
+        try:
+            producer = make_app(profile, args.broker, queue)
+            slots = args.workers * args.concurrency
+            rate = args.load * slots / statistics.mean(durations)
+            arrivals = random.Random(args.seed + 1)
+            log_path = os.path.join(bench_dir, "waits.log")
+
+            with producer.connection_for_write() as connection:
+                for duration in durations:
+                    producer.send_task("benchmark.run", args=[time.time(), duration], connection=connection)
+                    time.sleep(arrivals.expovariate(rate))
+
+            deadline = time.time() + sum(durations) + 60
+            lines = []
+            while time.time() < deadline:
+                if os.path.exists(log_path):
+                    with open(log_path) as f:
+                        lines = f.read().splitlines()
+                    if len(lines) >= len(durations):
+                        break
+                time.sleep(0.2)
+            else:
+                raise RuntimeError(f"Timed out: {len(lines)} of {len(durations)} tasks finished")
+        finally:
+            stop_workers(workers)
+        return [tuple(map(float, line.split())) for line in lines]
+    finally:
+        shutil.rmtree(bench_dir, ignore_errors=True)
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--broker", default=settings.CELERY_BROKER_URL)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=3, help="Worker processes (hosts)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Pool processes per worker")
+    parser.add_argument("--load", type=float, default=0.8, help="Offered load as a fraction of total capacity")
+    parser.add_argument("--long-fraction", type=float, default=0.1)
+    parser.add_argument("--short", type=float, default=0.5, help="Short task duration in seconds")
+    parser.add_argument("--long", type=float, default=15.0, help="Long task duration in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--profile", choices=PROFILES, action="append", help="Profile(s) to run (default: both)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    durations = [args.long if rng.random() < args.long_fraction else args.short for _ in range(args.jobs)]
+    print(
+        f"{args.jobs} tasks ({sum(d == args.long for d in durations)} long), "
+        f"{args.workers} workers x {args.concurrency} processes, load {args.load:.0%}\n"
+    )
+    print(f"{'profile':<8}{'tasks':<7}{'p50 (s)':>9}{'p90 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}{'max (s)':>9}")
+
+    for profile in args.profile or PROFILES:
+        results = run_profile(profile, durations, args)
+        for label, waits in (
+            ("all", [wait for wait, _ in results]),
+            ("short", [wait for wait, duration in results if duration == args.short]),
+        ):
+            if not waits:
+                continue
+            print(
+                f"{profile:<8}{label:<7}"
+                + "".join(f"{percentile(waits, pct):>9.2f}" for pct in (50, 90, 95, 99))
+                + f"{max(waits):>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the storage layer.
+
+Imports app.storage, app.main and the task modules in fresh interpreters and
+reports the median wall time of each import, then the time of the one-time
+bucket check (StorageClient.ensure_bucket) that now runs in the API and
+worker startup hooks instead. Importing must not touch MinIO, so by default
+MINIO_ENDPOINT points at a closed local port: any import that still connects
+shows up as seconds of retries.
+
+Usage:
+    python benchmark_startup.py [--runs 5] [--endpoint 127.0.0.1:9]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ["app.storage", "app.main", "app.tasks.inference", "app.tasks.build"]
+
+TIMED_IMPORT = """
+import time
+start = time.perf_counter()
+try:
+    import {module}
+    status = "ok"
+except Exception as e:
+    status = type(e).__name__
+print(time.perf_counter() - start, status)
+"""
+
+TIMED_BUCKET_CHECK = """
+import time
+from app.storage import storage
+start = time.perf_counter()
+storage.ensure_bucket()
+print(time.perf_counter() - start)
+"""
+
+
+def run(code: str, env: dict) -> tuple[float, str]:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    elapsed, _, status = result.stdout.strip().splitlines()[-1].partition(" ")
+    return float(elapsed), status or "ok"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--endpoint", default="127.0.0.1:9", help="MinIO endpoint to use (default: a closed port)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, MINIO_ENDPOINT=args.endpoint, PYTHONDONTWRITEBYTECODE="1")
+
+    print(f"MinIO endpoint: {args.endpoint}, {args.runs} runs each\n")
+    print(f"{'import':<24}{'median (ms)':>14}{'max (ms)':>12}  result")
+    for module in MODULES:
+        results = [run(TIMED_IMPORT.format(module=module), env) for _ in range(args.runs)]
+        times = [elapsed * 1000 for elapsed, _ in results]
+        failures = sorted({status for _, status in results if status != "ok"})
+        print(f"{module:<24}{statistics.median(times):>14.1f}{max(times):>12.1f}  {', '.join(failures) or 'ok'}")
+
+    try:
+        results = [run(TIMED_BUCKET_CHECK, env) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"\n{'startup bucket check':<24}{'n/a':>14}  ({e})")
+        return
+    times = [elapsed * 1000 for elapsed, _ in results]
+    print(f"\n{'startup bucket check':<24}{statistics.median(times):>14.1f}{max(times):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
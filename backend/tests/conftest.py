@@ -0,0 +1,56 @@
+"""
+Test configuration.
+
+Tests run against SQLite and in-memory Celery/Redis stand-ins; settings are
+read from the environment when app.config is first imported, so they are set
+here before anything from the app is.
+"""
+import os
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="cv_platform_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["CELERY_BROKER_URL"] = "memory://"
+os.environ["CELERY_RESULT_BACKEND"] = "cache+memory://"
+
+import fakeredis
+import pytest
+from sqlalchemy import ARRAY, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+# Postgres column types, rendered so the schema can be created on SQLite
+@compiles(ARRAY, "sqlite")
+def _compile_array(element, compiler, **kw):
+    return "JSON"
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid(element, compiler, **kw):
+    return "CHAR(32)"
+
+
+from app.db import Base, engine
+
+
+@event.listens_for(engine, "connect")
+def _sqlite_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("greatest", -1, max)
+
+from app import models  # noqa: F401  (registers the tables)
+from app.tasks import resources
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(engine)
+    yield
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture(autouse=True)
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(resources, "_redis_client", client)
+    return client
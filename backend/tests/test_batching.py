@@ -0,0 +1,53 @@
+"""Parked batch entries are claimed atomically and never lost with a worker."""
+import json
+import uuid
+
+from app.tasks import inference
+
+
+def test_claim_moves_entries_to_inflight(redis_client, monkeypatch):
+    monkeypatch.setattr(inference.settings, "INFERENCE_BATCH_MAX_SIZE", 2)
+    version_id = str(uuid.uuid4())
+    redis_client.rpush(inference.pending_batch_key(version_id), "a", "b", "c")
+
+    assert inference.claim_batch(redis_client, version_id, "task-1") == ["a", "b"]
+    assert redis_client.lrange(inference.pending_batch_key(version_id), 0, -1) == ["c"]
+    assert redis_client.lrange(inference.inflight_batch_key(version_id, "task-1"), 0, -1) == ["a", "b"]
+
+
+def test_redelivered_flush_reclaims_its_inflight_entries(redis_client):
+    version_id = str(uuid.uuid4())
+    # A worker claimed a and b, then died before writing results
+    redis_client.rpush(inference.inflight_batch_key(version_id, "task-1"), "a", "b")
+    redis_client.rpush(inference.pending_batch_key(version_id), "c")
+
+    assert inference.claim_batch(redis_client, version_id, "task-1") == ["a", "b", "c"]
+
+
+def test_failed_flush_parks_unsettled_entries_again(redis_client, monkeypatch):
+    version_id = str(uuid.uuid4())
+    entry = json.dumps({"job_id": str(uuid.uuid4()), "version_id": version_id})
+    redis_client.rpush(inference.pending_batch_key(version_id), entry)
+    scheduled = []
+    monkeypatch.setattr(inference.run_inference_batch_task, "apply_async", lambda **kwargs: scheduled.append(kwargs))
+
+    def database_down():
+        raise ConnectionError("database unavailable")
+
+    # The spec has no image, and the write that would mark the job FAILED fails too
+    monkeypatch.setattr(inference, "session_scope", database_down)
+    result = inference.run_inference_batch_task.apply(args=[version_id])
+
+    assert result.failed()
+    assert redis_client.lrange(inference.pending_batch_key(version_id), 0, -1) == [entry]
+    assert scheduled and scheduled[0]["args"] == [version_id]
+
+
+def test_only_single_image_jobs_without_tiling_are_batchable(monkeypatch):
+    monkeypatch.setattr(inference.settings, "INFERENCE_BATCHING_ENABLED", True)
+    spec = {"input_path": "inputs/a.png", "tiling_enabled": False, "cacheable": False}
+
+    assert inference.is_batchable(spec)
+    assert inference.is_batchable({**spec, "cacheable": True})
+    assert not inference.is_batchable({**spec, "input_path": '["inputs/a.png", "inputs/b.png"]'})
+    assert not inference.is_batchable({**spec, "tiling_enabled": True})
@@ -0,0 +1,42 @@
+"""Every uploader of a blob makes sure its bytes are stored."""
+import uuid
+
+import pytest
+
+from app import blobs
+from app.db import SessionLocal
+from app.models import JobInput
+from app.storage import storage
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    objects = set()
+    monkeypatch.setattr(storage, "object_exists", lambda object_name: object_name in objects)
+    # The reference row itself is a Postgres upsert; someone else created it
+    monkeypatch.setattr(blobs, "_acquire", lambda db, sha256, size: 2)
+    return objects
+
+
+def test_dedup_upload_stores_bytes_the_first_uploader_never_wrote(stored):
+    db = SessionLocal()
+    try:
+        blobs._attach(db, uuid.uuid4(), "inputs/a.png", "ab" * 32, 3, stored.add)
+    finally:
+        db.close()
+
+    assert stored == {blobs.blob_object_name("ab" * 32)}
+
+
+def test_dedup_upload_skips_existing_bytes(stored):
+    stored.add(blobs.blob_object_name("ab" * 32))
+
+    def store(object_name):
+        raise AssertionError("stored twice")
+
+    db = SessionLocal()
+    try:
+        blobs._attach(db, uuid.uuid4(), "inputs/a.png", "ab" * 32, 3, store)
+        assert db.query(JobInput).count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+"""Benchmark inputs follow the package's declared input type; only benchmarked images are pushed."""
+import json
+import os
+import uuid
+import zipfile
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from app.db import session_scope
+from app.models import ModelVersion, ModelVersionStatus
+from app.storage import storage
+from app.tasks import build
+from app.tasks.build import write_benchmark_inputs
+from app.tasks.resources import read_package_profile
+
+
+def test_image_inputs_are_pngs(tmp_path):
+    write_benchmark_inputs(str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == ["gray_gradient.png", "rgb_noise.png", "rgb_small.png"]
+
+
+def test_volume_input_is_a_readable_volume(tmp_path):
+    write_benchmark_inputs(str(tmp_path), "volume")
+
+    (volume,) = os.listdir(tmp_path)
+    with open(tmp_path / volume / "volume.json") as f:
+        manifest = json.load(f)
+    slabs = [np.load(tmp_path / volume / chunk, mmap_mode="r") for chunk in manifest["chunks"]]
+    assert sum(slab.shape[0] for slab in slabs) == manifest["shape"][0]
+    assert slabs[0].dtype == np.dtype(manifest["dtype"])
+
+
+def test_no_inputs_when_the_benchmark_is_skipped(tmp_path):
+    write_benchmark_inputs(str(tmp_path), "none")
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_benchmark_input_is_validated(tmp_path):
+    (tmp_path / "resources.json").write_text(json.dumps({"benchmark_input": "video"}))
+
+    with pytest.raises(ValueError, match="benchmark_input must be one of"):
+        read_package_profile(str(tmp_path))
+
+
+@pytest.mark.parametrize("peak_memory_mb, pushed", [(100, True), (100_000, False)])
+def test_image_is_pushed_only_after_the_benchmark_passes(monkeypatch, peak_memory_mb, pushed):
+    import docker
+
+    def download_package(object_name, path):
+        with zipfile.ZipFile(path, "w") as package:
+            package.writestr("predict.py", "def run(input_path, output_dir):\n    return {}\n")
+            package.writestr("requirements.txt", "")
+
+    metrics = {
+        "import_time_ms": 1, "first_inference_ms": 1, "p50_ms": 1, "p95_ms": 1,
+        "peak_memory_mb": peak_memory_mb, "samples": 3,
+    }
+    client = mock.Mock()
+    client.images.build.return_value = (mock.Mock(id="sha256:abc"), [])
+    client.images.push.return_value = []
+    container = client.containers.run.return_value
+    container.wait.return_value = {"StatusCode": 0}
+    container.logs.return_value = json.dumps(metrics).encode()
+    monkeypatch.setattr(docker, "from_env", lambda: client)
+    monkeypatch.setattr(storage, "download_file", download_package)
+    monkeypatch.setattr(build.settings, "BENCHMARK_ENABLED", True)
+
+    version_id = uuid.uuid4()
+    with session_scope() as db:
+        db.add(ModelVersion(id=version_id, model_id=uuid.uuid4(), version_number="1", package_path="packages/v.zip"))
+
+    result = build.build_model_task.apply(args=[str(version_id)])
+
+    assert result.failed() != pushed
+    assert client.images.push.called == pushed
+    with session_scope() as db:
+        status = db.query(ModelVersion.status).filter(ModelVersion.id == version_id).scalar()
+    assert status == (ModelVersionStatus.READY if pushed else ModelVersionStatus.FAILED)
@@ -0,0 +1,14 @@
+"""Conditional requests for the model catalog and demo images."""
+import pytest
+
+from app.routes.models import _etag_matches
+
+
+@pytest.mark.parametrize("header", ['"abc"', '"x", "abc"', 'W/"abc"', "*", ' "x" ,W/"abc" '])
+def test_matching_if_none_match(header):
+    assert _etag_matches(header, '"abc"')
+
+
+@pytest.mark.parametrize("header", [None, "", '"abcd"', '"x", "y"', 'abc'])
+def test_non_matching_if_none_match(header):
+    assert not _etag_matches(header, '"abc"')
@@ -0,0 +1,31 @@
+"""Variants are rendered without decoding oversized sources at full size."""
+import io
+
+import pytest
+from PIL import Image
+
+from app import derivatives
+
+
+def encoded(fmt: str, size: int) -> io.BytesIO:
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), (200, 100, 50)).save(buffer, format=fmt)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture(autouse=True)
+def pixel_cap(monkeypatch):
+    monkeypatch.setattr(derivatives.settings, "DERIVATIVE_MAX_PIXELS", 1_000_000)
+
+
+def test_jpeg_is_draft_decoded_under_the_cap():
+    data = derivatives.render(encoded("JPEG", 2048), "thumb", "jpeg")
+
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (256, 256)
+
+
+def test_source_over_the_cap_is_refused():
+    with pytest.raises(derivatives.SourceTooLarge):
+        derivatives.render(encoded("PNG", 2048), "thumb", "webp")
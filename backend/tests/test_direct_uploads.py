@@ -0,0 +1,43 @@
+"""Objects uploaded straight to MinIO get the same checks as proxied uploads."""
+import pytest
+from fastapi import HTTPException
+
+from app.middleware import validate_stored_upload
+from app.storage import storage
+
+
+@pytest.fixture
+def objects(monkeypatch):
+    stored = {}
+    monkeypatch.setattr(storage, "read_head", lambda object_name, length: stored[object_name][:length])
+    monkeypatch.setattr(storage, "delete_object", lambda object_name: stored.pop(object_name))
+    return stored
+
+
+def test_accepts_a_png(objects):
+    objects["uploads/a"] = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+    validate_stored_upload("uploads/a", 108, "image")
+
+    assert "uploads/a" in objects
+
+
+def test_rejects_and_deletes_the_wrong_type(objects):
+    objects["uploads/a"] = b"PK\x03\x04" + b"\x00" * 100
+
+    with pytest.raises(HTTPException) as error:
+        validate_stored_upload("uploads/a", 104, "image")
+
+    assert error.value.status_code == 400
+    assert objects == {}
+
+
+def test_rejects_and_deletes_oversized_objects(objects, monkeypatch):
+    monkeypatch.setattr("app.middleware.settings.MAX_UPLOAD_SIZE_MB", 1)
+    objects["model_packages/v.zip"] = b"PK\x03\x04"
+
+    with pytest.raises(HTTPException) as error:
+        validate_stored_upload("model_packages/v.zip", 2 * 1024 * 1024, "zip")
+
+    assert error.value.status_code == 413
+    assert objects == {}
@@ -0,0 +1,58 @@
+"""A RUNNING job is only taken over once its owner is proven dead."""
+import uuid
+
+from app.db import session_scope
+from app.models import Job, JobStatus
+from app.tasks import resources
+from app.tasks.celery_app import execution_profile, task_time_limits
+from app.tasks.inference import start_jobs
+
+
+def make_job(status, worker_id=None) -> str:
+    job_id = uuid.uuid4()
+    with session_scope() as db:
+        db.add(Job(id=job_id, version_id=uuid.uuid4(), status=status, worker_id=worker_id))
+    return str(job_id)
+
+
+def owner(job_id: str) -> str:
+    with session_scope() as db:
+        return db.query(Job.worker_id).filter(Job.id == uuid.UUID(job_id)).scalar()
+
+
+def test_queued_job_is_started_by_this_process():
+    job_id = make_job(JobStatus.QUEUED)
+
+    assert start_jobs([job_id]) == ({job_id}, set())
+    assert owner(job_id) == resources.process_id()
+
+
+def test_job_of_live_owner_is_held(redis_client):
+    job_id = make_job(JobStatus.RUNNING, worker_id="other-host:123")
+    redis_client.set(resources.process_heartbeat_key("other-host:123"), 1)
+
+    assert start_jobs([job_id]) == (set(), {job_id})
+    assert owner(job_id) == "other-host:123"
+
+
+def test_job_of_dead_owner_is_taken_over():
+    job_id = make_job(JobStatus.RUNNING, worker_id="other-host:123")
+
+    assert start_jobs([job_id]) == ({job_id}, set())
+    assert owner(job_id) == resources.process_id()
+
+
+def test_unowned_and_finished_jobs_are_left_alone():
+    # A tiled job belongs to its tile tasks
+    tiled = make_job(JobStatus.RUNNING)
+    finished = make_job(JobStatus.SUCCEEDED, worker_id="other-host:123")
+
+    assert start_jobs([tiled, finished]) == (set(), set())
+
+
+def test_visibility_timeout_outlasts_every_task():
+    profile = execution_profile()
+    visibility = profile["broker_transport_options"]["visibility_timeout"]
+
+    for name in task_time_limits():
+        assert profile["task_annotations"][name]["time_limit"] < visibility
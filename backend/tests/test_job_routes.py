@@ -0,0 +1,107 @@
+"""Job routes leave no job QUEUED without a published task."""
+import asyncio
+import io
+import uuid
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.db import SessionLocal
+from app.models import Job, JobInput, JobStatus, ModelVersion, ModelVersionStatus
+from app.routes import jobs as job_routes
+from app.tasks import inference
+
+
+def broker_down(spec):
+    raise ConnectionError("broker unavailable")
+
+
+def test_failed_publish_puts_jobs_back_to_uploading(monkeypatch):
+    monkeypatch.setattr(inference, "load_specs", lambda db, job_ids: [{"job_id": str(job_id)} for job_id in job_ids])
+    monkeypatch.setattr(inference, "enqueue_inference", broker_down)
+    db = SessionLocal()
+    try:
+        job = Job(id=uuid.uuid4(), version_id=uuid.uuid4(), status=JobStatus.QUEUED)
+        db.add(job)
+        db.commit()
+
+        with pytest.raises(HTTPException) as error:
+            job_routes._enqueue(db, [job.id])
+
+        assert error.value.status_code == 503
+        db.expire_all()
+        assert db.get(Job, job.id).status == JobStatus.UPLOADING
+    finally:
+        db.close()
+
+
+def test_upload_that_cannot_queue_its_job_returns_503(monkeypatch):
+    monkeypatch.setattr(inference, "load_specs", lambda db, job_ids: [{"job_id": str(job_id)} for job_id in job_ids])
+    monkeypatch.setattr(inference, "enqueue_inference", broker_down)
+
+    def attach_upload(db, job_id, input_path, tmp_path, sha256, size):
+        db.add(JobInput(job_id=job_id, input_path=input_path, blob_sha256=sha256))
+        db.commit()
+
+    monkeypatch.setattr(job_routes, "attach_upload", attach_upload)
+    db = SessionLocal()
+    try:
+        job = Job(id=uuid.uuid4(), version_id=uuid.uuid4(), status=JobStatus.UPLOADING,
+                  input_path="inputs/a.png", auto_run=True)
+        db.add(job)
+        db.commit()
+        upload = UploadFile(io.BytesIO(b"\x89PNG\r\n\x1a\n"), filename="a.png")
+
+        with pytest.raises(HTTPException) as error:
+            asyncio.run(job_routes.upload_job_input(job.id, file=upload, db=db))
+
+        assert error.value.status_code == 503
+        db.expire_all()
+        assert db.get(Job, job.id).status == JobStatus.UPLOADING
+    finally:
+        db.close()
+
+
+def ready_version(db) -> ModelVersion:
+    version = ModelVersion(id=uuid.uuid4(), model_id=uuid.uuid4(), version_number="1", status=ModelVersionStatus.READY)
+    db.add(version)
+    db.commit()
+    return version
+
+
+def submit(db, version, *files):
+    uploads = [UploadFile(io.BytesIO(data), filename=filename) for filename, data in files]
+    return asyncio.run(job_routes.submit_jobs(
+        version_id=version.id, files=uploads, mode="multiple", name=None, current_user=None, db=db
+    ))
+
+
+def test_submit_rejects_files_that_are_not_images(monkeypatch):
+    monkeypatch.setattr(job_routes, "attach_upload", lambda *args: None)
+    db = SessionLocal()
+    try:
+        version = ready_version(db)
+
+        with pytest.raises(HTTPException) as error:
+            submit(db, version, ("a.png", b"\x89PNG\r\n\x1a\n"), ("b.png", b"#!/bin/sh\n"))
+
+        assert error.value.status_code == 400
+        assert "Expected a PNG, JPEG or TIFF image" in error.value.detail
+        assert db.query(Job).count() == 0
+    finally:
+        db.close()
+
+
+def test_submit_points_volumes_to_the_volume_upload():
+    db = SessionLocal()
+    try:
+        version = ready_version(db)
+
+        with pytest.raises(HTTPException) as error:
+            submit(db, version, ("scan.nii.gz", b"\x1f\x8b"))
+
+        assert error.value.status_code == 400
+        assert "upload-volume" in error.value.detail
+        assert db.query(Job).count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,40 @@
+"""Benchmark-derived memory reservations."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.tasks import resources
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    monkeypatch.setattr(resources.settings, "RESOURCE_MEMORY_HEADROOM", 1.5)
+    monkeypatch.setattr(resources.settings, "RESOURCE_MIN_MEMORY_MB", 256)
+    monkeypatch.setattr(resources.settings, "CONTAINER_MEMORY_LIMIT", "1g")
+    monkeypatch.setattr(resources.settings, "MAX_INFERENCE_MEMORY_GB", 4)
+
+
+def test_small_models_reserve_their_own_need():
+    assert resources.memory_from_benchmark(200) == 300
+    assert resources.memory_from_benchmark(1000) == 1500
+
+
+def test_minimum_is_the_floor():
+    assert resources.memory_from_benchmark(10) == 256
+
+
+def test_measured_need_above_the_floor_is_kept():
+    assert resources.memory_from_benchmark(2000) == 3000
+
+
+def test_need_above_the_cap_fails_instead_of_clamping():
+    with pytest.raises(ValueError, match="more than the 4096 MB inference limit"):
+        resources.memory_from_benchmark(3000)
+
+
+def test_fallback_never_exceeds_the_cap(monkeypatch):
+    monkeypatch.setattr(resources.settings, "CONTAINER_MEMORY_LIMIT", "8g")
+    monkeypatch.setattr(resources.settings, "CONTAINER_CPU_LIMIT", "2")
+    version = SimpleNamespace(cpu_limit=None, memory_limit_mb=None)
+
+    assert resources.get_resource_profile(version) == (2.0, 4096)
@@ -0,0 +1,84 @@
+"""Affinity routing counts queued work and recovers the queues of dead workers."""
+import pytest
+
+from app.tasks import routing
+from app.tasks.resources import ledger_key
+
+
+@pytest.fixture(autouse=True)
+def affinity(monkeypatch, redis_client):
+    monkeypatch.setattr(routing.settings, "INFERENCE_AFFINITY_ENABLED", True)
+    monkeypatch.setattr(routing, "get_broker_redis", lambda: redis_client)
+
+
+def warm_worker(redis_client, name, slots, running=0, waiting=0):
+    redis_client.zadd(routing.warm_key("v1"), {name: 9e9})
+    redis_client.set(routing.heartbeat_key(name), slots)
+    for i in range(running):
+        redis_client.hset(ledger_key(name), f"task-{i}", "1:512:9e9")
+    for i in range(waiting):
+        redis_client.lpush(routing.worker_queue(name), f"message-{i}")
+
+
+def test_queued_tasks_count_against_a_worker(redis_client):
+    warm_worker(redis_client, "a", slots=4, running=1, waiting=2)
+    warm_worker(redis_client, "b", slots=4, running=2)
+
+    assert routing.route_inference("v1") == routing.worker_queue("b")
+
+
+def test_spills_to_shared_queue_when_backlogged(redis_client):
+    warm_worker(redis_client, "a", slots=2, waiting=2)
+
+    assert routing.route_inference("v1") == routing.SHARED_QUEUE
+
+
+def test_reclaims_queues_of_dead_workers_in_order(redis_client):
+    redis_client.sadd(routing.WORKERS_KEY, "alive", "dead")
+    redis_client.set(routing.heartbeat_key("alive"), 2)
+    redis_client.lpush(routing.worker_queue("alive"), "kept")
+    redis_client.lpush(routing.worker_queue("dead"), "oldest", "newest")
+    redis_client.lpush(routing.SHARED_QUEUE, "shared")
+
+    assert routing.reclaim_dead_queues() == 2
+    # Consumers pop from the right: the dead worker's oldest task goes first
+    assert redis_client.lrange(routing.SHARED_QUEUE, 0, -1) == ["shared", "newest", "oldest"]
+    assert redis_client.lrange(routing.worker_queue("alive"), 0, -1) == ["kept"]
+
+
+def test_keeps_reclaiming_until_the_visibility_timeout_passes(redis_client, monkeypatch):
+    monkeypatch.setattr("app.tasks.celery_app.visibility_timeout", lambda: 100)
+    clock = [1000.0]
+    monkeypatch.setattr(routing.time, "time", lambda: clock[0])
+    redis_client.sadd(routing.WORKERS_KEY, "dead")
+    redis_client.lpush(routing.worker_queue("dead"), "queued")
+    assert routing.reclaim_dead_queues() == 1
+
+    # Redis redelivers the task the dead worker had taken, much later
+    clock[0] += 90
+    assert routing.reclaim_dead_queues() == 0
+    clock[0] += 90
+    redis_client.lpush(routing.worker_queue("dead"), "unacked")
+    assert routing.reclaim_dead_queues() == 1
+    assert redis_client.lrange(routing.SHARED_QUEUE, 0, -1) == ["queued", "unacked"]
+
+    # Forgotten once the queue has stayed empty for a whole visibility timeout
+    clock[0] += 90
+    routing.reclaim_dead_queues()
+    assert redis_client.smembers(routing.WORKERS_KEY) == {"dead"}
+    clock[0] += 20
+    routing.reclaim_dead_queues()
+    assert redis_client.smembers(routing.WORKERS_KEY) == set()
+    assert redis_client.hgetall(routing.DEAD_WORKERS_KEY) == {}
+
+
+def test_bulk_routing_spreads_over_warm_workers(redis_client):
+    warm_worker(redis_client, "a", slots=2)
+    warm_worker(redis_client, "b", slots=1)
+
+    assert routing.route_many(["v1"] * 4) == [
+        routing.worker_queue("a"),
+        routing.worker_queue("a"),
+        routing.worker_queue("b"),
+        routing.SHARED_QUEUE,
+    ]
@@ -0,0 +1,45 @@
+"""Presigned URLs are signed for the endpoint browsers reach."""
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from minio.credentials import Credentials
+from minio.signer import presign_v4
+
+from app.config import settings
+from app.storage import StorageClient
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    monkeypatch.setattr("app.storage.settings.MINIO_ENDPOINT", "minio:9000")
+    monkeypatch.setattr("app.storage.settings.MINIO_EXTERNAL_ENDPOINT", "files.example.com")
+    monkeypatch.setattr("app.storage.settings.MINIO_SECURE", False)
+    monkeypatch.setattr("app.storage.settings.MINIO_EXTERNAL_SECURE", True)
+    monkeypatch.setattr("app.storage.settings.MINIO_REGION", "us-east-1")
+
+
+@pytest.mark.parametrize("method", ["PUT", "GET"])
+def test_presigned_urls_are_signed_for_the_external_host(endpoints, method):
+    storage = StorageClient()
+    if method == "PUT":
+        url = storage.get_presigned_upload_url("uploads/a.png", expires=600)
+    else:
+        url = storage.get_presigned_download_url("uploads/a.png", expires=600)
+
+    parts = urlsplit(url)
+    assert (parts.scheme, parts.netloc) == ("https", "files.example.com")
+    # No request went to either endpoint, so the internal client was never built
+    assert storage._client is None
+
+    query = parse_qs(parts.query)
+    signed_at = datetime.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ")
+    expected = presign_v4(
+        method,
+        urlsplit(f"https://files.example.com/{storage.bucket}/uploads/a.png"),
+        "us-east-1",
+        Credentials(settings.MINIO_ACCESS_KEY, settings.MINIO_SECRET_KEY),
+        signed_at,
+        600,
+    )
+    assert query["X-Amz-Signature"] == parse_qs(expected.query)["X-Amz-Signature"]
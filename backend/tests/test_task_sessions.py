@@ -0,0 +1,167 @@
+"""
+Inference tasks must not hold a DB connection while a container runs.
+
+The Docker client is replaced by a fake whose container records
+connections_in_use() when the task waits on it, and writes the outputs a
+model would.
+"""
+import json
+import os
+import uuid
+from unittest import mock
+
+import pytest
+
+from app.db import session_scope, connections_in_use
+from app.models import Job, JobStatus
+from app.storage import storage
+from app.tasks import inference, resources, routing, tiling
+
+
+class FakeContainer:
+    def __init__(self, client, volumes, entrypoint):
+        self.client = client
+        self.volumes = volumes
+        self.entrypoint = entrypoint
+
+    def wait(self, timeout=None):
+        self.client.connections_seen.append(connections_in_use())
+        self.client.timeouts.append(timeout)
+        out_dir = next(path for path, bind in self.volumes.items() if bind["bind"] == "/workspace/out")
+        if self.entrypoint:
+            # Batch runner: one output directory per job plus the status file
+            in_dir = next(path for path, bind in self.volumes.items() if bind["bind"] == "/workspace/in")
+            statuses = {}
+            for job_id in os.listdir(in_dir):
+                os.makedirs(os.path.join(out_dir, job_id))
+                open(os.path.join(out_dir, job_id, "output.png"), "wb").close()
+                statuses[job_id] = {"status": "success"}
+            with open(os.path.join(out_dir, "_batch_status.json"), "w") as f:
+                json.dump(statuses, f)
+        else:
+            open(os.path.join(out_dir, "output.png"), "wb").close()
+        return {"StatusCode": 0}
+
+    def logs(self, **kwargs):
+        return b""
+
+    def kill(self):
+        pass
+
+    def remove(self):
+        pass
+
+
+class FakeDockerClient:
+    def __init__(self):
+        self.connections_seen = []
+        self.timeouts = []
+        self.images = mock.Mock()
+        self.containers = mock.Mock()
+        self.containers.run.side_effect = self.run
+
+    def run(self, image, volumes=None, entrypoint=None, **kwargs):
+        return FakeContainer(self, volumes, entrypoint)
+
+
+@pytest.fixture
+def docker_client(monkeypatch, tmp_path):
+    import docker
+    client = FakeDockerClient()
+    monkeypatch.setattr(docker, "from_env", lambda: client)
+
+    def make_work_dir(prefix):
+        path = str(tmp_path / f"{prefix}{uuid.uuid4().hex[:8]}")
+        os.makedirs(path)
+        return path, path
+
+    monkeypatch.setattr(inference, "make_work_dir", make_work_dir)
+    monkeypatch.setattr(tiling, "make_work_dir", make_work_dir)
+    monkeypatch.setattr(storage, "download_file", lambda object_name, path: open(path, "wb").close())
+    monkeypatch.setattr(storage, "upload_file", lambda path, object_name: None)
+    monkeypatch.setattr(resources, "fits_host", lambda cpu, memory: True)
+    monkeypatch.setattr(resources, "try_reserve", lambda task_id, cpu, memory, seconds=None: True)
+    monkeypatch.setattr(resources, "release", lambda task_id: None)
+    monkeypatch.setattr(routing, "mark_warm", lambda version_id: None)
+    return client
+
+
+def make_job(status=JobStatus.QUEUED) -> dict:
+    job_id, version_id = uuid.uuid4(), uuid.uuid4()
+    with session_scope() as db:
+        db.add(Job(id=job_id, version_id=version_id, user_id=uuid.uuid4(), status=status, input_path="inputs/a.png"))
+    return {
+        "job_id": str(job_id),
+        "version_id": str(version_id),
+        "docker_image": "model:latest",
+        "docker_image_digest": "sha256:abc",
+        "input_path": "inputs/a.png",
+        "input_objects": {},
+        "cpu_limit": 1.0,
+        "memory_limit_mb": 512,
+        "cacheable": False,
+        "tiling_enabled": False,
+    }
+
+
+def job_status(job_id: str) -> JobStatus:
+    with session_scope() as db:
+        return db.query(Job.status).filter(Job.id == uuid.UUID(job_id)).scalar()
+
+
+def test_single_task_holds_no_connection_while_container_runs(docker_client):
+    spec = make_job()
+
+    inference.run_inference_task.apply(args=[spec["job_id"], spec]).get()
+
+    assert docker_client.connections_seen == [0]
+    assert job_status(spec["job_id"]) == JobStatus.SUCCEEDED
+
+
+def test_batch_task_holds_no_connection_while_container_runs(docker_client, redis_client):
+    specs = [make_job() for _ in range(3)]
+    version_id = specs[0]["version_id"]
+    for spec in specs:
+        spec["version_id"] = version_id
+        redis_client.rpush(inference.pending_batch_key(version_id), json.dumps(spec))
+
+    inference.run_inference_batch_task.apply(args=[version_id]).get()
+
+    assert docker_client.connections_seen == [0]
+    assert [job_status(spec["job_id"]) for spec in specs] == [JobStatus.SUCCEEDED] * 3
+    assert redis_client.keys("pending_batch:*") == []
+    assert docker_client.timeouts == [inference.settings.CONTAINER_TIMEOUT * 3]
+
+
+def test_tile_task_holds_no_connection_while_container_runs(docker_client):
+    spec = make_job(status=JobStatus.RUNNING)
+    with session_scope() as db:
+        db.query(Job).update({"tile_count": 1, "tiles_completed": 0})
+
+    tiling.run_tile_task.apply(args=[spec["job_id"], 0, spec]).get()
+
+    assert docker_client.connections_seen == [0]
+    with session_scope() as db:
+        assert db.query(Job.tiles_completed).scalar() == 1
+
+
+def test_batch_serves_cached_jobs_and_caches_the_rest(docker_client, redis_client, monkeypatch):
+    specs = [make_job() for _ in range(3)]
+    version_id = specs[0]["version_id"]
+    for spec in specs:
+        spec.update(version_id=version_id, cacheable=True)
+        redis_client.rpush(inference.pending_batch_key(version_id), json.dumps(spec))
+    cached_id = specs[0]["job_id"]
+    stored = {}
+    # Each job's input hashes to its own id; only the first one is cached
+    monkeypatch.setattr(inference.result_cache, "hash_inputs", os.path.basename)
+    monkeypatch.setattr(inference.result_cache, "lookup", lambda digest, input_hash: ["cached.png"] if input_hash == cached_id else None)
+    monkeypatch.setattr(inference.result_cache, "store", lambda digest, input_hash, output_paths: stored.update({input_hash: output_paths}))
+
+    inference.run_inference_batch_task.apply(args=[version_id]).get()
+
+    assert docker_client.timeouts == [inference.settings.CONTAINER_TIMEOUT * 2]
+    assert [job_status(spec["job_id"]) for spec in specs] == [JobStatus.SUCCEEDED] * 3
+    with session_scope() as db:
+        assert db.query(Job.output_paths).filter(Job.id == uuid.UUID(cached_id)).scalar() == '["cached.png"]'
+    assert sorted(stored) == sorted(spec["job_id"] for spec in specs[1:])
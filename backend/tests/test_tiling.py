@@ -0,0 +1,70 @@
+"""Tiling reads and writes gigapixel images a band of rows at a time."""
+import uuid
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.db import session_scope
+from app.models import Job, JobStatus
+from app.storage import storage
+from app.tasks import tiling
+
+
+@pytest.fixture
+def small_bands(monkeypatch):
+    monkeypatch.setattr(tiling.settings, "TILE_SIZE", 7)
+
+
+@pytest.mark.parametrize("shape", [(20, 13), (20, 13, 3)])
+def test_write_png_round_trips(tmp_path, shape):
+    array = np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+    path = str(tmp_path / "out.png")
+
+    tiling.write_png(path, shape[0], shape[1], 1 if len(shape) == 2 else 3, (array[y:y + 7] for y in range(0, 20, 7)))
+
+    with Image.open(path) as img:
+        np.testing.assert_array_equal(np.asarray(img), array)
+
+
+def test_load_as_memmap_converts_in_bands(tmp_path, small_bands):
+    img = Image.fromarray(np.arange(20 * 13, dtype=np.uint8).reshape(20, 13)).convert("P")
+    path = str(tmp_path / "in.png")
+    img.save(path)
+
+    array = tiling.load_as_memmap(path, str(tmp_path))
+
+    np.testing.assert_array_equal(array, np.asarray(img.convert("RGB")))
+
+
+def test_failed_tile_discards_the_jobs_tiles(monkeypatch, tmp_path):
+    job_id = uuid.uuid4()
+    with session_scope() as db:
+        db.add(Job(id=job_id, version_id=uuid.uuid4(), status=JobStatus.RUNNING, tile_count=2, tiles_completed=0))
+    objects = {f"{tiling.tiles_prefix(job_id)}/in/0.png", f"{tiling.tiles_prefix(job_id)}/in/1.png"}
+    monkeypatch.setattr(storage, "list_objects", lambda prefix: [name for name in objects if name.startswith(prefix)])
+    monkeypatch.setattr(storage, "delete_object", objects.discard)
+    monkeypatch.setattr(tiling.resources, "try_reserve", lambda *args: True)
+    monkeypatch.setattr(tiling.resources, "release", lambda task_id: None)
+    monkeypatch.setattr(tiling, "make_work_dir", lambda prefix: (str(tmp_path), str(tmp_path)))
+
+    def download_fails(object_name, path):
+        raise ConnectionError("storage unavailable")
+
+    monkeypatch.setattr(storage, "download_file", download_fails)
+    spec = {"cpu_limit": 1.0, "memory_limit_mb": 512, "docker_image": "model:latest", "version_id": "v1"}
+    result = tiling.run_tile_task.apply(args=[str(job_id), 0, spec])
+
+    assert result.failed()
+    assert objects == set()
+    with session_scope() as db:
+        assert db.query(Job.status).scalar() == JobStatus.FAILED
+
+
+def test_load_as_memmap_refuses_inputs_too_large_to_decode(tmp_path, monkeypatch):
+    monkeypatch.setattr(tiling.settings, "TILING_MAX_DECODE_MB", 1)
+    path = str(tmp_path / "in.png")
+    Image.new("RGB", (1024, 512)).save(path)
+
+    with pytest.raises(ValueError, match="more than the 1 MB allowed"):
+        tiling.load_as_memmap(path, str(tmp_path))
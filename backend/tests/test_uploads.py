@@ -0,0 +1,95 @@
+"""A volume upload whose conversion fails can be completed again without resending it."""
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.db import SessionLocal
+from app.models import Job, JobStatus, UploadPart, UploadSession, UploadSessionStatus
+from app.routes import jobs as job_routes
+from app.routes import uploads as upload_routes
+from app.storage import storage
+
+
+@pytest.fixture
+def objects(monkeypatch):
+    stored = {}
+    assembled = []
+
+    def complete_multipart_upload(object_name, upload_id, parts):
+        assembled.append(object_name)
+        stored[object_name] = b"\x00" * 10
+
+    class Stat:
+        def __init__(self, size):
+            self.size = size
+
+    monkeypatch.setattr(storage, "complete_multipart_upload", complete_multipart_upload)
+    monkeypatch.setattr(storage, "stat_object", lambda object_name: Stat(len(stored[object_name])) if object_name in stored else None)
+    monkeypatch.setattr(storage, "download_file", lambda object_name, path: open(path, "wb").write(stored[object_name]))
+    monkeypatch.setattr(storage, "delete_object", lambda object_name: stored.pop(object_name, None))
+    monkeypatch.setattr(job_routes, "_record_upload", lambda db, job: {"queued": False})
+    return stored, assembled
+
+
+def _volume_upload(db):
+    job = Job(id=uuid.uuid4(), version_id=uuid.uuid4(), status=JobStatus.UPLOADING, input_path=f"inputs/{uuid.uuid4()}/volume")
+    session = UploadSession(
+        id=uuid.uuid4(), kind="job_volume", target_id=job.id, filename="scan.nii.gz",
+        object_name=f"uploads/{job.id}/volume/scan.nii.gz", multipart_upload_id="mp-1",
+        size=10, chunk_size=10,
+    )
+    db.add_all([job, session])
+    db.add(UploadPart(session_id=session.id, part_number=1, etag="e1", size=10, sha256="0" * 64))
+    db.commit()
+    return session
+
+
+def unreadable(paths, input_path):
+    raise ValueError("truncated file")
+
+
+def test_failed_conversion_keeps_the_assembled_upload(objects, monkeypatch):
+    stored, assembled = objects
+    monkeypatch.setattr(upload_routes, "store_volume", unreadable)
+    db = SessionLocal()
+    try:
+        session = _volume_upload(db)
+
+        with pytest.raises(HTTPException) as error:
+            upload_routes.complete_upload(session.id, current_user=None, db=db)
+
+        assert error.value.status_code == 400
+        db.expire_all()
+        assert db.get(UploadSession, session.id).status == UploadSessionStatus.ASSEMBLED
+        assert session.object_name in stored
+
+        monkeypatch.setattr(upload_routes, "store_volume", lambda paths, input_path: {"shape": [2, 2, 2], "chunks": [{}]})
+        result = upload_routes.complete_upload(session.id, current_user=None, db=db)
+
+        assert result["shape"] == [2, 2, 2]
+        assert assembled == [session.object_name]
+        db.expire_all()
+        assert db.get(UploadSession, session.id).status == UploadSessionStatus.COMPLETED
+        assert db.query(UploadPart).filter(UploadPart.session_id == session.id).count() == 0
+        assert stored == {}
+    finally:
+        db.close()
+
+
+def test_aborting_an_assembled_upload_deletes_the_object(objects, monkeypatch):
+    stored, _ = objects
+    monkeypatch.setattr(upload_routes, "store_volume", unreadable)
+    db = SessionLocal()
+    try:
+        session = _volume_upload(db)
+        with pytest.raises(HTTPException):
+            upload_routes.complete_upload(session.id, current_user=None, db=db)
+
+        upload_routes.abort_upload(session.id, current_user=None, db=db)
+
+        db.expire_all()
+        assert db.get(UploadSession, session.id).status == UploadSessionStatus.ABORTED
+        assert stored == {}
+    finally:
+        db.close()
@@ -0,0 +1,22 @@
+"""Volume manifests describe the chunks as written."""
+import numpy as np
+import nibabel as nib
+
+from app.volumes import convert_volume
+
+
+def test_scaled_nifti_records_the_dtype_of_its_chunks(tmp_path):
+    raw = np.arange(4 * 5 * 6, dtype=np.int16).reshape(4, 5, 6)
+    img = nib.Nifti1Image(raw, np.eye(4))
+    img.header.set_data_dtype(np.int16)
+    img.header.set_slope_inter(0.5, -10)
+    path = str(tmp_path / "scan.nii.gz")
+    nib.save(img, path)
+    out_dir = tmp_path / "volume"
+    out_dir.mkdir()
+
+    manifest = convert_volume([path], str(out_dir))
+
+    chunk = np.load(out_dir / manifest["chunks"][0])
+    assert manifest["dtype"] == str(chunk.dtype) != "int16"
+    assert chunk[0, 1, 2] == raw[1, 2, 0] * 0.5 - 10
@@ -25,7 +25,20 @@ export const getJobs = async () => {
   return response.data;
 };
 
-export const uploadImageToPresignedUrl = async (uploadUrl, imageFile) => {
+export const uploadImageToPresignedUrl = async (uploadUrl, imageFile, { method = 'POST', completeUrl = null } = {}) => {
+  if (method === 'PUT') {
+    // Direct transfer mode: raw body straight to MinIO, then tell the API
+    const putResponse = await fetch(uploadUrl, {
+      method: 'PUT',
+      body: imageFile
+    });
+    if (!putResponse.ok) {
+      throw new Error('Image upload failed');
+    }
+    const response = await apiClient.post(completeUrl);
+    return response.data;
+  }
+
   // Create FormData for file upload
   const formData = new FormData();
   formData.append('file', imageFile);
@@ -65,8 +78,8 @@ export const createMultipleJobs = async (jobData) => {
 // Upload multiple images to presigned URLs
 export const uploadMultipleImages = async (uploadTasks) => {
   const results = await Promise.allSettled(
-    uploadTasks.map(({ url, file }) =>
-      uploadImageToPresignedUrl(url, file)
+    uploadTasks.map(({ url, file, method, completeUrl }) =>
+      uploadImageToPresignedUrl(url, file, { method, completeUrl })
     )
   );
 
@@ -77,17 +90,12 @@ export const uploadMultipleImages = async (uploadTasks) => {
   }));
 };
 
-// Trigger multiple jobs
+// Trigger multiple jobs in one request
 export const runMultipleJobs = async (jobIds) => {
-  const results = await Promise.allSettled(
-    jobIds.map(jobId => runJob(jobId))
-  );
-
-  return results.map((result, index) => ({
-    jobId: jobIds[index],
-    success: result.status === 'fulfilled',
-    error: result.status === 'rejected' ? result.reason.message : null
-  }));
+  const response = await apiClient.post('/api/jobs/run', {
+    job_ids: jobIds
+  });
+  return response.data;
 };
 
 // Get multiple jobs status (for polling)
@@ -65,7 +65,7 @@ export const triggerBuild = async (versionId) => {
 };
 
 // Upload via API proxy endpoint (no presigned URL needed)
-export const uploadToPresignedUrl = async (uploadUrl, file, onProgress) => {
+export const uploadToPresignedUrl = async (uploadUrl, file, onProgress, method = 'POST') => {
   console.log('Uploading to API endpoint:', uploadUrl);
   console.log('File size:', file.size, 'bytes');
 
@@ -108,9 +108,15 @@ export const uploadToPresignedUrl = async (uploadUrl, file, onProgress) => {
       reject(new Error('Upload failed: Network error'));
     });
 
-    xhr.open('POST', fullUrl);
-    xhr.setRequestHeader('Authorization', `Bearer ${token}`);
-    xhr.send(formData);
+    if (method === 'PUT') {
+      // Presigned MinIO URL: the signature is the credential, body is the raw file
+      xhr.open('PUT', fullUrl);
+      xhr.send(file);
+    } else {
+      xhr.open('POST', fullUrl);
+      xhr.setRequestHeader('Authorization', `Bearer ${token}`);
+      xhr.send(formData);
+    }
   });
 };
 
@@ -0,0 +1,70 @@
+import apiClient from './client';
+
+const PARALLEL_PARTS = 4;
+const PART_RETRIES = 3;
+
+const sha256Hex = async (buffer) => {
+  const digest = await crypto.subtle.digest('SHA-256', buffer);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, '0'))
+    .join('');
+};
+
+const uploadPart = async (uploadId, partNumber, blob) => {
+  const body = await blob.arrayBuffer();
+  const checksum = await sha256Hex(body);
+  for (let attempt = 1; ; attempt++) {
+    try {
+      await apiClient.put(`/api/uploads/${uploadId}/parts/${partNumber}`, body, {
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          'X-Content-SHA256': checksum
+        }
+      });
+      return;
+    } catch (err) {
+      // 4xx means the part itself is wrong; retrying won't help
+      const status = err.response?.status;
+      if (attempt >= PART_RETRIES || (status && status < 500 && status !== 429)) {
+        throw err;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000 * attempt));
+    }
+  }
+};
+
+// Resumable chunked upload of a model package or NIfTI volume.
+// Re-running it for the same file and target skips parts the server already has.
+export const uploadResumable = async (kind, targetId, file, onProgress) => {
+  const { data: session } = await apiClient.post('/api/uploads/', {
+    kind,
+    target_id: targetId,
+    filename: file.name,
+    size: file.size
+  });
+
+  const done = new Set(session.uploaded_parts);
+  const pending = [];
+  for (let n = 1; n <= session.part_count; n++) {
+    if (!done.has(n)) pending.push(n);
+  }
+
+  let uploadedBytes = Math.min(done.size * session.chunk_size, file.size);
+  const report = () => onProgress && onProgress((uploadedBytes / file.size) * 100);
+  report();
+
+  const worker = async () => {
+    while (pending.length > 0) {
+      const partNumber = pending.shift();
+      const start = (partNumber - 1) * session.chunk_size;
+      const blob = file.slice(start, Math.min(start + session.chunk_size, file.size));
+      await uploadPart(session.upload_id, partNumber, blob);
+      uploadedBytes += blob.size;
+      report();
+    }
+  };
+  await Promise.all(Array.from({ length: PARALLEL_PARTS }, worker));
+
+  const response = await apiClient.post(`/api/uploads/${session.upload_id}/complete`);
+  return response.data;
+};
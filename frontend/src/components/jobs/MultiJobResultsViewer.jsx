@@ -17,7 +17,11 @@ export const MultiJobResultsViewer = ({ jobStatuses, onRetryJobs }) => {
       .filter(j => j.status === JobStatus.FAILED)
       .map(j => j.id);
 
-    return { totalJobs, succeededCount, failedCount, failedJobIds };
+    const succeededJobIds = jobArray
+      .filter(j => j.status === JobStatus.SUCCEEDED)
+      .map(j => j.id);
+
+    return { totalJobs, succeededCount, failedCount, failedJobIds, succeededJobIds };
   }, [jobStatuses]);
 
   const toggleJobExpanded = (jobId) => {
@@ -67,6 +71,17 @@ export const MultiJobResultsViewer = ({ jobStatuses, onRetryJobs }) => {
         </Button>
       )}
 
+      {/* Download all succeeded outputs as one streamed ZIP */}
+      {stats.succeededCount > 0 && (
+        <a
+          href={`/api/jobs/outputs/archive?${stats.succeededJobIds.map(id => `job_ids=${id}`).join('&')}`}
+          download
+          className="inline-block text-primary-500 hover:underline"
+        >
+          Download All Results (ZIP)
+        </a>
+      )}
+
       {/* Results List */}
       <div className="space-y-2">
         <h3 className="font-semibold text-gray-800 mb-2">Job Results</h3>
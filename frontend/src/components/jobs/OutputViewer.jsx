@@ -4,6 +4,7 @@ import { LoadingSpinner } from '../common/LoadingSpinner';
 
 export const OutputViewer = ({ jobId, jobStatus }) => {
   const [outputs, setOutputs] = useState([]);
+  const [archiveUrl, setArchiveUrl] = useState(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState('');
 
@@ -17,6 +18,7 @@ export const OutputViewer = ({ jobId, jobStatus }) => {
     try {
       const data = await getJobOutputs(jobId);
       setOutputs(data.output_urls);
+      setArchiveUrl(data.archive_url);
     } catch (err) {
       setError('Failed to load outputs');
     } finally {
@@ -38,11 +40,18 @@ export const OutputViewer = ({ jobId, jobStatus }) => {
 
   return (
     <div className="space-y-4">
-      <h3 className="text-lg font-semibold">Output Images</h3>
+      <div className="flex items-center justify-between">
+        <h3 className="text-lg font-semibold">Output Images</h3>
+        {archiveUrl && outputs.length > 1 && (
+          <a href={archiveUrl} download className="text-primary-500 hover:underline">
+            Download all (ZIP)
+          </a>
+        )}
+      </div>
       <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
         {outputs.map((url, index) => (
           <div key={index} className="border rounded-lg p-4">
-            <img src={url} alt={`Output ${index + 1}`} className="w-full h-auto rounded" />
+            <img src={`${url}?variant=preview`} loading="lazy" alt={`Output ${index + 1}`} className="w-full h-auto rounded" />
             <a
               href={url}
               download
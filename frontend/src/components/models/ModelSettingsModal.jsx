@@ -12,7 +12,9 @@ export const ModelSettingsModal = ({ model, onClose, onUpdate }) => {
     description: model.description || '',
     is_public: model.is_public,
     imaging_modality_tags: model.imaging_modality_tags || [],
-    organ_tags: model.organ_tags || []
+    organ_tags: model.organ_tags || [],
+    tiling_enabled: model.tiling_enabled || false,
+    cache_results: model.cache_results ?? true
   });
   const [isUpdating, setIsUpdating] = useState(false);
   const [isDeleting, setIsDeleting] = useState(false);
@@ -186,6 +188,32 @@ export const ModelSettingsModal = ({ model, onClose, onUpdate }) => {
                   </label>
                 </div>
 
+                <div className="flex items-center">
+                  <input
+                    type="checkbox"
+                    id="tiling_enabled"
+                    checked={formData.tiling_enabled}
+                    onChange={(e) => setFormData({ ...formData, tiling_enabled: e.target.checked })}
+                    className="h-4 w-4 text-primary-500 focus:ring-primary-500 border-gray-300 rounded"
+                  />
+                  <label htmlFor="tiling_enabled" className="ml-2 text-sm text-gray-700">
+                    Split very large images into tiles (model output must match input size)
+                  </label>
+                </div>
+
+                <div className="flex items-center">
+                  <input
+                    type="checkbox"
+                    id="cache_results"
+                    checked={formData.cache_results}
+                    onChange={(e) => setFormData({ ...formData, cache_results: e.target.checked })}
+                    className="h-4 w-4 text-primary-500 focus:ring-primary-500 border-gray-300 rounded"
+                  />
+                  <label htmlFor="cache_results" className="ml-2 text-sm text-gray-700">
+                    Reuse results for identical inputs (disable for nondeterministic models)
+                  </label>
+                </div>
+
                 <TagSelector
                   label="Imaging Modality (select all that apply)"
                   tags={IMAGING_MODALITY_TAGS}
@@ -214,7 +242,7 @@ export const ModelSettingsModal = ({ model, onClose, onUpdate }) => {
                       </label>
                       {model.before_image_path && (
                         <img
-                          src={`http://localhost:8000/api/models/${model.id}/demo/before`}
+                          src={`http://localhost:8000/api/models/${model.id}/demo/before?v=${encodeURIComponent(model.before_image_path)}&variant=thumb`}
                           alt="Before"
                           className="w-full h-40 object-cover rounded-lg mb-2 border border-gray-200"
                         />
@@ -244,7 +272,7 @@ export const ModelSettingsModal = ({ model, onClose, onUpdate }) => {
                       </label>
                       {model.after_image_path && (
                         <img
-                          src={`http://localhost:8000/api/models/${model.id}/demo/after`}
+                          src={`http://localhost:8000/api/models/${model.id}/demo/after?v=${encodeURIComponent(model.after_image_path)}&variant=thumb`}
                           alt="After"
                           className="w-full h-40 object-cover rounded-lg mb-2 border border-gray-200"
                         />
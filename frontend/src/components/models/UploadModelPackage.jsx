@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { createModelVersion, uploadToPresignedUrl, triggerBuild } from '../../api/models';
+import { uploadResumable } from '../../api/uploads';
 import { Button } from '../common/Button';
 import { ProgressBar } from '../common/ProgressBar';
 
@@ -36,7 +37,7 @@ export const UploadModelPackage = ({ modelId }) => {
     try {
       // Step 1: Create version and get upload URL
       console.log('Step 1: Creating model version...');
-      const { version_id, upload_url } = await createModelVersion({
+      const { version_id, upload_url, upload_method } = await createModelVersion({
         model_id: modelId,
         version_number: versionNumber
       });
@@ -45,9 +46,13 @@ export const UploadModelPackage = ({ modelId }) => {
 
       // Step 2: Upload file to presigned URL with progress tracking
       console.log('Step 2: Uploading file to MinIO...');
-      await uploadToPresignedUrl(upload_url, file, (progress) => {
-        setUploadProgress(Math.round(progress));
-      });
+      const onProgress = (progress) => setUploadProgress(Math.round(progress));
+      if (upload_method === 'PUT') {
+        await uploadToPresignedUrl(upload_url, file, onProgress, upload_method);
+      } else {
+        // Chunked and resumable: a dropped connection only costs the parts in flight
+        await uploadResumable('model_package', version_id, file, onProgress);
+      }
       console.log('Upload successful');
 
       // Step 3: Trigger build
@@ -201,7 +201,7 @@ export const HomePage = () => {
                       {model.before_image_path && (
                         <div className="relative">
                           <img
-                            src={`http://localhost:8000/api/models/${model.id}/demo/before`}
+                            src={`http://localhost:8000/api/models/${model.id}/demo/before?v=${encodeURIComponent(model.before_image_path)}&variant=thumb`}
                             alt="Before"
                             className="w-full h-32 object-cover rounded-tl-lg"
                           />
@@ -213,7 +213,7 @@ export const HomePage = () => {
                       {model.after_image_path && (
                         <div className="relative">
                           <img
-                            src={`http://localhost:8000/api/models/${model.id}/demo/after`}
+                            src={`http://localhost:8000/api/models/${model.id}/demo/after?v=${encodeURIComponent(model.after_image_path)}&variant=thumb`}
                             alt="After"
                             className={`w-full h-32 object-cover ${!model.before_image_path ? 'rounded-t-lg' : 'rounded-tr-lg'}`}
                           />
@@ -100,11 +100,11 @@ export const InferencePage = () => {
   };
 
   const handleSingleImageInference = async () => {
-    const { job_id, upload_url } = await createJob({
+    const { job_id, upload_url, upload_method, complete_url } = await createJob({
       version_id: selectedVersionId,
       name: jobName || null
     });
-    await uploadImageToPresignedUrl(upload_url, selectedFiles[0]);
+    await uploadImageToPresignedUrl(upload_url, selectedFiles[0], { method: upload_method, completeUrl: complete_url });
     await runJob(job_id);
     setJobId(job_id);
     setStep(3);
@@ -123,6 +123,8 @@ export const InferencePage = () => {
       // 2. Upload all images
       const uploadTasks = upload_urls.map((item) => ({
         url: item.url,
+        method: item.upload_method,
+        completeUrl: item.complete_url,
         file: selectedFiles.find(f => f.name === item.filename)
       }));
       const uploadResults = await uploadMultipleImages(uploadTasks);
@@ -163,6 +165,8 @@ export const InferencePage = () => {
       // 2. Upload images
       const uploadTasks = jobs.map(job => ({
         url: job.upload_url,
+        method: job.upload_method,
+        completeUrl: job.complete_url,
         file: selectedFiles.find(f => f.name === job.filename)
       }));
 
@@ -210,13 +214,13 @@ export const InferencePage = () => {
         const job_name = jobName ? `${jobName} - ${base_name}` : base_name;
 
         // Create individual job
-        const { job_id, upload_url } = await createJob({
+        const { job_id, upload_url, upload_method, complete_url } = await createJob({
           version_id: selectedVersionId,
           name: job_name
         });
 
         // Upload image
-        await uploadImageToPresignedUrl(upload_url, file);
+        await uploadImageToPresignedUrl(upload_url, file, { method: upload_method, completeUrl: complete_url });
 
         // Run job
         await runJob(job_id);
@@ -207,6 +207,34 @@ export const ModelDetailPage = () => {
           </div>
         )}
 
+        {version?.benchmark_p50_ms != null && (
+          <Card>
+            <h3 className="font-semibold mb-2">Benchmark</h3>
+            <div className="grid grid-cols-2 md:grid-cols-5 gap-4 text-sm">
+              <div>
+                <p className="text-gray-500">Import time</p>
+                <p className="font-medium">{Math.round(version.benchmark_import_time_ms)} ms</p>
+              </div>
+              <div>
+                <p className="text-gray-500">First inference</p>
+                <p className="font-medium">{Math.round(version.benchmark_first_inference_ms)} ms</p>
+              </div>
+              <div>
+                <p className="text-gray-500">p50 per image</p>
+                <p className="font-medium">{Math.round(version.benchmark_p50_ms)} ms</p>
+              </div>
+              <div>
+                <p className="text-gray-500">p95 per image</p>
+                <p className="font-medium">{Math.round(version.benchmark_p95_ms)} ms</p>
+              </div>
+              <div>
+                <p className="text-gray-500">Peak memory</p>
+                <p className="font-medium">{Math.round(version.benchmark_peak_memory_mb)} MB</p>
+              </div>
+            </div>
+          </Card>
+        )}
+
         {version?.build_logs && (
           <Card>
             <h3 className="font-semibold mb-2">Build Logs</h3>
@@ -436,7 +464,7 @@ export const ModelDetailPage = () => {
                 <div>
                   <p className="text-sm font-medium text-gray-700 mb-2">Before</p>
                   <img
-                    src={`http://localhost:8000/api/models/${model.id}/demo/before`}
+                    src={`http://localhost:8000/api/models/${model.id}/demo/before?v=${encodeURIComponent(model.before_image_path)}&variant=preview`}
                     alt="Before demonstration"
                     className="w-full rounded-lg border border-gray-200 shadow-sm"
                   />
@@ -446,7 +474,7 @@ export const ModelDetailPage = () => {
                 <div>
                   <p className="text-sm font-medium text-gray-700 mb-2">After</p>
                   <img
-                    src={`http://localhost:8000/api/models/${model.id}/demo/after`}
+                    src={`http://localhost:8000/api/models/${model.id}/demo/after?v=${encodeURIComponent(model.after_image_path)}&variant=preview`}
                     alt="After demonstration"
                     className="w-full rounded-lg border border-gray-200 shadow-sm"
                   />
@@ -191,7 +191,7 @@ export const PublicModelsPage = () => {
                     {model.before_image_path && (
                       <div className="relative">
                         <img
-                          src={`http://localhost:8000/api/models/${model.id}/demo/before`}
+                          src={`http://localhost:8000/api/models/${model.id}/demo/before?v=${encodeURIComponent(model.before_image_path)}&variant=thumb`}
                           alt="Before"
                           className="w-full h-32 object-cover rounded-tl-lg"
                         />
@@ -203,7 +203,7 @@ export const PublicModelsPage = () => {
                     {model.after_image_path && (
                       <div className="relative">
                         <img
-                          src={`http://localhost:8000/api/models/${model.id}/demo/after`}
+                          src={`http://localhost:8000/api/models/${model.id}/demo/after?v=${encodeURIComponent(model.after_image_path)}&variant=thumb`}
                           alt="After"
                           className={`w-full h-32 object-cover ${!model.before_image_path ? 'rounded-t-lg' : 'rounded-tr-lg'}`}
                         />